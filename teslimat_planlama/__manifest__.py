@@ -51,8 +51,10 @@
 
         # Action'ları içeren Views (ONCE yukle - menu bunları referans ediyor)
         'views/teslimat_ana_sayfa_views.xml',  # action_teslimat_ana_sayfa
+        'views/teslimat_filo_musaitlik_views.xml',  # action_teslimat_filo_musaitlik
         'views/teslimat_belgesi_views.xml',     # action_teslimat_belgesi, action_teslimat_belgesi_surucu
         'views/teslimat_arac_kapatma_views.xml',  # action_teslimat_arac_kapatma
+        'views/teslimat_kapasite_defteri_views.xml',  # action_teslimat_kapasite_defteri
 
         # Menu (Tüm action'lar yuklendikten sonra)
         'views/menu_views.xml',
@@ -62,6 +64,7 @@
         'views/teslimat_gun_kapatma_wizard_views.xml',
         'views/teslimat_tamamlama_wizard_views.xml',
         'views/teslimat_arac_kapatma_wizard_views.xml',
+        'views/teslimat_toplu_ice_aktarma_wizard_views.xml',
         
         # Inherit Views
         'views/stock_picking_views.xml',
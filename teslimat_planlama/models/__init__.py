@@ -9,9 +9,12 @@ from . import teslimat_arac_kapatma
 from . import teslimat_belgesi_validators  # Mixin: Validasyon metodları
 from . import teslimat_belgesi_actions  # Mixin: Action ve onchange metodları
 from . import teslimat_belgesi
+from . import teslimat_kapasite_defteri
+from . import teslimat_kapasite_kilit
 from . import teslimat_belgesi_urun
 from . import teslimat_ana_sayfa
-from . import teslimat_ana_sayfa_gun
+from . import teslimat_filo_musaitlik
+from . import teslimat_rota_matris
 from . import res_partner
 from . import sms_sms
 from . import stock_picking
@@ -1,15 +1,23 @@
 """Res Partner Inherit - Teslimat Alanları."""
+import hashlib
 import logging
 
 from odoo import fields, models
 
+from .teslimat_utils import format_partner_address_text, normalize_turkce
+
 _logger = logging.getLogger(__name__)
 
+# Bu alanlardan biri değişirse geocode edilmiş koordinat geçersizdir.
+GEOCODE_ADRES_ALANLARI = ("street", "street2", "zip", "city", "state_id", "country_id")
+
 
 class ResPartner(models.Model):
     """Res Partner Inherit.
 
-    Müşterilere teslimat geçmişini (teslimat belgeleri) ekler.
+    Müşterilere teslimat geçmişini (teslimat belgeleri) ekler ve rota
+    sıralaması için adresin bir kez geocode edilmesini sağlar: koordinat,
+    adres alanlarının özetiyle (hash) birlikte saklanır; adres değişince silinir.
     """
 
     _inherit = "res.partner"
@@ -20,3 +28,126 @@ class ResPartner(models.Model):
         "musteri_id",
         string="Teslimat Belgeleri",
     )
+
+    # Geocode önbelleği (rota sıralama)
+    teslimat_geocode_ozeti = fields.Char(
+        string="Geocode Adres Özeti",
+        copy=False,
+        readonly=True,
+        help="Koordinatı geocode eden adresin özeti. Boşsa koordinat elle "
+        "girilmiştir (modül dokunmaz).",
+    )
+    teslimat_geocode_tarihi = fields.Datetime(
+        string="Geocode Tarihi", copy=False, readonly=True
+    )
+    teslimat_koordinat_elle = fields.Boolean(
+        string="Koordinat Elle Girildi",
+        copy=False,
+        readonly=True,
+        help="Koordinat kullanıcı tarafından girildi; adres değişince silinmez "
+        "ve yeniden geocode edilmez.",
+    )
+
+    def _teslimat_adres_ozeti(self) -> str:
+        """Adres alanlarının normalize özeti (değişiklik tespiti için)."""
+        self.ensure_one()
+        parcalar = [
+            self.street,
+            self.street2,
+            self.zip,
+            self.city,
+            self.state_id.name if self.state_id else "",
+            self.country_id.code if self.country_id else "",
+        ]
+        metin = "|".join(" ".join(normalize_turkce(p or "").split()) for p in parcalar)
+        return hashlib.sha1(metin.encode("utf-8")).hexdigest()
+
+    def write(self, vals):
+        """Adres değişince modülün geocode ettiği koordinatı temizle.
+
+        Koordinat geocode dışında (elle) yazılırsa kaynak işaretlenir; elle
+        girilen koordinat adres değişiminde korunur.
+        """
+        if "partner_latitude" in vals or "partner_longitude" in vals:
+            if not self.env.context.get("teslimat_geocode_yazimi"):
+                vals = dict(
+                    vals,
+                    teslimat_koordinat_elle=True,
+                    teslimat_geocode_ozeti=False,
+                    teslimat_geocode_tarihi=False,
+                )
+            return super().write(vals)
+        if not set(GEOCODE_ADRES_ALANLARI) & set(vals):
+            return super().write(vals)
+
+        geocoded = self.filtered(
+            lambda p: p.teslimat_geocode_ozeti and not p.teslimat_koordinat_elle
+        )
+        res = super().write(vals)
+        stale = geocoded.filtered(
+            lambda p: p.teslimat_geocode_ozeti != p._teslimat_adres_ozeti()
+        )
+        if stale:
+            super(ResPartner, stale).write(
+                {
+                    "partner_latitude": 0.0,
+                    "partner_longitude": 0.0,
+                    "teslimat_geocode_ozeti": False,
+                    "teslimat_geocode_tarihi": False,
+                }
+            )
+        return res
+
+    def _teslimat_geocode(self, api_key: str) -> int:
+        """Koordinatı olmayan (veya adresi değişmiş) müşterileri bir kez geocode et.
+
+        Elle girilmiş koordinatlar (teslimat_koordinat_elle veya özet boş)
+        korunur. Google'ın bulamadığı adresler de özetle işaretlenir; adres
+        değişene kadar yeniden sorulmaz.
+
+        Returns:
+            int: Koordinatı yazılan müşteri sayısı
+        """
+        from .teslimat_route_service import geocode_addresses
+
+        bekleyen = {}  # partner -> (özet, adres metni)
+        for partner in self:
+            ozet = partner._teslimat_adres_ozeti()
+            if partner.teslimat_geocode_ozeti == ozet:
+                continue
+            koordinat_var = partner.partner_latitude or partner.partner_longitude
+            if koordinat_var and (
+                partner.teslimat_koordinat_elle or not partner.teslimat_geocode_ozeti
+            ):
+                continue
+            metin = format_partner_address_text(partner)
+            if metin:
+                bekleyen[partner] = (ozet, metin)
+        if not bekleyen:
+            return 0
+
+        sonuclar = geocode_addresses(
+            api_key, sorted({metin for _ozet, metin in bekleyen.values()})
+        )
+        simdi = fields.Datetime.now()
+        yazilan = 0
+        for partner, (ozet, metin) in bekleyen.items():
+            if metin not in sonuclar:
+                continue
+            nokta = sonuclar[metin]
+            partner.sudo().with_context(teslimat_geocode_yazimi=True).write(
+                {
+                    "teslimat_koordinat_elle": False,
+                    "partner_latitude": nokta[0] if nokta else 0.0,
+                    "partner_longitude": nokta[1] if nokta else 0.0,
+                    "teslimat_geocode_ozeti": ozet,
+                    "teslimat_geocode_tarihi": simdi,
+                }
+            )
+            yazilan += 1 if nokta else 0
+        _logger.info(
+            "Geocode: %s müşteri sorgulandı, %s koordinat yazıldı",
+            len(bekleyen),
+            yazilan,
+        )
+        return yazilan
@@ -84,7 +84,8 @@ class StockPicking(models.Model):
         belgesindeki manuel iptal yetki kontrolü atlanır (kullanıcı zaten
         transferi/siparişi iptal etme yetkisine sahiptir). sudo kullanılır ki
         teslimat başka bir kullanıcıya ait olsa bile cascade her zaman başarılı
-        olsun.
+        olsun. İptal write üzerinden yapıldığı için kapasite defteri de aynı
+        transaction'da düşülür.
         """
         for picking in self:
             teslimatlar = picking.teslimat_belgesi_ids
@@ -1,22 +1,20 @@
 """Teslimat Ana Sayfa - Kapasite Sorgulama Modeli."""
 import logging
 from datetime import date, datetime, timedelta
-from typing import Optional
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 
 from .teslimat_constants import (
-    CANCELLED_STATUS,
     DAILY_DELIVERY_LIMIT,
     FORECAST_DAYS,
     GUN_ESLESMESI,
-    GUN_KODU_MAP,
+    GUN_KISA_ADLARI,
     LOW_CAPACITY_THRESHOLD,
     SAME_DAY_DELIVERY_CUTOFF_HOUR,
+    get_arac_kapatma_sebep_label,
 )
 from .teslimat_utils import (
-    get_gun_kodu,
     get_istanbul_state,
     get_istanbul_time,
     is_manager,
@@ -164,12 +162,11 @@ class TeslimatAnaSayfa(models.TransientModel):
         store=False,
     )
 
-    # Uygun günler listesi
-    uygun_gunler = fields.One2many(
-        "teslimat.ana.sayfa.gun",
-        "ana_sayfa_id",
+    # Uygun günler tablosu: satırlar sunucuda saklanmaz; uygun_gunler_tablo
+    # widget'ı bu anahtar değişince get_uygun_gunler_json ile günleri çeker.
+    uygun_gunler_anahtar = fields.Char(
         string="Uygun Günler",
-        compute="_compute_uygun_gunler",
+        compute="_compute_uygun_gunler_anahtar",
         store=False,
     )
 
@@ -238,40 +235,6 @@ class TeslimatAnaSayfa(models.TransientModel):
                     )
 
 
-    def _check_ilce_gun_uygunlugu(
-        self, ilce: Optional[models.Model], tarih: fields.Date
-    ) -> bool:
-        """İlçe-gün uygunluğunu kontrol et (Dinamik - Database'den).
-
-        Args:
-            ilce: İlçe kaydı
-            tarih: Kontrol edilecek tarih
-
-        Returns:
-            bool: Uygun ise True
-        """
-        if not ilce:
-            return False
-
-        # Gün kodunu belirle
-        tarih_obj = fields.Date.to_date(tarih)
-        gun_kodu = get_gun_kodu(tarih_obj)
-
-        if not gun_kodu:
-            return False
-
-        # Günü bul
-        gun = self.env["teslimat.gun"].search([("gun_kodu", "=", gun_kodu)], limit=1)
-        if not gun:
-            return False
-
-        # Database'den ilçe-gün eşleşmesi kontrol et
-        gun_ilce = self.env["teslimat.gun.ilce"].search(
-            [("gun_id", "=", gun.id), ("ilce_id", "=", ilce.id)], limit=1
-        )
-
-        return bool(gun_ilce)
-
     @api.depends("ilce_id")
     def _compute_uygun_araclar(self) -> None:
         """Seçilen ilçeye uygun araçları hesapla."""
@@ -286,61 +249,123 @@ class TeslimatAnaSayfa(models.TransientModel):
                 record.uygun_arac_ids = False
 
     @api.depends("ilce_id", "arac_id", "ilce_uygun_mu")
-    def _compute_uygun_gunler(self) -> None:
+    def _compute_uygun_gunler_anahtar(self) -> None:
+        """Widget'ın sorgulayacağı "araç,ilçe" anahtarı (uygun değilse boş)."""
+        for record in self:
+            if record.ilce_id and record.arac_id and record.ilce_uygun_mu:
+                record.uygun_gunler_anahtar = f"{record.arac_id.id},{record.ilce_id.id}"
+            else:
+                record.uygun_gunler_anahtar = False
+
+    @api.model
+    def get_uygun_gunler_json(self, arac_id: int, ilce_id: int) -> list:
+        """Kapasite Sorgulama gün listesi (uygun_gunler_tablo widget'ı için RPC).
+
+        Salt okunur: hiçbir kayıt yazılmaz. Araç kapalı günler için kapatma
+        sebebi ve kapatan kişi de eklenir (satıra tıklanınca uyarıda gösterilir).
+
+        Args:
+            arac_id: Araç ID
+            ilce_id: İlçe ID
+
+        Returns:
+            list: [{"tarih": "YYYY-MM-DD", "tarih_str", "gun_adi",
+                    "teslimat_sayisi", "toplam_kapasite", "kalan_kapasite",
+                    "doluluk", "durum_text", "arac_kapali_mi", "kapatma_sebep",
+                    "kapatan_kisi", "yonetici_bypass"}]
+        """
+        arac = self.env["teslimat.arac"].browse(arac_id).exists()
+        ilce = self.env["teslimat.ilce"].browse(ilce_id).exists()
+        if not arac or not ilce or ilce not in arac.uygun_ilceler:
+            return []
+
+        gunler = self._uygun_gunler_hesapla(arac, ilce)
+        kapali_gunler = [gun["tarih"] for gun in gunler if gun["arac_kapali_mi"]]
+        kapatmalar = self.env["teslimat.arac.kapatma"]
+        if kapali_gunler:
+            kapatmalar = kapatmalar.search([
+                ("arac_id", "=", arac.id),
+                ("aktif", "=", True),
+                ("baslangic_tarihi", "<=", max(kapali_gunler)),
+                ("bitis_tarihi", ">=", min(kapali_gunler)),
+            ])
+
+        sonuc = []
+        for gun in gunler:
+            tarih = gun["tarih"]
+            kapatma = next(
+                (
+                    k
+                    for k in kapatmalar
+                    if gun["arac_kapali_mi"] and k.baslangic_tarihi <= tarih <= k.bitis_tarihi
+                ),
+                None,
+            )
+            toplam = gun["toplam_kapasite"]
+            sonuc.append(dict(
+                gun,
+                tarih=fields.Date.to_string(tarih),
+                tarih_str=f"{tarih.strftime('%d.%m.%Y')} {GUN_KISA_ADLARI[tarih.weekday()]}",
+                doluluk=min(100, round(100 * gun["teslimat_sayisi"] / toplam)) if toplam > 0 else 0,
+                kapatma_sebep=get_arac_kapatma_sebep_label(kapatma.sebep) if kapatma else "",
+                kapatan_kisi=(kapatma.kapatan_kullanici_id.name or "") if kapatma else "",
+            ))
+        return sonuc
+
+    def _uygun_gunler_hesapla(self, arac, ilce) -> list:
         """Seçilen ilçe ve araç için uygun günleri hesapla.
         
         Bu metod sonraki 30 günü analiz eder ve her gün için:
         - İlçe-gün uygunluğunu kontrol eder
         - Kapasite durumunu hesaplar
         - Araç kapatma durumunu kontrol eder
+
+        Returns:
+            list: Tarihe göre sıralı gün sözlükleri (_calculate_day_capacity_status)
         """
-        for record in self:
-            if not record.ilce_id or not record.arac_id or not record.ilce_uygun_mu:
-                record.uygun_gunler = [(5, 0, 0)]
-                continue
+        yonetici_mi = is_manager(self.env)
+        # Bugün = İstanbul tarihi (geçmiş gün görünmesin, yarın doğru görünsün)
+        simdi_istanbul = get_istanbul_time()
+        bugun = simdi_istanbul.date()
+        saat = simdi_istanbul.hour
+        
+        # 1. Teslimat sayılarını batch olarak al (N+1 query önleme)
+        teslimat_sayisi_by_date = self._get_teslimat_sayilari_batch(
+            arac.id, ilce.id, bugun, FORECAST_DAYS
+        )
+        
+        # 2. İlçe-gün programını tek seferde al (genel + tarihli kurallar;
+        #    gün başına search yok)
+        program = self.env["teslimat.gun.ilce"]._program_oku(
+            [ilce.id], bugun, bugun + timedelta(days=FORECAST_DAYS)
+        )
+        
+        # 3. Araç kapatma aralıklarını tek seferde al (gün başına search yok)
+        kapatma_araliklari = self.env["teslimat.arac.kapatma"]._kapali_araliklar(
+            arac.id, bugun, bugun + timedelta(days=FORECAST_DAYS)
+        )
+        
+        # 4. Her günü kontrol et ve uygun günleri topla
+        uygun_gunler = []
+        for i in range(FORECAST_DAYS):
+            tarih = bugun + timedelta(days=i)
             
-            yonetici_mi = is_manager(self.env)
-            small_vehicle = record.arac_kucuk_mu
-            # Bugün = İstanbul tarihi (geçmiş gün görünmesin, yarın doğru görünsün)
-            simdi_istanbul = get_istanbul_time()
-            bugun = simdi_istanbul.date()
-            saat = simdi_istanbul.hour
+            # Temel kontroller (Pazar, aynı gün saat kontrolü)
+            if not self._is_date_available(tarih, bugun, saat, SAME_DAY_DELIVERY_CUTOFF_HOUR):
+                continue
             
-            # 1. Teslimat sayılarını batch olarak al (N+1 query önleme)
-            teslimat_sayisi_by_date = self._get_teslimat_sayilari_batch(
-                record.arac_id.id, record.ilce_id.id, bugun, FORECAST_DAYS
+            # Kapasite ve durum hesaplama (ilçe-gün programı dahil)
+            gun_data = self._calculate_day_capacity_status(
+                arac, ilce, tarih, teslimat_sayisi_by_date, program, yonetici_mi,
+                kapatma_araliklari=kapatma_araliklari,
             )
-            
-            # 2. Gün ve ilçe-gün eşleşmelerini batch olarak al
-            gun_dict, gun_ilce_dict = self._get_gun_ilce_mappings_batch(record.ilce_id.id)
-            
-            # 4. Her günü kontrol et ve uygun günleri topla
-            uygun_gunler = []
-            for i in range(FORECAST_DAYS):
-                tarih = bugun + timedelta(days=i)
-                
-                # Temel kontroller (Pazar, aynı gün saat kontrolü)
-                if not self._is_date_available(tarih, bugun, saat, SAME_DAY_DELIVERY_CUTOFF_HOUR):
-                    continue
-                
-                # İlçe-gün uygunluğu
-                if not (yonetici_mi or small_vehicle):
-                    if not self._check_ilce_gun_uygunlugu(record.ilce_id, tarih):
-                        continue
-                
-                # Kapasite ve durum hesaplama
-                gun_data = self._calculate_day_capacity_status(
-                    record, tarih, teslimat_sayisi_by_date, gun_dict, 
-                    gun_ilce_dict, yonetici_mi
-                )
 
-                if gun_data:
-                    uygun_gunler.append(gun_data)
+            if gun_data:
+                uygun_gunler.append(gun_data)
 
-            # 5. Günleri tarihe göre sırala ve kaydet
-            uygun_gunler.sort(key=lambda x: x["tarih"])
-            gun_komutlari = [(0, 0, data) for data in uygun_gunler]
-            record.uygun_gunler = [(5, 0, 0)] + gun_komutlari
+        # 5. Günleri tarihe göre sırala
+        uygun_gunler.sort(key=lambda x: x["tarih"])
+        return uygun_gunler
     
     def _get_teslimat_sayilari_batch(
         self, arac_id: int, ilce_id: int, bugun: date, forecast_days: int
@@ -362,26 +387,13 @@ class TeslimatAnaSayfa(models.TransientModel):
         """
         bitis_tarihi = bugun + timedelta(days=forecast_days)
         
-        # Araç + tarih bazında say (ilçe yok): tüm ilçelerdeki teslimat toplamı
-        domain = [
-            ("teslimat_tarihi", ">=", bugun),
-            ("teslimat_tarihi", "<=", bitis_tarihi),
-            ("arac_id", "=", arac_id),
-            ("durum", "!=", CANCELLED_STATUS),
-        ]
-        rows = self.env["teslimat.belgesi"].search_read(
-            domain, ["teslimat_tarihi"], order="teslimat_tarihi"
+        # Araç + tarih bazında say (ilçe yok): tüm ilçelerdeki teslimat toplamı.
+        # Sayılar kapasite defterinden okunur (gün başına tek satır); belgeler
+        # yeniden sayılmaz.
+        self.env["teslimat.belgesi"].check_access_rights("read")
+        teslimat_sayisi_dict = self.env["teslimat.kapasite.defteri"]._defter_oku(
+            arac_id, bugun, bitis_tarihi
         )
-        teslimat_sayisi_dict = {}
-        for row in rows:
-            tarih = row.get("teslimat_tarihi")
-            if tarih:
-                if isinstance(tarih, str):
-                    try:
-                        tarih = fields.Date.from_string(tarih)
-                    except ValueError:
-                        continue
-                teslimat_sayisi_dict[tarih] = teslimat_sayisi_dict.get(tarih, 0) + 1
         if _logger.isEnabledFor(logging.DEBUG):
             arac = self.env["teslimat.arac"].browse(arac_id)
             ilce = self.env["teslimat.ilce"].browse(ilce_id)
@@ -391,36 +403,6 @@ class TeslimatAnaSayfa(models.TransientModel):
             )
         return teslimat_sayisi_dict
     
-    def _get_gun_ilce_mappings_batch(self, ilce_id: int) -> tuple:
-        """Gün ve ilçe-gün eşleşmelerini batch olarak al.
-        
-        Args:
-            ilce_id: İlçe ID
-            
-        Returns:
-            tuple: (gun_dict, gun_ilce_dict)
-                gun_dict: {gun_kodu: gun_record}
-                gun_ilce_dict: {(gun_id, ilce_id): gun_ilce_record}
-        """
-        # Tüm günleri önceden çek
-        gun_kodlari = list(GUN_KODU_MAP.values())
-        gunler = self.env["teslimat.gun"].search([("gun_kodu", "in", gun_kodlari)])
-        gun_dict = {gun.gun_kodu: gun for gun in gunler}
-        
-        # İlçe-gün eşleşmelerini batch olarak çek
-        gun_ilce_kayitlari = self.env["teslimat.gun.ilce"].search([
-            ("ilce_id", "=", ilce_id),
-            ("gun_id", "in", gunler.ids),
-            ("tarih", "=", False),  # Genel kurallar
-        ])
-        
-        gun_ilce_dict = {
-            (gun_ilce.gun_id.id, ilce_id): gun_ilce
-            for gun_ilce in gun_ilce_kayitlari
-        }
-        
-        return gun_dict, gun_ilce_dict
-    
     def _is_date_available(
         self, tarih: date, bugun: date, saat: int, cutoff_hour: int
     ) -> bool:
@@ -447,22 +429,25 @@ class TeslimatAnaSayfa(models.TransientModel):
     
     def _calculate_day_capacity_status(
         self,
-        record,
+        arac,
+        ilce,
         tarih: date,
         teslimat_sayisi_by_date: dict,
-        gun_dict: dict,
-        gun_ilce_dict: dict,
+        program: dict,
         yonetici_mi: bool,
+        kapatma_araliklari: tuple = None,
     ) -> dict:
         """Belirli bir gün için kapasite durumunu hesapla.
         
         Args:
-            record: Ana sayfa kaydı
+            arac: Araç kaydı
+            ilce: İlçe kaydı
             tarih: Hesaplanacak tarih
             teslimat_sayisi_by_date: Teslimat sayıları mapping
-            gun_dict: Gün kayıtları mapping
-            gun_ilce_dict: İlçe-gün eşleşmeleri mapping
+            program: İlçe-gün programı (teslimat.gun.ilce._program_oku)
             yonetici_mi: Kullanıcı yönetici mi
+            kapatma_araliklari: Araç kapatma aralıkları
+                (teslimat.arac.kapatma._kapali_araliklar); yoksa tek tek sorgulanır
             
         Returns:
             dict: Gün bilgileri veya None (uygun değilse)
@@ -470,29 +455,27 @@ class TeslimatAnaSayfa(models.TransientModel):
         teslimat_sayisi = teslimat_sayisi_by_date.get(tarih, 0)
         
         # Araç kapasitesi dolsa bile günü listeye ekle (Dolu olarak göster)
-        gun_kodu = GUN_KODU_MAP.get(tarih.weekday())
-        if not gun_kodu:
-            return None
-        
-        gun = gun_dict.get(gun_kodu)
-        if not gun:
-            return None
-        
-        # İlçe-gün eşleşmesi: programda yoksa (gun_ilce kaydı yok) bu günü atla.
+        # İlçe-gün eşleşmesi: programda yoksa (genel/tarihli kural yok veya
+        # tarihli kural "kapalı") bu günü atla.
         # (Kapı _validate_ilce_gun_eslesmesi ile aynı kural → gösterim = kapı.)
-        key = (gun.id, record.ilce_id.id)
-        gun_ilce = gun_ilce_dict.get(key)
-        if not gun_ilce:
+        if not self.env["teslimat.gun.ilce"]._program_acik_mi(
+            program, ilce.id, tarih
+        ):
             return None
 
         # Tavan = araç günlük limiti (kural: araç günde TOPLAM, ilçe başına tavan yok)
-        toplam_kapasite = record.arac_id.gunluk_teslimat_limiti or DAILY_DELIVERY_LIMIT
+        toplam_kapasite = arac.gunluk_teslimat_limiti or DAILY_DELIVERY_LIMIT
 
         kalan_kapasite = toplam_kapasite - teslimat_sayisi
         
         # Kapasitesi dolu olsa bile listeye ekle; durum "Dolu" olarak gösterilir
         # Araç kapatma kontrolü
-        arac_kapali = self._check_arac_kapali(record.arac_id.id, tarih)
+        if kapatma_araliklari is not None:
+            arac_kapali = self.env["teslimat.arac.kapatma"]._aralikta_kapali_mi(
+                kapatma_araliklari, tarih
+            )
+        else:
+            arac_kapali = self._check_arac_kapali(arac.id, tarih)
         
         # Durum hesaplama
         durum_text = self._get_durum_text(
@@ -504,13 +487,13 @@ class TeslimatAnaSayfa(models.TransientModel):
         gun_adi_tr = GUN_ESLESMESI.get(gun_adi, gun_adi)
         
         return {
-            "ana_sayfa_id": record.id,
             "tarih": tarih,
             "gun_adi": gun_adi_tr,
             "teslimat_sayisi": teslimat_sayisi,
             "toplam_kapasite": toplam_kapasite,
             "kalan_kapasite": kalan_kapasite,
             "durum_text": durum_text,
+            "arac_kapali_mi": bool(arac_kapali),
             # Yönetici dolu/aşım gününe de tıklayabilsin (JS bloğunu atlar).
             "yonetici_bypass": yonetici_mi,
         }
@@ -572,18 +555,21 @@ class TeslimatAnaSayfa(models.TransientModel):
     def action_sorgula(self) -> None:
         """Kapasite sorgulamasını yenile.
         
-        İlçe yaka tipini kontrol eder ve gerekirse düzeltir.
-        Araç eşleştirmelerini otomatik günceller.
+        İlçe yaka tipini kontrol eder ve gerekirse düzeltir; yaka değiştiyse
+        etkilenen araçların eşleştirmesini günceller.
         """
         self.ensure_one()
         
         # İlçe seçildiyse yaka tipini kontrol et ve düzelt
         if self.ilce_id:
             # Yaka tipini yeniden hesapla (sudo ile izin gerektirmeden)
-            self.ilce_id.sudo()._compute_yaka_tipi()
-            
-            # Eğer yaka tipi değiştiyse ilgili araçları güncelle
-            self.ilce_id.sudo()._update_arac_ilce_eslesmesi()
+            ilce = self.ilce_id.sudo()
+            eski_yaka = ilce.yaka_tipi
+            ilce._compute_yaka_tipi()
+
+            # Yalnız yaka tipi gerçekten değiştiyse etkilenen araçları güncelle
+            if ilce.yaka_tipi != eski_yaka:
+                ilce._update_arac_ilce_eslesmesi({eski_yaka})
             self._invalidate_record_cache(self.ilce_id)
         
         # Araç seçildiyse uygun ilçelerini kontrol et ve güncelle
@@ -592,8 +578,8 @@ class TeslimatAnaSayfa(models.TransientModel):
             self.arac_id.sudo()._update_uygun_ilceler()
             self._invalidate_record_cache(self.arac_id)
         
-        # Cache temizlendi; ilce_uygun_mu ve uygun_gunler güncel araç/ilçe ile hesaplanır
-        self._compute_uygun_gunler()
+        # Cache temizlendi; form yeniden yüklenince ilce_uygun_mu güncel araç/ilçe
+        # ile hesaplanır ve gün tablosu widget'ı günleri yeniden çeker.
         return True
 
     def action_load_districts(self):
@@ -1,12 +1,13 @@
 """Teslimat Araç Yönetimi Modeli."""
 import logging
+import time
 from typing import Optional
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
 
 from .teslimat_constants import DAILY_DELIVERY_LIMIT
-from .teslimat_utils import is_small_vehicle
+from .teslimat_utils import execute_values_sql, is_small_vehicle
 
 _logger = logging.getLogger(__name__)
 
@@ -43,12 +44,12 @@ class TeslimatArac(models.Model):
     )
     mevcut_kapasite = fields.Integer(
         string="Mevcut Kapasite",
-        compute="_compute_mevcut_kapasite",
+        compute="_compute_kapasite",
         store=True,
     )
     kalan_kapasite = fields.Integer(
         string="Kalan Kapasite",
-        compute="_compute_kalan_kapasite",
+        compute="_compute_kapasite",
         store=True,
     )
 
@@ -69,27 +70,28 @@ class TeslimatArac(models.Model):
         "teslimat.belgesi", "arac_id", string="Teslimatlar"
     )
 
-    @api.depends("teslimat_ids", "teslimat_ids.durum", "teslimat_ids.teslimat_tarihi")
-    def _compute_mevcut_kapasite(self) -> None:
-        """Bugün için mevcut kapasiteyi hesapla.
+    @api.depends("gunluk_teslimat_limiti")
+    def _compute_kapasite(self) -> None:
+        """Bugün için mevcut ve kalan kapasiteyi hesapla.
 
         İptal hariç TÜM durumlar kapasite doldurur (teslim_edildi dahil).
+        Sayım kapasite defterinden tüm kayıtlar için tek sorguda okunur;
+        teslimat geçmişi yüklenmez. Teslimat değişiklikleri teslimat_ids
+        bağımlılığıyla değil, defter bugünün satırını değiştirdiğinde
+        _kapasite_tazele ile tetiklenir (eski günlere yazım araca dokunmaz).
         """
+        bugun = fields.Date.today()
+        sayilar = self.env["teslimat.kapasite.defteri"]._defter_oku_toplu(
+            self.filtered("id").ids, bugun, bugun
+        )
         for record in self:
-            bugun = fields.Date.today()
-            bugun_teslimatlar = record.teslimat_ids.filtered(
-                lambda t: t.teslimat_tarihi == bugun
-                and t.durum != "iptal"  # Sadece iptal hariç
-            )
-            record.mevcut_kapasite = len(bugun_teslimatlar)
+            record.mevcut_kapasite = sayilar.get((record.id, bugun), 0)
+            record.kalan_kapasite = record.gunluk_teslimat_limiti - record.mevcut_kapasite
 
-    @api.depends("gunluk_teslimat_limiti", "mevcut_kapasite")
-    def _compute_kalan_kapasite(self) -> None:
-        """Kalan kapasiteyi hesapla."""
-        for record in self:
-            record.kalan_kapasite = (
-                record.gunluk_teslimat_limiti - record.mevcut_kapasite
-            )
+    def _kapasite_tazele(self) -> None:
+        """mevcut/kalan kapasiteyi yeniden hesaplanacak olarak işaretle (flush'ta)."""
+        for fname in ("mevcut_kapasite", "kalan_kapasite"):
+            self.env.add_to_compute(self._fields[fname], self)
 
     @api.model
     def _cron_recompute_kapasite(self) -> None:
@@ -100,16 +102,49 @@ class TeslimatArac(models.Model):
         (gece yarısı) bu alanlar otomatik güncellenmez; bir teslimat eklenip
         değişene kadar dünün değeri kalır. Bu cron her gün çalışarak, hareket
         olmayan günlerde bile değerleri tazeler. (Aynı gün içindeki teslimat
-        değişiklikleri zaten @api.depends ile anında yansır.)
+        değişiklikleri kapasite defteri üzerinden anında yansır.)
 
-        store=True korunur çünkü kalan_kapasite, canlı get_uygun_araclar()
-        sorgusunda (domain + order) ve "Kapasitesi Var" arama filtresinde
-        SQL düzeyinde kullanılır.
+        store=True korunur çünkü kalan_kapasite araç listesinde sıralama ve
+        "Kapasitesi Var" arama filtresinde SQL düzeyinde kullanılır
+        (get_uygun_araclar tarihe göre defterden hesaplar).
+
+        Tüm araçlar (arşivliler dahil) tek UPDATE ile kapasite defterinin
+        bugünkü satırına eşitlenir; yalnız değeri değişen araçlar yazılır.
+        Başka stored alan bu iki alana bağlı olmadığından ORM tetiklemesi
+        gerekmez.
         """
-        araclar = self.search([])
-        if araclar:
-            araclar._compute_mevcut_kapasite()
-            araclar._compute_kalan_kapasite()
+        baslama = time.monotonic()
+        self.flush(["gunluk_teslimat_limiti", "mevcut_kapasite", "kalan_kapasite"])
+        self.env["teslimat.kapasite.defteri"].flush(["aktif_sayi"])
+        self.env.cr.execute(
+            """
+            UPDATE teslimat_arac AS a
+               SET mevcut_kapasite = y.mevcut,
+                   kalan_kapasite = y.kalan
+              FROM (
+                    SELECT arac.id,
+                           COALESCE(d.aktif_sayi, 0) AS mevcut,
+                           COALESCE(arac.gunluk_teslimat_limiti, 0)
+                             - COALESCE(d.aktif_sayi, 0) AS kalan
+                      FROM teslimat_arac arac
+                      LEFT JOIN teslimat_kapasite_defteri d
+                        ON d.arac_id = arac.id AND d.tarih = %s
+                   ) AS y
+             WHERE a.id = y.id
+               AND (a.mevcut_kapasite IS DISTINCT FROM y.mevcut
+                    OR a.kalan_kapasite IS DISTINCT FROM y.kalan)
+            RETURNING a.id
+            """,
+            (fields.Date.today(),),
+        )
+        degisen = [row[0] for row in self.env.cr.fetchall()]
+        if degisen:
+            self.browse(degisen).invalidate_cache(["mevcut_kapasite", "kalan_kapasite"])
+        _logger.info(
+            "Araç kapasitesi tazelendi: %s araç güncellendi, %.1f ms",
+            len(degisen),
+            (time.monotonic() - baslama) * 1000.0,
+        )
 
     _sql_constraints = [
         ('name_unique', 'UNIQUE(name)', 'Araç adı benzersiz olmalıdır!'),
@@ -157,7 +192,31 @@ class TeslimatArac(models.Model):
                     }
                 )
 
-    def _update_uygun_ilceler(self) -> None:
+    @api.model
+    def _yaka_ilce_kumeleri(self) -> dict:
+        """Yaka kategorisi başına uygun ilçe ID kümeleri (tek sorgu).
+
+        Returns:
+            dict: {"anadolu": set, "avrupa": set, "tum": set}
+            (yalnız aktif ve teslimat_aktif ilçeler)
+        """
+        kumeler = {"anadolu": set(), "avrupa": set(), "tum": set()}
+        for ilce in self.env["teslimat.ilce"].search_read(
+            [("aktif", "=", True), ("teslimat_aktif", "=", True)], ["yaka_tipi"]
+        ):
+            kumeler["tum"].add(ilce["id"])
+            if ilce["yaka_tipi"] in kumeler:
+                kumeler[ilce["yaka_tipi"]].add(ilce["id"])
+        return kumeler
+
+    def _ilce_kategorisi(self) -> Optional[str]:
+        """Aracın _yaka_ilce_kumeleri anahtarı (tipi yoksa None)."""
+        self.ensure_one()
+        if is_small_vehicle(self):
+            return "tum"
+        return {"anadolu_yakasi": "anadolu", "avrupa_yakasi": "avrupa"}.get(self.arac_tipi)
+
+    def _update_uygun_ilceler(self) -> dict:
         """Araç tipine göre uygun ilçeleri otomatik eşleştir.
         
         - Anadolu Yakası araçları → Sadece Anadolu Yakası ilçeleri
@@ -169,38 +228,67 @@ class TeslimatArac(models.Model):
         ÜRETİR. MANUEL tetiklenir (create/write arac_tipi, ilçe değişimi, sync
         butonu) — cron yok, yeniden-sync edilmezse bayatlayabilir. Canlı kural:
         teslimat_utils.validate_arac_ilce_eslesmesi.
+
+        Kümeler yaka başına bir kez hesaplanır; ilişki tablosunun mevcut hali
+        tek sorguda okunup farkı toplu DELETE/INSERT ile yazılır. Araç sayısı
+        ne olursa olsun sabit sayıda sorgu çalışır.
+
+        Returns:
+            dict: {arac_id: (eski_ilce_sayisi, yeni_ilce_sayisi)} (tipi olan araçlar)
         """
-        for record in self:
-            if not record.arac_tipi:
+        araclar = self.filtered("arac_tipi")
+        if not araclar:
+            return {}
+        # Ham SQL erişim haklarını atlar: ORM yazımıyla aynı kontrol açıkça yapılır.
+        araclar.check_access_rights("write")
+        kumeler = self._yaka_ilce_kumeleri()
+        iliski = self._fields["uygun_ilceler"]
+        self.flush(["uygun_ilceler"])
+        self.env.cr.execute(
+            "SELECT {col1}, {col2} FROM {rel} WHERE {col1} = ANY(%s)".format(
+                rel=iliski.relation, col1=iliski.column1, col2=iliski.column2
+            ),
+            (araclar.ids,),
+        )
+        mevcut = {}
+        for arac_id, ilce_id in self.env.cr.fetchall():
+            mevcut.setdefault(arac_id, set()).add(ilce_id)
+
+        eklenecek, silinecek, sonuc = [], [], {}
+        for arac in araclar:
+            kategori = arac._ilce_kategorisi()
+            if not kategori:
                 continue
-
-            # Küçük araçlar ve ek araç tüm ilçelere gidebilir
-            if is_small_vehicle(record):
-                # Tüm aktif ilçeleri al
-                tum_ilceler = self.env["teslimat.ilce"].search(
-                    [("aktif", "=", True), ("teslimat_aktif", "=", True)]
-                )
-                record.uygun_ilceler = [(6, 0, tum_ilceler.ids)]
-            elif record.arac_tipi == "anadolu_yakasi":
-                # Sadece Anadolu Yakası ilçeleri
-                anadolu_ilceler = self.env["teslimat.ilce"].search(
-                    [
-                        ("yaka_tipi", "=", "anadolu"),
-                        ("aktif", "=", True),
-                        ("teslimat_aktif", "=", True),
-                    ]
-                )
-                record.uygun_ilceler = [(6, 0, anadolu_ilceler.ids)]
-            elif record.arac_tipi == "avrupa_yakasi":
-                # Sadece Avrupa Yakası ilçeleri
-                avrupa_ilceler = self.env["teslimat.ilce"].search(
-                    [
-                        ("yaka_tipi", "=", "avrupa"),
-                        ("aktif", "=", True),
-                        ("teslimat_aktif", "=", True),
-                    ]
-                )
-                record.uygun_ilceler = [(6, 0, avrupa_ilceler.ids)]
+            hedef = kumeler[kategori]
+            eski = mevcut.get(arac.id, set())
+            eklenecek.extend((arac.id, ilce_id) for ilce_id in sorted(hedef - eski))
+            silinecek.extend((arac.id, ilce_id) for ilce_id in sorted(eski - hedef))
+            sonuc[arac.id] = (len(eski), len(hedef))
+        if not eklenecek and not silinecek:
+            return sonuc
+
+        degisen = self.browse(sorted({arac_id for arac_id, _i in eklenecek + silinecek}))
+        degisen.modified(["uygun_ilceler"])
+        if silinecek:
+            execute_values_sql(
+                self.env.cr,
+                """
+                DELETE FROM {rel} AS r USING (VALUES %s) AS v(arac_id, ilce_id)
+                 WHERE r.{col1} = v.arac_id AND r.{col2} = v.ilce_id
+                """.format(rel=iliski.relation, col1=iliski.column1, col2=iliski.column2),
+                silinecek,
+            )
+        if eklenecek:
+            execute_values_sql(
+                self.env.cr,
+                "INSERT INTO {rel} ({col1}, {col2}) VALUES %s ON CONFLICT DO NOTHING".format(
+                    rel=iliski.relation, col1=iliski.column1, col2=iliski.column2
+                ),
+                eklenecek,
+            )
+        degisen.invalidate_cache(["uygun_ilceler"])
+        self.env["teslimat.ilce"].invalidate_cache(["arac_ids"])
+        return sonuc
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -217,6 +305,9 @@ class TeslimatArac(models.Model):
         # Data yükleme modunda mı?
         data_mode = self.env.context.get('install_mode') or self.env.context.get('module')
         
+        # Otomatik ilçe eşleştirmesi - ZORUNLU (tüm kayıtlar tek seferde)
+        ilce_sayilari = records._update_uygun_ilceler()
+
         for record in records:
             if not record.arac_tipi:
                 if not data_mode:
@@ -228,11 +319,10 @@ class TeslimatArac(models.Model):
                     )
                 continue
             
-            # Otomatik ilçe eşleştirmesi - ZORUNLU
-            record._update_uygun_ilceler()
-            
+            yeni_ilce_sayisi = ilce_sayilari.get(record.id, (0, 0))[1]
+
             # Eşleştirme kontrolü (sadece normal modda)
-            if not data_mode and not record.uygun_ilceler:
+            if not data_mode and not yeni_ilce_sayisi:
                 raise ValidationError(
                     _(
                         "Araç '%(arac)s' için ilçe eşleştirmesi yapılamadı!\n\n"
@@ -251,7 +341,7 @@ class TeslimatArac(models.Model):
                 "Araç oluşturuldu: %s (%s) - %s ilçe eşleştirildi",
                 record.name,
                 record.arac_tipi,
-                len(record.uygun_ilceler)
+                yeni_ilce_sayisi
             )
         return records
 
@@ -260,10 +350,9 @@ class TeslimatArac(models.Model):
         result = super().write(vals)
         if "arac_tipi" in vals:
             # Araç tipi değiştiğinde ZORUNLU yeniden eşleştirme
+            ilce_sayilari = self._update_uygun_ilceler()
             for record in self:
-                eski_ilce_sayisi = len(record.uygun_ilceler)
-                record._update_uygun_ilceler()
-                yeni_ilce_sayisi = len(record.uygun_ilceler)
+                eski_ilce_sayisi, yeni_ilce_sayisi = ilce_sayilari.get(record.id, (0, 0))
                 _logger.info(
                     "Araç güncellendi: %s (%s) - İlçe eşleştirmesi: %s → %s",
                     record.name,
@@ -321,9 +410,11 @@ class TeslimatArac(models.Model):
         """
         self.ensure_one()
         
-        eski_sayisi = len(self.uygun_ilceler)
-        self._update_uygun_ilceler()
-        yeni_sayisi = len(self.uygun_ilceler)
+        ilce_sayilari = self._update_uygun_ilceler()
+        if self.id in ilce_sayilari:
+            eski_sayisi, yeni_sayisi = ilce_sayilari[self.id]
+        else:
+            eski_sayisi = yeni_sayisi = len(self.uygun_ilceler)
         
         return {
             "type": "ir.actions.client",
@@ -408,30 +499,77 @@ class TeslimatArac(models.Model):
     ) -> "TeslimatArac":
         """Belirli ilçe ve tarih için uygun araçları getir.
 
+        Tarihteki kalan kapasiteye göre (bugünkü stored kalan_kapasite değil)
+        çalışır; o gün kapalı araçlar çıkarılır. Tek sorgu:
+        _uygun_araclar_toplu.
+
         Args:
-            ilce_id: İlçe ID
-            tarih: Tarih (opsiyonel)
+            ilce_id: İlçe ID (yoksa ilçe filtresi uygulanmaz)
+            tarih: Tarih (yoksa bugün)
             teslimat_sayisi: Gereken teslimat sayısı
 
         Returns:
-            Recordset: Uygun araçlar
+            Recordset: Uygun araçlar (kalan kapasitesi en yüksek önce)
         """
-        domain = [
-            ("aktif", "=", True),
-            ("kalan_kapasite", ">=", teslimat_sayisi),
-        ]
-
-        # İlçe uyumluluğu kontrolü (Many2many ilişkisini kullanarak)
-        if ilce_id:
-            ilce = self.env["teslimat.ilce"].browse(ilce_id)
-            if ilce.exists():
-                # Bu ilçeyi uygun ilçeler listesinde bulunan araçları filtrele
-                domain.append(("uygun_ilceler", "in", [ilce_id]))
-
-        # NOT: Tarih-bazlı araç-kapatma filtresi burada UYGULANMAZ; araç-kapatma
-        # kayıtları (teslimat.arac.kapatma) teslimat oluşturma kapısında
-        # arac_kapali_mi() ile zorlanır.
-        return self.search(domain, order="kalan_kapasite desc")
+        tarih = fields.Date.to_date(tarih) if tarih else fields.Date.today()
+        sonuc = self._uygun_araclar_toplu(ilce_id, [tarih], teslimat_sayisi)
+        return self.browse([arac_id for arac_id, _kalan in sonuc[tarih]])
+
+    @api.model
+    def _uygun_araclar_toplu(
+        self, ilce_id: Optional[int], tarihler: list, teslimat_sayisi: int = 1
+    ) -> dict:
+        """Birden çok tarih için uygun araçlar ve kalan kapasiteleri (tek sorgu).
+
+        İlçeye uygun (uygun_ilceler ilişki tablosu), aktif, o gün kapatması
+        olmayan ve kapasite defterine göre en az teslimat_sayisi boş yeri olan
+        araçlar. İptal hariç tüm teslimatlar kapasite doldurur (RULE A).
+
+        Args:
+            ilce_id: İlçe ID (None: ilçe filtresi yok)
+            tarihler: Tarih listesi
+            teslimat_sayisi: Gereken boş yer
+
+        Returns:
+            dict: {tarih: [(arac_id, kalan)]} (kalan azalan, sonra ad sırasıyla;
+            uygun araç olmayan tarih boş liste)
+        """
+        tarihler = sorted({fields.Date.to_date(tarih) for tarih in tarihler})
+        sonuc = {tarih: [] for tarih in tarihler}
+        if not tarihler:
+            return sonuc
+        self.check_access_rights("read")
+        self.flush(["aktif", "gunluk_teslimat_limiti", "uygun_ilceler", "name"])
+        self.env["teslimat.arac.kapatma"].flush(
+            ["arac_id", "aktif", "baslangic_tarihi", "bitis_tarihi"]
+        )
+        iliski = self._fields["uygun_ilceler"]
+        self.env.cr.execute(
+            """
+            SELECT t.tarih, a.id,
+                   COALESCE(a.gunluk_teslimat_limiti, 0) - COALESCE(d.aktif_sayi, 0) AS kalan
+              FROM teslimat_arac a
+             CROSS JOIN unnest(%(tarihler)s::date[]) AS t(tarih)
+              LEFT JOIN teslimat_kapasite_defteri d
+                ON d.arac_id = a.id AND d.tarih = t.tarih
+             WHERE a.aktif
+               AND (%(ilce_id)s IS NULL OR EXISTS (
+                        SELECT 1 FROM {rel} r
+                         WHERE r.{col1} = a.id AND r.{col2} = %(ilce_id)s))
+               AND NOT EXISTS (
+                        SELECT 1 FROM teslimat_arac_kapatma k
+                         WHERE k.arac_id = a.id
+                           AND k.aktif
+                           AND t.tarih BETWEEN k.baslangic_tarihi AND k.bitis_tarihi)
+               AND COALESCE(a.gunluk_teslimat_limiti, 0)
+                   - COALESCE(d.aktif_sayi, 0) >= %(adet)s
+             ORDER BY t.tarih, kalan DESC, a.name
+            """.format(rel=iliski.relation, col1=iliski.column1, col2=iliski.column2),
+            {"tarihler": tarihler, "ilce_id": ilce_id or None, "adet": teslimat_sayisi},
+        )
+        for tarih, arac_id, kalan in self.env.cr.fetchall():
+            sonuc[tarih].append((arac_id, kalan))
+        return sonuc
 
     @api.model
     def sync_all_arac_ilce_eslesmesi(self) -> dict:
@@ -444,46 +582,28 @@ class TeslimatArac(models.Model):
         Returns:
             dict: İşlem sonucu bilgisi
         """
+        baslama = time.monotonic()
         araclar = self.search([])
-        guncellenen_sayisi = 0
+        for arac in araclar.filtered(lambda a: not a.arac_tipi):
+            _logger.warning("%s: Araç tipi tanımlı değil, atlandı", arac.name)
+
+        ilce_sayilari = araclar._update_uygun_ilceler()
+        guncellenen_sayisi = len(ilce_sayilari)
         hata_sayisi = 0
         detaylar = []
-        
-        _logger.info("=" * 60)
-        _logger.info("Araç-İlçe Eşleştirme Senkronizasyonu Başlatıldı")
-        _logger.info("=" * 60)
-        
         for arac in araclar:
-            try:
-                if arac.arac_tipi:
-                    eski_sayisi = len(arac.uygun_ilceler)
-                    arac._update_uygun_ilceler()
-                    yeni_sayisi = len(arac.uygun_ilceler)
-                    
-                    if eski_sayisi != yeni_sayisi:
-                        detaylar.append(
-                            f"{arac.name} ({arac.arac_tipi}): {eski_sayisi} → {yeni_sayisi} ilçe"
-                        )
-                        _logger.info(
-                            "%s (%s): %s → %s ilçe",
-                            arac.name,
-                            arac.arac_tipi,
-                            eski_sayisi,
-                            yeni_sayisi
-                        )
-                    guncellenen_sayisi += 1
-                else:
-                    _logger.warning("%s: Araç tipi tanımlı değil, atlandı", arac.name)
-            except Exception:
-                hata_sayisi += 1
-                _logger.exception("%s: Senkronizasyon hatası", arac.name)
-        
-        _logger.info("=" * 60)
-        _logger.info("Senkronizasyon Tamamlandı")
-        _logger.info("  - Güncellenen: %s araç", guncellenen_sayisi)
-        _logger.info("  - Hata: %s araç", hata_sayisi)
-        _logger.info("=" * 60)
-        
+            eski, yeni = ilce_sayilari.get(arac.id, (0, 0))
+            if eski != yeni:
+                detaylar.append(f"{arac.name} ({arac.arac_tipi}): {eski} → {yeni} ilçe")
+        _logger.info(
+            "Araç-ilçe eşleştirme senkronizasyonu: %s araç, %s değişti, %.1f ms",
+            guncellenen_sayisi,
+            len(detaylar),
+            (time.monotonic() - baslama) * 1000.0,
+        )
+        for detay in detaylar:
+            _logger.debug("Araç-ilçe eşleştirme: %s", detay)
+
         return {
             "success": True,
             "message": f"{guncellenen_sayisi} araç için ilçe eşleştirmesi güncellendi.",
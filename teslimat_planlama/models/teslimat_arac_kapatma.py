@@ -1,5 +1,6 @@
 """Araç Kapatma Modeli - Araçların belirli günlerde kapatılması."""
 import logging
+from bisect import bisect_right
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
@@ -201,6 +202,54 @@ class TeslimatAracKapatma(models.Model):
             return True, kapatma
         return False, None
     
+    @api.model
+    def _kapali_araliklar(self, arac_id: int, baslangic, bitis) -> tuple:
+        """Aracın [baslangic, bitis] ile kesişen aktif kapatmalarını tek sorguda al.
+
+        Aralıklar başlangıca göre sıralanır ve çakışanlar birleştirilir;
+        böylece her tarih _aralikta_kapali_mi ile bisect (O(log n)) cevaplanır.
+
+        Returns:
+            tuple: (başlangıçlar, bitişler) — aynı uzunlukta sıralı listeler
+        """
+        return self._kapali_araliklar_toplu([arac_id], baslangic, bitis)[arac_id]
+
+    @api.model
+    def _kapali_araliklar_toplu(self, arac_ids, baslangic, bitis) -> dict:
+        """_kapali_araliklar'ın çok araçlı hali: tüm araçlar için tek sorgu.
+
+        Returns:
+            dict: {arac_id: (başlangıçlar, bitişler)} (kapatması olmayan araç
+            için boş listeler)
+        """
+        sonuc = {arac_id: ([], []) for arac_id in arac_ids}
+        kapatmalar = self.search_read(
+            [
+                ("arac_id", "in", list(sonuc)),
+                ("aktif", "=", True),
+                ("baslangic_tarihi", "<=", bitis),
+                ("bitis_tarihi", ">=", baslangic),
+            ],
+            ["arac_id", "baslangic_tarihi", "bitis_tarihi"],
+            order="baslangic_tarihi",
+        )
+        for kapatma in kapatmalar:
+            baslangiclar, bitisler = sonuc[kapatma["arac_id"][0]]
+            bas, bit = kapatma["baslangic_tarihi"], kapatma["bitis_tarihi"]
+            if bitisler and bas <= bitisler[-1]:
+                bitisler[-1] = max(bitisler[-1], bit)
+            else:
+                baslangiclar.append(bas)
+                bitisler.append(bit)
+        return sonuc
+
+    @api.model
+    def _aralikta_kapali_mi(self, araliklar: tuple, tarih) -> bool:
+        """_kapali_araliklar sonucunda tarih bir kapatma aralığına düşüyor mu."""
+        baslangiclar, bitisler = araliklar
+        idx = bisect_right(baslangiclar, tarih) - 1
+        return idx >= 0 and tarih <= bitisler[idx]
+
     def action_iptal_et(self):
         """Kapatma kaydını iptal et."""
         self.ensure_one()
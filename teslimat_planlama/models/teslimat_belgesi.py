@@ -1,14 +1,20 @@
 """Teslimat Belgesi Modeli."""
 import logging
+import time
 from datetime import date
 
+from psycopg2.errors import LockNotAvailable
+
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
 
 from .teslimat_constants import (
     CANCELLED_STATUS,
+    CAPACITY_LOCK_SLOW_MS,
+    CAPACITY_LOCK_WAIT_MS,
     COMPLETED_STATUS,
     DAILY_DELIVERY_LIMIT,
+    PARAM_CAPACITY_LOCK_WAIT,
     READY_STATUS,
     get_arac_kapatma_sebep_label,
 )
@@ -144,6 +150,13 @@ class TeslimatBelgesi(models.Model):
 
     # Sıra
     sira_no = fields.Integer(string="Sıra No", default=1, group_operator=False)
+    rota_siralandi = fields.Boolean(
+        string="Rota Sıralı",
+        copy=False,
+        readonly=True,
+        help="sira_no rota optimizasyonu ile verildi. Günün sıralı olduğunu "
+        "gösterir; yeni teslimat en ucuz konuma eklenir.",
+    )
     teslimat_adet = fields.Integer(
         string="Adet",
         default=1,
@@ -192,9 +205,16 @@ class TeslimatBelgesi(models.Model):
         Returns:
             TeslimatBelgesi: Oluşturulan kayıt(lar)
         """
+        # Toplu içe aktarma (_toplu_olustur) Pazar/kapatma/kota/lock kontrollerini
+        # (araç, tarih) grubu başına bir kez yapar; bayrak yalnız yöneticide geçerli.
+        grupta_kontrol_edildi = (
+            self.env.context.get("teslimat_toplu_onkontrol") and is_manager(self.env)
+        )
         for vals in vals_list:
             # Otomatik değer atamaları
             self._prepare_vals_for_create(vals)
+            if grupta_kontrol_edildi:
+                continue
 
             # Validasyonlar
             teslimat_tarihi = vals.get("teslimat_tarihi", fields.Date.today())
@@ -213,10 +233,65 @@ class TeslimatBelgesi(models.Model):
             # ORTAK gate'i. write yolu ayrıca write-ÖNCESİ fail-fast pre-check için
             # _check_capacity_on_write kullanır (create/write asimetrisi bilinçli).
 
-        return super(TeslimatBelgesi, self).create(vals_list)
+        # Sıra numaraları lock'lardan SONRA, (araç, tarih) başına tek blok ayrılır.
+        self._sira_no_ata(vals_list)
+        # Defter insert'ten ÖNCE güncellenir: constrains içindeki kapasite
+        # kontrolü (_say_arac_gunluk) yeni kayıtları zaten sayılmış görür.
+        self.env["teslimat.kapasite.defteri"]._defter_uygula(
+            self._kapasite_farklari_olustur(vals_list)
+        )
+        records = super(TeslimatBelgesi, self).create(vals_list)
+        records._rota_siraya_ekle()
+        return records
+
+    def _rota_siraya_ekle(self) -> None:
+        """Rotası optimize edilmiş güne eklenen/taşınan teslimatı en ucuz konuma koy.
+
+        Ekleme geocode/Routes API çağrısı yapabildiğinden create/write
+        transaction'ında (kapasite kilidi ve defter satırı tutulurken)
+        ÇALIŞMAZ: kayıtlar commit sonrasına kuyruklanır ve _rota_ekle_kuyrugu
+        ayrı bir cursor'da işler. Transaction geri alınırsa kuyruk da atılır.
+        Toplu işlemler context'te teslimat_rota_ekleme_yok=True ile atlayabilir.
+        """
+        if self.env.context.get("teslimat_rota_ekleme_yok") or not self:
+            return
+        postcommit = self.env.cr.postcommit
+        kuyruk = postcommit.data.get("teslimat_rota_ekle")
+        if kuyruk is None:
+            kuyruk = postcommit.data["teslimat_rota_ekle"] = set()
+            registry, uid, context = self.env.registry, self.env.uid, dict(self.env.context)
+
+            @postcommit.add
+            def _rota_ekle_commit_sonrasi():
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, uid, context)
+                    env["teslimat.belgesi"].browse(sorted(kuyruk))._rota_ekle_kuyrugu()
+
+        kuyruk.update(self.ids)
+
+    def _rota_ekle_kuyrugu(self) -> None:
+        """Commit sonrası: kuyruktaki teslimatları sıralı günlerine ekle.
+
+        Best-effort: API/adres hatası kaydı etkilemez (savepoint + log);
+        teslimat sona eklenmiş (max+1) olarak kalır.
+        """
+        from .teslimat_route_service import insert_delivery_into_sorted_day
+
+        for record in self.exists():
+            try:
+                with self.env.cr.savepoint():
+                    insert_delivery_into_sorted_day(record)
+            except (UserError, ValidationError) as exc:
+                _logger.warning(
+                    "Rota ekleme atlandı (teslimat=%s): %s",
+                    record.id,
+                    exc.args[0] if exc.args else exc,
+                )
+            except Exception:  # noqa: BLE001 - sonraki kayıtları durdurmasın
+                _logger.exception("Rota ekleme hatası (teslimat=%s)", record.id)
 
     def _prepare_vals_for_create(self, vals: dict) -> None:
-        """Create için vals'u hazırla (sequence ve sıra no).
+        """Create için vals'u hazırla (sequence). Sıra no: _sira_no_ata.
 
         Args:
             vals: Create değerleri (in-place güncellenir)
@@ -228,15 +303,42 @@ class TeslimatBelgesi(models.Model):
                 or _("Yeni")
             )
 
-        # Sıra numarası otomatik ata
-        if not vals.get("sira_no"):
-            vals["sira_no"] = self._get_next_sira_no(
-                vals.get("arac_id"),
-                vals.get("teslimat_tarihi", fields.Date.today())
+    @api.model
+    def _sira_no_ata(self, vals_list) -> None:
+        """sira_no verilmemiş kayıtlara kapasite defteri sayacından numara ver.
+
+        (araç, tarih) başına tek upsert ile blok ayrılır (search yok). vals'ta
+        sira_no verilmişse sayaç o değere ilerletilir; sonraki numaralar onu
+        tekrar etmez.
+
+        Args:
+            vals_list: Create değerleri listesi (in-place güncellenir)
+        """
+        Defter = self.env["teslimat.kapasite.defteri"]
+        talepler, enbuyukler, anahtarlar = {}, {}, []
+        for vals in vals_list:
+            anahtar = self._kapasite_anahtari_hesapla(
+                vals.get("arac_id"), vals.get("teslimat_tarihi") or fields.Date.today(), False
             )
+            anahtarlar.append(anahtar)
+            if not anahtar:
+                vals.setdefault("sira_no", 1)
+            elif vals.get("sira_no"):
+                enbuyukler[anahtar] = max(enbuyukler.get(anahtar, 0), vals["sira_no"])
+            else:
+                talepler[anahtar] = talepler.get(anahtar, 0) + 1
+        Defter._sira_no_ilerlet(enbuyukler)
+        siradaki = Defter._sira_no_ayir(talepler)
+        for vals, anahtar in zip(vals_list, anahtarlar):
+            if anahtar and not vals.get("sira_no"):
+                vals["sira_no"] = siradaki[anahtar]
+                siradaki[anahtar] += 1
 
     def _get_next_sira_no(self, arac_id: int, teslimat_tarihi: fields.Date) -> int:
-        """Aynı araç ve tarih için sıradaki sıra numarasını döndür.
+        """Aynı araç ve tarih için sıradaki sıra numarasını AYIR ve döndür.
+
+        Numara kapasite defteri sayacından alınır (transaction sonuna kadar
+        kilitli); aynı numara eşzamanlı başka bir create'e verilmez.
 
         Args:
             arac_id: Araç ID
@@ -245,19 +347,270 @@ class TeslimatBelgesi(models.Model):
         Returns:
             int: Sıradaki sıra numarası
         """
-        if not arac_id or not teslimat_tarihi:
+        anahtar = self._kapasite_anahtari_hesapla(arac_id, teslimat_tarihi, False)
+        if not anahtar:
             return 1
+        return self.env["teslimat.kapasite.defteri"]._sira_no_ayir({anahtar: 1})[anahtar]
+
+    def _sira_sayaclarini_ilerlet(self) -> None:
+        """Kayıtların mevcut sira_no'larını (araç, tarih) sayaçlarına bildir."""
+        enbuyukler = {}
+        for record in self:
+            anahtar = self._kapasite_anahtari_hesapla(
+                record.arac_id.id, record.teslimat_tarihi, False
+            )
+            if anahtar:
+                enbuyukler[anahtar] = max(enbuyukler.get(anahtar, 0), record.sira_no)
+        self.env["teslimat.kapasite.defteri"]._sira_no_ilerlet(enbuyukler)
+
+    @api.model
+    def _sira_no_toplu_yaz(self, sira_map: dict) -> int:
+        """Rota sıralaması sonucu sira_no'ları tek UPDATE ile yaz.
+
+        Yalnızca sıra değişikliği olduğundan write override'ı (iptal yetkisi,
+        arşiv ve kapasite kontrolleri) atlanır; sira_no takip edilen (tracking)
+        bir alan değildir ve ona bağlı compute yoktur. Değeri zaten aynı olan
+        kayıtlar güncellenmez. Kayıtlar rota_siralandi olarak işaretlenir.
+
+        Args:
+            sira_map: {teslimat_id: sira_no}
+
+        Returns:
+            int: Güncellenen kayıt sayısı
+        """
+        if not sira_map:
+            return 0
+        records = self.browse(list(sira_map))
+        # Ham SQL erişim haklarını atlar: write ile aynı kontrol açıkça yapılır.
+        records.check_access_rights("write")
+        records.check_access_rule("write")
+        # Bekleyen ORM yazımları önce veritabanına insin (üzerine yazılmasın).
+        self.flush(["sira_no", "rota_siralandi"])
+        values = ", ".join(["(%s, %s)"] * len(sira_map))
+        params = [v for item in sira_map.items() for v in item]
+        self.env.cr.execute(
+            """
+            UPDATE teslimat_belgesi AS t
+               SET sira_no = v.sira_no,
+                   rota_siralandi = TRUE,
+                   write_uid = %s,
+                   write_date = (now() at time zone 'UTC')
+              FROM (VALUES {}) AS v(id, sira_no)
+             WHERE t.id = v.id
+               AND (t.sira_no IS DISTINCT FROM v.sira_no
+                    OR t.rota_siralandi IS NOT TRUE)
+            RETURNING t.arac_id, t.teslimat_tarihi, t.sira_no
+            """.format(values),
+            [self.env.uid] + params,
+        )
+        # Sayaç, yazılan numaraların gerisinde kalmasın (sonraki create çakışmaz).
+        yazilan = self.env.cr.fetchall()
+        enbuyukler = {}
+        for arac_id, tarih, sira_no in yazilan:
+            if arac_id and tarih:
+                enbuyukler[(arac_id, tarih)] = max(enbuyukler.get((arac_id, tarih), 0), sira_no)
+        self.env["teslimat.kapasite.defteri"]._sira_no_ilerlet(enbuyukler)
+        updated = len(yazilan)
+        records.invalidate_cache(
+            ["sira_no", "rota_siralandi", "write_uid", "write_date"]
+        )
+        return updated
+
+    # ========================================================================
+    # TOPLU İÇE AKTARMA
+    # ========================================================================
+
+    @api.model
+    def _toplu_olustur(
+        self, satirlar: list, kapasite_zorla: bool = True, sms_gonder: bool = False
+    ) -> list:
+        """Çok sayıda teslimatı (araç, tarih) gruplarıyla oluştur.
+
+        Satırlar (araç, tarih) bazında gruplanır; her grup için advisory lock
+        bir kez alınır, kapatma ve kapasite tüm gruplar için tek sorguda
+        (kapatma aralıkları, kapasite defteri) okunur, sira_no aralığı grup
+        başına bir kez ayrılır. Grup tek create ile yazılır; hata olursa
+        satırlar tek tek (savepoint) denenir ve hatalı satır diğerlerini
+        durdurmaz.
+
+        Args:
+            satirlar: create vals listesi (teslimat_tarihi, arac_id, ilce_id,
+                musteri_id zorunlu)
+            kapasite_zorla: True ise araç günlük limiti yöneticiye de uygulanır
+            sms_gonder: Oluşan teslimatlar için müşteriye SMS gönder
+
+        Returns:
+            list: Satır sırasıyla {"id": teslimat id veya False,
+                                   "hata": mesaj veya False}
+        """
+        if not is_manager(self.env):
+            raise UserError(_("Toplu içe aktarma sadece yöneticiler tarafından yapılabilir."))
+
+        sonuclar = [{"id": False, "hata": False} for _satir in satirlar]
+        gruplar = {}
+        zorunlu = ("teslimat_tarihi", "arac_id", "ilce_id", "musteri_id")
+        for index, vals in enumerate(satirlar):
+            eksik = [alan for alan in zorunlu if not vals.get(alan)]
+            if eksik:
+                sonuclar[index]["hata"] = _("Eksik alan: %s") % ", ".join(eksik)
+                continue
+            vals = dict(vals, teslimat_tarihi=fields.Date.to_date(vals["teslimat_tarihi"]))
+            anahtar = (vals["arac_id"], vals["teslimat_tarihi"])
+            gruplar.setdefault(anahtar, []).append((index, vals))
+        if not gruplar:
+            return sonuclar
+
+        arac_ids = sorted({arac_id for arac_id, _tarih in gruplar})
+        tarihler = [tarih for _arac_id, tarih in gruplar]
+        baslangic, bitis = min(tarihler), max(tarihler)
+        araclar = {arac.id: arac for arac in self.env["teslimat.arac"].browse(arac_ids)}
+        Kapatma = self.env["teslimat.arac.kapatma"]
+        kapatmalar = Kapatma._kapali_araliklar_toplu(arac_ids, baslangic, bitis)
+        sayilar = self.env["teslimat.kapasite.defteri"]._defter_oku_toplu(
+            arac_ids, baslangic, bitis
+        )
+        GunIlce = self.env["teslimat.gun.ilce"]
+        program = GunIlce._program_derle()
+
+        Toplu = self.with_context(teslimat_toplu_onkontrol=True, teslimat_rota_ekleme_yok=True)
+        # Sıralı gruplar = sıralı lock alımı (eşzamanlı iki içe aktarma kilitlenmez)
+        for (arac_id, tarih), grup in sorted(gruplar.items()):
+            arac = araclar[arac_id]
+            grup_hatasi = False
+            if Kapatma._aralikta_kapali_mi(kapatmalar[arac_id], tarih):
+                grup_hatasi = _("Araç bu tarihte kapalı.")
+            else:
+                try:
+                    self._acquire_capacity_lock(arac_id, None, tarih)
+                except UserError as exc:
+                    grup_hatasi = exc.args[0]
+            if grup_hatasi:
+                for index, _vals in grup:
+                    sonuclar[index]["hata"] = grup_hatasi
+                continue
+
+            uygun = []
+            for index, vals in grup:
+                if GunIlce._program_acik_mi(program, vals["ilce_id"], tarih):
+                    uygun.append((index, vals))
+                else:
+                    sonuclar[index]["hata"] = _("İlçeye bu gün teslimat yapılmıyor.")
+
+            limit = arac.gunluk_teslimat_limiti
+            if kapasite_zorla and limit > 0:
+                mevcut = sayilar.get((arac_id, tarih), 0)
+                bos = max(limit - mevcut, 0)
+                for index, _vals in uygun[bos:]:
+                    sonuclar[index]["hata"] = _("Araç kapasitesi dolu (%(mevcut)s/%(limit)s).") % {
+                        "mevcut": mevcut,
+                        "limit": limit,
+                    }
+                uygun = uygun[:bos]
+            if not uygun:
+                continue
+
+            # sira_no create içinde (_sira_no_ata) ayrılır: başarısız satırın
+            # savepoint'i numarasını da geri alır, sırada boşluk kalmaz.
+            Toplu._toplu_grup_yaz(
+                [index for index, _vals in uygun], [vals for _index, vals in uygun], sonuclar
+            )
+
+        olusan = self.browse([sonuc["id"] for sonuc in sonuclar if sonuc["id"]])
+        # Rota ekleme atlandığı için yeni kayıtlar sona eklendi: sıralı günler
+        # yeniden optimize edilene kadar sırasız sayılır.
+        self._rota_sirasini_sifirla(
+            {(record.arac_id.id, record.teslimat_tarihi) for record in olusan}
+        )
+        olusan._toplu_sonrasi(sms_gonder)
+        _logger.info(
+            "Toplu içe aktarma: %s satır, %s grup, %s oluşturuldu, %s hatalı",
+            len(satirlar),
+            len(gruplar),
+            len(olusan),
+            sum(1 for sonuc in sonuclar if sonuc["hata"]),
+        )
+        return sonuclar
+
+    @api.model
+    def _toplu_grup_yaz(self, indeksler: list, vals_list: list, sonuclar: list) -> None:
+        """Bir (araç, tarih) grubunu tek create ile yaz; olmazsa satır satır.
+
+        create vals'a name/sira_no yazdığından her deneme kopyayla yapılır:
+        geri alınan toplu denemenin numaraları satır satır denemeye taşınmaz.
+        """
+        try:
+            with self.env.cr.savepoint():
+                kayitlar = self.create([dict(vals) for vals in vals_list])
+                kayitlar.flush()
+        except (UserError, ValidationError):
+            pass
+        else:
+            for index, kayit in zip(indeksler, kayitlar):
+                sonuclar[index]["id"] = kayit.id
+            return
+
+        for index, vals in zip(indeksler, vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    kayit = self.create(dict(vals))
+                    kayit.flush()
+            except (UserError, ValidationError) as exc:
+                sonuclar[index]["hata"] = exc.args[0]
+            else:
+                sonuclar[index]["id"] = kayit.id
+
+    @api.model
+    def _rota_sirasini_sifirla(self, anahtarlar: set) -> int:
+        """Verilen (araç, tarih) günlerindeki teslimatları rota sırasız işaretle.
+
+        Yalnız rota_siralandi bayrağı değişir; write override'ı (kapasite,
+        yetki kontrolleri) gerekmediği için tek UPDATE ile yazılır.
+
+        Args:
+            anahtarlar: {(arac_id, tarih)}
 
-        son_teslimat = self.search(
-            [
-                ("arac_id", "=", arac_id),
-                ("teslimat_tarihi", "=", teslimat_tarihi),
-            ],
-            order="sira_no desc",
-            limit=1,
+        Returns:
+            int: Güncellenen kayıt sayısı
+        """
+        anahtarlar = sorted(anahtar for anahtar in anahtarlar if all(anahtar))
+        if not anahtarlar:
+            return 0
+        self.check_access_rights("write")
+        self.flush(["arac_id", "teslimat_tarihi", "rota_siralandi"])
+        values = ", ".join(["(%s, %s::date)"] * len(anahtarlar))
+        self.env.cr.execute(
+            """
+            UPDATE teslimat_belgesi AS t
+               SET rota_siralandi = FALSE
+              FROM (VALUES {}) AS v(arac_id, tarih)
+             WHERE t.arac_id = v.arac_id
+               AND t.teslimat_tarihi = v.tarih
+               AND t.rota_siralandi
+            """.format(values),
+            [deger for anahtar in anahtarlar for deger in anahtar],
         )
+        guncellenen = self.env.cr.rowcount
+        self.invalidate_cache(["rota_siralandi"])
+        return guncellenen
+
+    def _toplu_sonrasi(self, sms_gonder: bool) -> None:
+        """İçe aktarılan teslimatlara transfer ürünlerini işle, istenirse SMS at.
 
-        return son_teslimat.sira_no + 1 if son_teslimat else 1
+        Best-effort: bir kaydın ürün/SMS hatası içe aktarmayı geri almaz.
+        """
+        for record in self:
+            try:
+                with self.env.cr.savepoint():
+                    if record.stock_picking_id:
+                        record._update_transfer_urunleri(record.stock_picking_id)
+                    if sms_gonder:
+                        record.send_teslimat_sms()
+            except Exception as exc:  # noqa: BLE001 - içe aktarmayı bozmasın
+                _logger.warning(
+                    "Toplu içe aktarma sonrası işlem atlandı (teslimat=%s): %s",
+                    record.id,
+                    exc,
+                )
 
     def _check_arac_kapatma_on_create(self, arac_id: int, teslimat_tarihi: fields.Date) -> None:
         """Create sırasında araç kapatma kontrolü yap.
@@ -311,14 +664,79 @@ class TeslimatBelgesi(models.Model):
         """RULE A — Araç günlük yükü: aynı araç+tarih, TÜM ilçeler (iptal hariç).
 
         Araç günlük teslimat limiti bu toplama uygulanır (ilçe bağımsız).
+        Sayım kapasite defterinden tek satır okunarak yapılır.
         haric_id: kendi kaydını sayımdan çıkar (write/düzenle kontrolü için).
+        Defter kaydın o anki (cache) değerleriyle tutarlı olduğundan, kayıt bu
+        araç+tarihte aktif görünüyorsa defterde sayılmıştır ve düşülür.
         """
-        return self.search_count([
-            ("teslimat_tarihi", "=", tarih),
-            ("arac_id", "=", arac_id),
-            ("durum", "!=", CANCELLED_STATUS),
-            ("id", "!=", haric_id),
-        ])
+        tarih = fields.Date.to_date(tarih)
+        sayi = self.env["teslimat.kapasite.defteri"]._defter_sayi(arac_id, tarih)
+        if haric_id and isinstance(haric_id, int):
+            if self.browse(haric_id)._kapasite_anahtari() == (arac_id, tarih):
+                sayi -= 1
+        return sayi
+
+    # ========================================================================
+    # KAPASİTE DEFTERİ FARKLARI (teslimat.kapasite.defteri)
+    # ========================================================================
+
+    @staticmethod
+    def _kapasite_anahtari_hesapla(arac_id, tarih, durum):
+        """(araç, tarih) defter anahtarı; iptal/eksik kayıt sayılmaz (None)."""
+        if isinstance(arac_id, (list, tuple)):
+            arac_id = arac_id[0] if arac_id else False
+        if not arac_id or not tarih or durum == CANCELLED_STATUS:
+            return None
+        return int(arac_id), fields.Date.to_date(tarih)
+
+    def _kapasite_anahtari(self):
+        """Kaydın mevcut (cache) değerlerine göre defter anahtarı."""
+        self.ensure_one()
+        return self._kapasite_anahtari_hesapla(
+            self.arac_id.id, self.teslimat_tarihi, self.durum
+        )
+
+    @api.model
+    def _kapasite_farklari_olustur(self, vals_list) -> dict:
+        """create: her yeni aktif kayıt kendi (araç, tarih) satırına +1."""
+        varsayilan = self.default_get(["durum", "teslimat_tarihi"])
+        farklar = {}
+        for vals in vals_list:
+            anahtar = self._kapasite_anahtari_hesapla(
+                vals.get("arac_id"),
+                vals.get("teslimat_tarihi") or varsayilan.get("teslimat_tarihi"),
+                vals.get("durum") or varsayilan.get("durum"),
+            )
+            if anahtar:
+                farklar[anahtar] = farklar.get(anahtar, 0) + 1
+        return farklar
+
+    def _kapasite_farklari_yaz(self, vals: dict) -> dict:
+        """write: eski anahtardan -1, yeni anahtara +1 (değişmeyenler net 0)."""
+        farklar = {}
+        for record in self:
+            eski = record._kapasite_anahtari()
+            yeni = self._kapasite_anahtari_hesapla(
+                vals["arac_id"] if "arac_id" in vals else record.arac_id.id,
+                vals["teslimat_tarihi"] if "teslimat_tarihi" in vals else record.teslimat_tarihi,
+                vals["durum"] if "durum" in vals else record.durum,
+            )
+            if eski == yeni:
+                continue
+            if eski:
+                farklar[eski] = farklar.get(eski, 0) - 1
+            if yeni:
+                farklar[yeni] = farklar.get(yeni, 0) + 1
+        return farklar
+
+    def _kapasite_farklari_sil(self) -> dict:
+        """unlink: silinen her aktif kayıt kendi satırından -1."""
+        farklar = {}
+        for record in self:
+            anahtar = record._kapasite_anahtari()
+            if anahtar:
+                farklar[anahtar] = farklar.get(anahtar, 0) - 1
+        return farklar
 
     @api.model
     def _say_kullanici_gunluk(self, user_id, tarih):
@@ -383,7 +801,36 @@ class TeslimatBelgesi(models.Model):
             vals = dict(vals)
             vals["durum"] = READY_STATUS
 
-        return super(TeslimatBelgesi, self).write(vals)
+        # Başka araç/güne taşınan (veya müşterisi değişen) teslimat o günün
+        # optimize sırasında değildir.
+        tasindi = bool({"arac_id", "teslimat_tarihi"} & set(vals))
+        if (tasindi or "musteri_id" in vals) and "rota_siralandi" not in vals:
+            vals = dict(vals, rota_siralandi=False)
+        # Rotaya (yeniden) eklenecekler: taşınan, müşterisi değişen veya
+        # sıralanabilir duruma geçen teslimatlar.
+        from .teslimat_route_service import ROTA_SIRALANABILIR_DURUMLAR
+
+        if tasindi or "musteri_id" in vals:
+            rotaya_eklenecek = self
+        elif vals.get("durum") in ROTA_SIRALANABILIR_DURUMLAR:
+            rotaya_eklenecek = self.filtered(
+                lambda r: r.durum not in ROTA_SIRALANABILIR_DURUMLAR
+            )
+        else:
+            rotaya_eklenecek = self.browse()
+
+        # Kapasite defteri: araç/tarih/durum değişimi (transfer iptal yayılımı
+        # dahil) yazımdan ÖNCE işlenir ki constrains yeni sayımı görsün.
+        if {"arac_id", "teslimat_tarihi", "durum"} & set(vals):
+            self.env["teslimat.kapasite.defteri"]._defter_uygula(
+                self._kapasite_farklari_yaz(vals)
+            )
+
+        res = super(TeslimatBelgesi, self).write(vals)
+        if tasindi or "sira_no" in vals:
+            self._sira_sayaclarini_ilerlet()
+        rotaya_eklenecek._rota_siraya_ekle()
+        return res
 
     def _is_archived(self) -> bool:
         """Kayıt teslim edilmiş veya iptal ise True."""
@@ -400,12 +847,15 @@ class TeslimatBelgesi(models.Model):
         (araç+ilçe+tarih = araç+tarih'in alt kümesi) race-safe yapar; bu yüzden
         ayrı ilçe kilidine ve deadlock'a yol açacak lock sırasına gerek yoktur.
 
-        İki-argümanlı pg_try_advisory_xact_lock(int4, int4) kullanılır: araç_id ve
+        İki-argümanlı pg_*_advisory_xact_lock(int4, int4) kullanılır: araç_id ve
         gün sayısı ayrı parametrelerdir; böylece eski formülde (araç*1e6 + ilçe*1e3
         + gün) gün sayısının ilçe alanına taşmasından kaynaklanan anahtar çakışması
         ortadan kalkar.
 
-        Lock transaction sonuna kadar tutulur. Bekleme yok: alınamazsa anında hata.
+        Lock transaction sonuna kadar tutulur. Önce beklemeden denenir; doluysa
+        en fazla kapasite_kilit_bekleme_ms kadar (lock_timeout) beklenir, süre
+        dolarsa hata verilir (0 = beklemeden hata). Bekleme ve zaman aşımları
+        transaction bitince teslimat.kapasite.kilit'e yazılır.
         ilce_id parametresi imza uyumluluğu için korunur (artık anahtarda kullanılmaz).
         """
         aid = arac_id
@@ -420,18 +870,113 @@ class TeslimatBelgesi(models.Model):
         if not tarih:
             return
         days = (tarih - date(2000, 1, 1)).days
+        anahtar = (int(aid), int(days))
         # (araç_id, gün_sayısı) iki ayrı int4 → paketleme/modulo yok → çakışma yok
-        self.env.cr.execute(
-            "SELECT pg_try_advisory_xact_lock(%s, %s)", (int(aid), int(days))
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", anahtar)
+        if self.env.cr.fetchone()[0]:
+            return
+
+        bekleme_ms = self._kapasite_kilit_bekleme_ms()
+        baslama = time.monotonic()
+        acquired = False
+        if bekleme_ms > 0:
+            try:
+                # Zaman aşımı hatası transaction'ı bozmasın: savepoint'e geri dönülür
+                # (set_config da onunla geri alınır).
+                with self.env.cr.savepoint(flush=False):
+                    self.env.cr.execute(
+                        "SELECT current_setting('lock_timeout'), "
+                        "set_config('lock_timeout', %s, true)",
+                        ("%dms" % bekleme_ms,),
+                    )
+                    onceki = self.env.cr.fetchone()[0]
+                    self.env.cr.execute("SELECT pg_advisory_xact_lock(%s, %s)", anahtar)
+                    self.env.cr.execute(
+                        "SELECT set_config('lock_timeout', %s, true)", (onceki,)
+                    )
+                acquired = True
+            except LockNotAvailable:
+                acquired = False
+        gecen_ms = (time.monotonic() - baslama) * 1000.0
+        self.env["teslimat.kapasite.kilit"]._olay_kuyrukla(
+            anahtar[0], tarih, gecen_ms, not acquired
         )
-        acquired = self.env.cr.fetchone()[0]
         if not acquired:
+            _logger.warning(
+                "Kapasite kilidi zaman aşımı: araç=%s tarih=%s (%.0f ms)",
+                anahtar[0], tarih, gecen_ms,
+            )
             raise UserError(
                 _(
                     "Bu tarih ve araç için başka bir kullanıcı işlem yapıyor.\n\n"
                     "Lütfen birkaç saniye sonra tekrar deneyin."
                 )
             )
+        if gecen_ms >= CAPACITY_LOCK_SLOW_MS:
+            _logger.info(
+                "Kapasite kilidi beklendi: araç=%s tarih=%s (%.0f ms)",
+                anahtar[0], tarih, gecen_ms,
+            )
+
+    @api.model
+    def _kapasite_kilit_bekleme_ms(self) -> int:
+        """Kilit için en fazla bekleme süresi (ms, ir.config_parameter)."""
+        deger = self.env["ir.config_parameter"].sudo().get_param(
+            PARAM_CAPACITY_LOCK_WAIT, CAPACITY_LOCK_WAIT_MS
+        )
+        try:
+            return max(int(str(deger).strip()), 0)
+        except ValueError:
+            return CAPACITY_LOCK_WAIT_MS
+
+    @api.model
+    def get_kapasite_kilit_istatistikleri(self, sifirla: bool = False) -> list:
+        """Kapasite kilidi çekişme sayaçları, araç bazında (yönetici).
+
+        teslimat.kapasite.kilit satırları (tüm worker'lar) araç başına toplanır.
+
+        Args:
+            sifirla: True ise sayaçlar okunduktan sonra silinir
+
+        Returns:
+            list: En çok zaman aşımı/bekleme olan araçtan başlayarak
+                [{"arac_id", "arac", "bekleyen", "zaman_asimi",
+                  "ortalama_ms", "en_uzun_ms"}]
+        """
+        if not is_manager(self.env):
+            raise UserError(_("Kilit istatistiklerini sadece yöneticiler görebilir."))
+        Kilit = self.env["teslimat.kapasite.kilit"].sudo()
+        Kilit.flush()
+        self.env.cr.execute(
+            """
+            SELECT arac_id, SUM(bekleyen), SUM(zaman_asimi),
+                   SUM(toplam_ms), MAX(en_uzun_ms)
+              FROM teslimat_kapasite_kilit
+             GROUP BY arac_id
+            """
+        )
+        satirlar = self.env.cr.fetchall()
+        if sifirla:
+            self.env.cr.execute("DELETE FROM teslimat_kapasite_kilit")
+            Kilit.invalidate_cache()
+        adlar = dict(
+            self.env["teslimat.arac"].browse([satir[0] for satir in satirlar]).exists().name_get()
+        )
+        sonuc = [
+            {
+                "arac_id": arac_id,
+                "arac": adlar.get(arac_id, ""),
+                "bekleyen": bekleyen,
+                "zaman_asimi": zaman_asimi,
+                "ortalama_ms": round(toplam_ms / (bekleyen + zaman_asimi), 1)
+                if bekleyen + zaman_asimi
+                else 0.0,
+                "en_uzun_ms": round(en_uzun_ms or 0.0, 1),
+            }
+            for arac_id, bekleyen, zaman_asimi, toplam_ms, en_uzun_ms in satirlar
+        ]
+        sonuc.sort(key=lambda satir: (-satir["zaman_asimi"], -satir["bekleyen"], satir["arac"]))
+        return sonuc
 
     def _check_capacity_on_write(self, vals: dict) -> None:
         """Write öncesi kapasite pre-check'i (yeni değerlerle, fail-fast).
@@ -582,14 +1127,15 @@ class TeslimatBelgesi(models.Model):
             bool: Başarılı ise True
         """
         # Süper yönetici: tüm kontrolleri atla, koşulsuz sil
-        if is_super_manager(self.env):
-            return super(TeslimatBelgesi, self).unlink()
-
-        self._check_unlink_yetkisi()
+        if not is_super_manager(self.env):
+            self._check_unlink_yetkisi()
 
-        for record in self:
-            record._check_completed_record_unlink()
+            for record in self:
+                record._check_completed_record_unlink()
 
+        self.env["teslimat.kapasite.defteri"]._defter_uygula(
+            self._kapasite_farklari_sil()
+        )
         return super(TeslimatBelgesi, self).unlink()
 
     def _check_unlink_yetkisi(self) -> None:
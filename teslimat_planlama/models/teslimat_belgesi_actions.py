@@ -23,9 +23,11 @@ from .teslimat_utils import (
 )
 from .teslimat_route_service import (
     PARAM_API_KEY,
+    ROUTE_ENGINE_GOOGLE,
+    ROUTE_ENGINE_LOCAL,
     get_maps_route_config,
     get_rota_optimizasyon_groups,
-    sort_vehicle_day_deliveries,
+    sort_vehicle_day_groups,
 )
 from . import sms_helper
 
@@ -247,7 +249,7 @@ class TeslimatBelgesiActions(models.AbstractModel):
     def action_trafik_sirasina_gore_sirala(self) -> dict:
         """Günlük teslimatları araç bazında trafik süresine göre sırala."""
         config = get_maps_route_config(self.env)
-        if not config["api_key"]:
+        if config["motor"] == ROUTE_ENGINE_GOOGLE and not config["api_key"]:
             raise UserError(
                 _(
                     "Google Maps API anahtarı tanımlı değil.\n\n"
@@ -266,9 +268,10 @@ class TeslimatBelgesiActions(models.AbstractModel):
         total_skipped = 0
         lines = []
 
-        for entry in group_list:
-            group = entry["records"]
-            count, minutes, skipped = sort_vehicle_day_deliveries(group)
+        results = sort_vehicle_day_groups(
+            self.env, [entry["records"] for entry in group_list]
+        )
+        for entry, (count, minutes, skipped) in zip(group_list, results):
             total_count += count
             total_minutes += minutes
             total_skipped += skipped
@@ -291,9 +294,17 @@ class TeslimatBelgesiActions(models.AbstractModel):
             message += "\n" + _("Toplam tahmini süre: ~%(min)s dk.") % {
                 "min": total_minutes
             }
-        # Maliyet farkındalığı: her sıralama faturalı Google API çağrısı yapar.
-        # Sık/gereksiz tıklama maliyeti artırır (rate-limit yok, bilinçli kullanın).
-        message += "\n" + _("Not: Her sıralama Google API çağrısı yapar (faturalı).")
+        if config["motor"] == ROUTE_ENGINE_LOCAL:
+            message += "\n" + _(
+                "Not: Yerel motor kullanıldı (kuş uçuşu × yol katsayısı); "
+                "trafik dikkate alınmaz."
+            )
+        else:
+            # Maliyet farkındalığı: önbellekte olmayan bacaklar faturalı Google API
+            # çağrısı yapar (rate-limit yok, bilinçli kullanın).
+            message += "\n" + _(
+                "Not: Önbellekte olmayan mesafeler Google API'den sorgulanır (faturalı)."
+            )
 
         return {
             "type": "ir.actions.client",
@@ -154,31 +154,23 @@ class TeslimatBelgesiValidators(models.AbstractModel):
             gun_kodu = get_gun_kodu(self.teslimat_tarihi)
 
             if gun_kodu:
-                gun = self.env["teslimat.gun"].search(
-                    [("gun_kodu", "=", gun_kodu)], limit=1
-                )
-                if gun:
-                    gun_ilce = self.env["teslimat.gun.ilce"].search(
-                        [
-                            ("gun_id", "=", gun.id),
-                            ("ilce_id", "=", self.ilce_id.id),
-                            ("tarih", "=", False),  # Genel kurallar
-                        ],
-                        limit=1,
+                GunIlce = self.env["teslimat.gun.ilce"]
+                gun_adi = GunIlce._program_gun_adi(gun_kodu)
+                # Genel kural + o tarihe özel kural (ana sayfa ile aynı program)
+                if gun_adi and not GunIlce._ilce_gun_acik_mi(
+                    self.ilce_id.id, self.teslimat_tarihi
+                ):
+                    raise ValidationError(
+                        _("İlçe-Gün Eşleşmesi Hatası!\n\n"
+                          "İlçe: %(ilce)s\n"
+                          "Gün: %(gun)s\n\n"
+                          "Bu ilçeye bu gün teslimat yapılamaz.\n"
+                          "Lütfen uygun bir gün seçin.") % {
+                            "ilce": self.ilce_id.name,
+                            "gun": gun_adi,
+                        }
                     )
 
-                    if not gun_ilce:
-                        raise ValidationError(
-                            _("İlçe-Gün Eşleşmesi Hatası!\n\n"
-                              "İlçe: %(ilce)s\n"
-                              "Gün: %(gun)s\n\n"
-                              "Bu ilçeye bu gün teslimat yapılamaz.\n"
-                              "Lütfen uygun bir gün seçin.") % {
-                                "ilce": self.ilce_id.name,
-                                "gun": gun.name,
-                            }
-                        )
-
     def _validate_arac_kapasitesi(self, teslimat_tarihi=None, arac_id=None, ilce_id=None):
         """Araç kapasitesi kontrolü.
 
@@ -70,6 +70,9 @@ GUN_ESLESMESI = {
     "Sunday": "Pazar",
 }
 
+# Kısa gün adları (weekday() -> kısaltma; tablo başlıkları için)
+GUN_KISA_ADLARI = {0: "Pzt", 1: "Sal", 2: "Çar", 3: "Per", 4: "Cum", 5: "Cmt", 6: "Paz"}
+
 # ============================================================================
 # TESLİMAT DURUMLARI
 # ============================================================================
@@ -105,6 +108,17 @@ FORECAST_DAYS = 30
 # Düşük kapasite eşiği (bu değerin üstündeyse "Boş" olarak gösterilir)
 LOW_CAPACITY_THRESHOLD = 5
 
+# ============================================================================
+# KAPASİTE KİLİDİ
+# ============================================================================
+
+# (araç, tarih) kilidi doluysa en fazla bu kadar beklenir (ms); 0 = beklemeden hata
+CAPACITY_LOCK_WAIT_MS = 3000
+PARAM_CAPACITY_LOCK_WAIT = "teslimat_planlama.kapasite_kilit_bekleme_ms"
+
+# Bu süreden uzun bekleyişler loglanır (ms)
+CAPACITY_LOCK_SLOW_MS = 500
+
 # ============================================================================
 # GÜN KODLARI - WEEKDAY MAPPING
 # ============================================================================
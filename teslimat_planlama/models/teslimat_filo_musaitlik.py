@@ -0,0 +1,207 @@
+"""Filo Müsaitlik Tablosu - Bir ilçe için tüm araçlar × önümüzdeki günler."""
+import logging
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import html_escape
+
+from .teslimat_constants import (
+    DAILY_DELIVERY_LIMIT,
+    FORECAST_DAYS,
+    GUN_ESLESMESI,
+    GUN_KISA_ADLARI,
+    LOW_CAPACITY_THRESHOLD,
+    SAME_DAY_DELIVERY_CUTOFF_HOUR,
+)
+from .teslimat_utils import get_istanbul_time
+
+_logger = logging.getLogger(__name__)
+
+# Tek sorguda gösterilebilecek en uzun ufuk (gün)
+FILO_MAX_GUN = 60
+
+
+class TeslimatFiloMusaitlik(models.TransientModel):
+    """Filo Müsaitlik Tablosu.
+
+    Kapasite Sorgulama ekranı tek araç içindir; bu ekran seçilen ilçeye giden
+    TÜM araçların önümüzdeki günlerdeki kalan kapasitesini, kapatma ve
+    ilçe-gün programı durumunu tek tabloda gösterir. Veriler sabit sayıda
+    toplu sorguyla okunur (araçlar, kapasite defteri, kapatmalar, program);
+    araç veya gün sayısıyla sorgu sayısı artmaz.
+    """
+
+    _name = "teslimat.filo.musaitlik"
+    _description = "Teslimat Filo Müsaitlik Tablosu"
+
+    ilce_id = fields.Many2one(
+        "teslimat.ilce",
+        string="İlçe",
+        domain=[("aktif", "=", True), ("teslimat_aktif", "=", True)],
+    )
+    gun_sayisi = fields.Integer(string="Gün Sayısı", default=FORECAST_DAYS)
+    tablo_html = fields.Html(
+        string="Müsaitlik Tablosu",
+        compute="_compute_tablo_html",
+        sanitize=False,
+    )
+
+    @api.depends("ilce_id", "gun_sayisi")
+    def _compute_tablo_html(self) -> None:
+        """Seçilen ilçe için araç × gün tablosunu oluştur."""
+        for record in self:
+            if not record.ilce_id:
+                record.tablo_html = False
+                continue
+            veri = self.get_filo_musaitlik(record.ilce_id.id, record.gun_sayisi)
+            record.tablo_html = self._tablo_html_olustur(veri)
+
+    @api.model
+    def get_filo_musaitlik(self, ilce_id: int, gun_sayisi: int = FORECAST_DAYS) -> dict:
+        """İlçeye giden araçlar × önümüzdeki günler kapasite matrisi.
+
+        Sorgular: araçlar (uygun_ilceler), kapasite defteri, araç kapatmaları
+        ve ilçe-gün programı — her biri tek toplu sorgu. Pazar ve saat sınırı
+        geçmiş bugün, Kapasite Sorgulama ile aynı kuralla listeden çıkarılır.
+
+        Args:
+            ilce_id: İlçe ID
+            gun_sayisi: Bugünden itibaren kaç gün (1..FILO_MAX_GUN)
+
+        Returns:
+            dict: {"ilce": {"id", "name"},
+                   "tarihler": [{"tarih", "gun_adi", "programda"}],
+                   "araclar": [{"id", "name", "limit",
+                                "gunler": [{"sayi", "kalan", "kapali", "durum"}]}]}
+            (gunler, tarihler ile aynı sıradadır; tarihler ISO metin)
+        """
+        baslama = time.monotonic()
+        gun_sayisi = max(1, min(int(gun_sayisi or FORECAST_DAYS), FILO_MAX_GUN))
+        ilce = self.env["teslimat.ilce"].browse(ilce_id)
+        simdi = get_istanbul_time()
+        bugun = simdi.date()
+        bitis = bugun + timedelta(days=gun_sayisi)
+
+        ana_sayfa = self.env["teslimat.ana.sayfa"]
+        tarihler = [
+            bugun + timedelta(days=i)
+            for i in range(gun_sayisi)
+            if ana_sayfa._is_date_available(
+                bugun + timedelta(days=i), bugun, simdi.hour, SAME_DAY_DELIVERY_CUTOFF_HOUR
+            )
+        ]
+
+        araclar = self.env["teslimat.arac"].search_read(
+            [("aktif", "=", True), ("uygun_ilceler", "in", [ilce_id])],
+            ["name", "gunluk_teslimat_limiti"],
+            order="name",
+        )
+        arac_ids = [arac["id"] for arac in araclar]
+
+        self.env["teslimat.belgesi"].check_access_rights("read")
+        sayilar = self.env["teslimat.kapasite.defteri"]._defter_oku_toplu(
+            arac_ids, bugun, bitis
+        )
+        Kapatma = self.env["teslimat.arac.kapatma"]
+        kapatmalar = Kapatma._kapali_araliklar_toplu(arac_ids, bugun, bitis)
+        GunIlce = self.env["teslimat.gun.ilce"]
+        program = GunIlce._program_oku([ilce_id], bugun, bitis)
+        programda = {
+            tarih: GunIlce._program_acik_mi(program, ilce_id, tarih) for tarih in tarihler
+        }
+
+        satirlar = []
+        for arac in araclar:
+            limit = arac["gunluk_teslimat_limiti"] or DAILY_DELIVERY_LIMIT
+            araliklar = kapatmalar[arac["id"]]
+            gunler = []
+            for tarih in tarihler:
+                sayi = sayilar.get((arac["id"], tarih), 0)
+                kalan = limit - sayi
+                kapali = Kapatma._aralikta_kapali_mi(araliklar, tarih)
+                if not kapali and not programda[tarih]:
+                    durum = "Program Dışı"
+                else:
+                    durum = ana_sayfa._get_durum_text(kapali, kalan, sayi, limit)
+                gunler.append(
+                    {"sayi": sayi, "kalan": kalan, "kapali": kapali, "durum": durum}
+                )
+            satirlar.append(
+                {"id": arac["id"], "name": arac["name"], "limit": limit, "gunler": gunler}
+            )
+
+        _logger.debug(
+            "Filo müsaitlik: ilçe=%s, %s araç × %s gün, %.1f ms",
+            ilce.name,
+            len(satirlar),
+            len(tarihler),
+            (time.monotonic() - baslama) * 1000.0,
+        )
+        return {
+            "ilce": {"id": ilce.id, "name": ilce.name},
+            "tarihler": [
+                {
+                    "tarih": fields.Date.to_string(tarih),
+                    "gun_adi": GUN_ESLESMESI.get(tarih.strftime("%A"), tarih.strftime("%A")),
+                    "programda": programda[tarih],
+                }
+                for tarih in tarihler
+            ],
+            "araclar": satirlar,
+        }
+
+    @api.model
+    def _hucre_sinifi(self, gun: dict) -> str:
+        """Hücrenin renk sınıfı (Kapasite Sorgulama listesiyle aynı eşikler)."""
+        if gun["kapali"] or gun["durum"] == "Program Dışı":
+            return "table-secondary text-muted"
+        if gun["kalan"] <= 0:
+            return "table-danger"
+        if gun["kalan"] <= LOW_CAPACITY_THRESHOLD:
+            return "table-warning"
+        return "table-success"
+
+    @api.model
+    def _tablo_html_olustur(self, veri: dict) -> str:
+        """get_filo_musaitlik sonucunu salt okunur HTML tabloya çevir."""
+        if not veri["araclar"]:
+            return '<div class="alert alert-info mb-0">Bu ilçeye atanmış aktif araç yok.</div>'
+
+        basliklar = ['<th class="text-nowrap">Araç</th>']
+        for gun in veri["tarihler"]:
+            tarih = fields.Date.to_date(gun["tarih"])
+            basliklar.append(
+                '<th class="text-center text-nowrap%s" title="%s">%s<br/><small>%s</small></th>'
+                % (
+                    "" if gun["programda"] else " text-muted",
+                    html_escape(gun["gun_adi"]),
+                    tarih.strftime("%d.%m"),
+                    GUN_KISA_ADLARI[tarih.weekday()],
+                )
+            )
+
+        satirlar = []
+        for arac in veri["araclar"]:
+            hucreler = [
+                '<th class="text-nowrap">%s <small class="text-muted">(%s)</small></th>'
+                % (html_escape(arac["name"]), arac["limit"])
+            ]
+            for gun in arac["gunler"]:
+                if gun["kapali"]:
+                    icerik = "✖"
+                elif gun["durum"] == "Program Dışı":
+                    icerik = "–"
+                else:
+                    icerik = str(gun["kalan"])
+                hucreler.append(
+                    '<td class="text-center %s" title="%s">%s</td>'
+                    % (self._hucre_sinifi(gun), html_escape(gun["durum"]), icerik)
+                )
+            satirlar.append("<tr>%s</tr>" % "".join(hucreler))
+
+        return (
+            '<div class="table-responsive">'
+            '<table class="table table-sm table-bordered mb-0">'
+            "<thead><tr>%s</tr></thead><tbody>%s</tbody></table></div>"
+        ) % ("".join(basliklar), "".join(satirlar))
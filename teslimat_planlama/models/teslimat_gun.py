@@ -1,7 +1,7 @@
 """Teslimat Gün Yönetimi Modeli."""
 import logging
 
-from odoo import fields, models
+from odoo import api, fields, models
 
 _logger = logging.getLogger(__name__)
 
@@ -55,6 +55,27 @@ class TeslimatGun(models.Model):
         default="her_ikisi",
     )
 
+    # Derlenmiş ilçe-gün programı (teslimat.gun.ilce._program_derle) gün
+    # kodunu ve adını buradan okur; değişince önbellek geçersiz kılınır.
+    _PROGRAM_ALANLARI = {"gun_kodu", "name"}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._PROGRAM_ALANLARI & set(vals):
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
     def action_gecici_kapat(self) -> dict:
         """Günü geçici olarak kapatma wizard'ını aç.
 
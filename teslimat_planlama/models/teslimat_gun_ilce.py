@@ -1,9 +1,12 @@
 """Teslimat Gün-İlçe Eşleştirme Modeli."""
 import logging
+from types import MappingProxyType
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError
 
+from .teslimat_utils import get_gun_kodu
+
 _logger = logging.getLogger(__name__)
 
 
@@ -46,6 +49,10 @@ class TeslimatGunIlce(models.Model):
 
     notlar = fields.Text(string="Notlar")
 
+    # Derlenmiş program (_program_derle) yalnız bu alanları okur; notlar gibi
+    # diğer alanların değişmesi önbelleği boşaltmaz.
+    _PROGRAM_ALANLARI = {"gun_id", "ilce_id", "tarih", "ozel_durum"}
+
     @api.constrains("gun_id", "ilce_id", "tarih")
     def _check_unique_eslesme(self) -> None:
         """Aynı gün, ilçe ve tarih için tek kayıt olmalı.
@@ -91,6 +98,102 @@ class TeslimatGunIlce(models.Model):
                         }
                     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Program değişti: derlenmiş program önbelleğini geçersiz kıl."""
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        """Program değişti: derlenmiş program önbelleğini geçersiz kıl."""
+        res = super().write(vals)
+        if self._PROGRAM_ALANLARI & set(vals):
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        """Program değişti: derlenmiş program önbelleğini geçersiz kıl."""
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    @tools.ormcache()
+    def _program_derle(self) -> MappingProxyType:
+        """Tüm ilçe-gün programını derle (süreç önbelleği, ormcache).
+
+        Program yılda birkaç kez değişir ama neredeyse her istekte okunur.
+        Sonuç worker belleğinde tutulur; teslimat.gun / teslimat.gun.ilce
+        create/write/unlink clear_caches() çağırır, Odoo'nun önbellek sinyal
+        sayacı commit'te artar ve diğer worker'lar da önbelleklerini boşaltır.
+        Dönen yapı tüm isteklerle paylaşıldığı için salt okunurdur
+        (MappingProxyType / frozenset); yanlışlıkla değiştirilemez.
+
+        Genel kurallar (tarih boş) her hafta geçerlidir; tarihli kurallar yalnız
+        o tarih için genel kuralın ÜSTÜNE yazılır: tarihli kayıt varsa gün
+        açıktır, ozel_durum "kapali" ise o tarih kapalıdır.
+
+        Returns:
+            Mapping: {"genel": frozenset((gun_kodu, ilce_id)),
+                      "tarihli": {(ilce_id, tarih): açık_mı},
+                      "gun_adlari": {gun_kodu: gün adı}}
+                (dış ve iç sözlükler MappingProxyType)
+        """
+        gunler = {
+            gun["id"]: (gun["gun_kodu"], gun["name"])
+            for gun in self.env["teslimat.gun"].sudo().search_read([], ["gun_kodu", "name"])
+        }
+        genel = set()
+        tarihli = {}
+        for kayit in self.sudo().search_read([], ["gun_id", "ilce_id", "tarih", "ozel_durum"]):
+            ilce_id = kayit["ilce_id"][0]
+            if kayit["tarih"]:
+                tarihli[(ilce_id, kayit["tarih"])] = kayit["ozel_durum"] != "kapali"
+            else:
+                genel.add((gunler[kayit["gun_id"][0]][0], ilce_id))
+        gun_adlari = {}
+        for gun_kodu, ad in gunler.values():
+            gun_adlari.setdefault(gun_kodu, ad)
+        return MappingProxyType(
+            {
+                "genel": frozenset(genel),
+                "tarihli": MappingProxyType(tarihli),
+                "gun_adlari": MappingProxyType(gun_adlari),
+            }
+        )
+
+    @api.model
+    def _program_oku(self, ilce_ids=None, baslangic=None, bitis=None) -> MappingProxyType:
+        """İlçe-gün programı (genel + tarihli kurallar), önbellekten.
+
+        Parametreler geriye uyumluluk için korunur; derlenmiş program tüm
+        ilçe ve tarihleri içerir, filtre gerekmez.
+
+        Returns:
+            Mapping: _program_derle yapısı, salt okunur (_program_acik_mi ile sorgulanır)
+        """
+        return self._program_derle()
+
+    @api.model
+    def _program_acik_mi(self, program: dict, ilce_id: int, tarih) -> bool:
+        """Önceden okunmuş programda ilçeye o tarihte teslimat var mı (sorgusuz)."""
+        tarihli = program["tarihli"].get((ilce_id, tarih))
+        if tarihli is not None:
+            return tarihli
+        return (get_gun_kodu(tarih), ilce_id) in program["genel"]
+
+    @api.model
+    def _ilce_gun_acik_mi(self, ilce_id: int, tarih) -> bool:
+        """Tek ilçe + tarih için program kontrolü (validasyonlar için)."""
+        tarih = fields.Date.to_date(tarih)
+        return self._program_acik_mi(self._program_derle(), ilce_id, tarih)
+
+    @api.model
+    def _program_gun_adi(self, gun_kodu: str):
+        """Gün kodunun tanımlı teslimat.gun adı (tanımlı değilse None)."""
+        return self._program_derle()["gun_adlari"].get(gun_kodu)
+
     def init(self):
         """DB seviyesinde benzersizlik için partial unique index'ler.
 
@@ -4,6 +4,8 @@ import logging
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
 
+from .teslimat_constants import SMALL_VEHICLE_TYPES
+
 _logger = logging.getLogger(__name__)
 
 # İlçe yaka tipi tanımları
@@ -126,13 +128,33 @@ class TeslimatIlce(models.Model):
 
     @api.depends("name", "yaka_tipi")
     def _compute_arac_ids(self) -> None:
-        """Bu ilçeyi uygun ilçeler listesinde bulunan araçları hesapla."""
-        for record in self:
-            # Bu ilçeyi uygun_ilceler listesinde bulunan araçları bul
-            araclar = self.env["teslimat.arac"].search(
-                [("uygun_ilceler", "in", [record.id])]
+        """Bu ilçeyi uygun ilçeler listesinde bulunan araçları hesapla.
+
+        Araç↔ilçe ilişki tablosu tüm kayıtlar için tek sorguda okunur
+        (liste/kanban görünümünde ilçe başına sorgu atılmaz). Arşivlenmiş
+        araçlar, search ile aynı şekilde dahil edilmez.
+        """
+        Arac = self.env["teslimat.arac"]
+        ilce_ids = self.filtered("id").ids
+        araclar = {}
+        if ilce_ids:
+            Arac.check_access_rights("read")
+            Arac.flush(["uygun_ilceler", "active", "name"])
+            iliski = Arac._fields["uygun_ilceler"]
+            self.env.cr.execute(
+                """
+                SELECT r.{col2}, r.{col1}
+                  FROM {rel} r
+                  JOIN teslimat_arac a ON a.id = r.{col1}
+                 WHERE r.{col2} = ANY(%s) AND a.active
+                 ORDER BY a.name, a.id
+                """.format(rel=iliski.relation, col1=iliski.column1, col2=iliski.column2),
+                (ilce_ids,),
             )
-            record.arac_ids = araclar
+            for ilce_id, arac_id in self.env.cr.fetchall():
+                araclar.setdefault(ilce_id, []).append(arac_id)
+        for record in self:
+            record.arac_ids = Arac.browse(araclar.get(record.id, []))
 
     @api.depends("name")
     def _compute_yaka_tipi(self) -> None:
@@ -213,23 +235,24 @@ class TeslimatIlce(models.Model):
                         record.name
                     )
             
-            # İlgili araçların eşleştirmesini güncelle
-            record._update_arac_ilce_eslesmesi()
-            
             _logger.info(
                 "İlçe oluşturuldu: %s (%s) - Yaka: %s",
                 record.name,
                 record.state_id.name if record.state_id else "N/A",
                 record.yaka_tipi
             )
+        # İlgili araçların eşleştirmesini güncelle (tüm yeni ilçeler için tek sefer)
+        records._update_arac_ilce_eslesmesi()
         return records
 
     def write(self, vals):
         """İlçe yaka tipi değiştiğinde ilgili araçların eşleştirmesini güncelle."""
+        yaka_degisebilir = "yaka_tipi" in vals or "name" in vals
+        eski_yakalar = set(self.mapped("yaka_tipi")) if yaka_degisebilir else set()
         result = super().write(vals)
-        if "yaka_tipi" in vals or "name" in vals:
-            # Bu ilçeyi uygun ilçeler listesinde bulunan araçları güncelle
-            self._update_arac_ilce_eslesmesi()
+        if yaka_degisebilir:
+            # Eski ve yeni yakanın araçları + küçük/ek araçlar güncellenir
+            self._update_arac_ilce_eslesmesi(eski_yakalar)
             for record in self:
                 _logger.info(
                     "İlçe güncellendi: %s - Yaka: %s",
@@ -238,24 +261,29 @@ class TeslimatIlce(models.Model):
                 )
         return result
 
-    def _update_arac_ilce_eslesmesi(self) -> None:
-        """İlçe yaka tipi değiştiğinde ilgili araçların eşleştirmesini güncelle.
-        
-        Yaka tipi değişen ilçe için, bu ilçeyi uygun ilçeler listesinde 
-        bulunan araçların eşleştirmelerini yeniden hesapla.
+    def _update_arac_ilce_eslesmesi(self, eski_yakalar=None) -> None:
+        """İlçe eklendiğinde/yaka tipi değiştiğinde araç eşleştirmelerini güncelle.
+
+        Yalnız kümesi etkilenen araçlar yeniden eşleştirilir: küçük/ek araçlar
+        (tüm ilçeler) ile ilçelerin eski ve yeni yakasının araçları. Yeni
+        ilçe uygun araçlara eklenir, yakası değişen ilçe eski yakanın
+        araçlarından çıkarılır; diğer yakanın filosuna dokunulmaz.
+
+        Args:
+            eski_yakalar: yazımdan önceki yaka_tipi değerleri (write'tan)
         """
-        for ilce in self:
-            # Bu ilçeyi uygun ilçeler listesinde bulunan araçları bul
-            araclar = self.env["teslimat.arac"].search(
-                [("uygun_ilceler", "in", [ilce.id])]
-            )
-            
-            # Her araç için eşleştirmeyi yeniden hesapla
-            for arac in araclar:
-                # Eğer araç yaka bazlı ise (küçük araç değilse)
-                if arac.arac_tipi in ["anadolu_yakasi", "avrupa_yakasi"]:
-                    # Araç tipine göre uygun ilçeleri yeniden hesapla
-                    arac._update_uygun_ilceler()
+        if not self:
+            return
+        yakalar = set(self.mapped("yaka_tipi")) | set(eski_yakalar or ())
+        arac_tipleri = list(SMALL_VEHICLE_TYPES)
+        arac_tipleri += [
+            arac_tipi
+            for yaka, arac_tipi in (("anadolu", "anadolu_yakasi"), ("avrupa", "avrupa_yakasi"))
+            if yaka in yakalar
+        ]
+        self.env["teslimat.arac"].search(
+            [("arac_tipi", "in", arac_tipleri)]
+        )._update_uygun_ilceler()
 
     @api.model
     def create_districts(self) -> None:
@@ -0,0 +1,390 @@
+"""Araç-Gün Kapasite Defteri - (araç, tarih) başına aktif teslimat sayısı."""
+import logging
+
+from psycopg2.errors import DeadlockDetected, SerializationFailure
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+from .teslimat_constants import CANCELLED_STATUS
+from .teslimat_utils import execute_values_sql, is_manager
+
+_logger = logging.getLogger(__name__)
+
+
+class TeslimatKapasiteDefteri(models.Model):
+    """Araç-Gün Kapasite Defteri.
+
+    Her satır bir (araç, tarih) için iptal olmayan teslimat sayısını tutar
+    (RULE A sayımı). Kapasite kontrolleri ve 30 günlük tablo her seferinde
+    teslimat_belgesi'ni yeniden saymak yerine bu satırı okur.
+
+    Defter teslimat.belgesi create/write/unlink içinde, aynı transaction'da
+    artı/eksi farklarla güncellenir (transfer iptal yayılımı write'tan geçtiği
+    için kapsanır). Hata olursa transaction ile birlikte geri alınır.
+    Tutarlılık _defter_dogrula ile denetlenir ve yalnız farklı satırlar
+    onarılır; _defter_yeniden_olustur defteri teslimat_belgesi'nden sıfırdan
+    kurar (yalnız kurulumda, defter boşken).
+
+    Aynı satır (araç, tarih) sira_no sayacını da tutar (son_sira_no):
+    _sira_no_ayir tek upsert ile numara (veya toplu create için blok) ayırır;
+    satır kilidi transaction sonuna kadar tutulduğundan eşzamanlı iki create
+    aynı numarayı alamaz. Dışarıdan verilen sira_no'lar (rota sıralama,
+    taşıma) _sira_no_ilerlet ile sayaca bildirilir.
+    """
+
+    _name = "teslimat.kapasite.defteri"
+    _description = "Araç-Gün Kapasite Defteri"
+    _log_access = False
+    _order = "tarih desc, arac_id"
+
+    arac_id = fields.Many2one(
+        "teslimat.arac", string="Araç", required=True, ondelete="cascade", readonly=True
+    )
+    tarih = fields.Date(string="Tarih", required=True, index=True, readonly=True)
+    aktif_sayi = fields.Integer(
+        string="Aktif Teslimat",
+        readonly=True,
+        help="Bu araç ve tarih için iptal edilmemiş teslimat sayısı.",
+    )
+    son_sira_no = fields.Integer(
+        string="Son Sıra No",
+        readonly=True,
+        help="Bu araç ve tarih için verilmiş en büyük sıra numarası.",
+    )
+
+    _sql_constraints = [
+        (
+            "arac_tarih_unique",
+            "UNIQUE(arac_id, tarih)",
+            "Aynı araç ve tarih için tek defter kaydı olmalıdır!",
+        ),
+    ]
+
+    def init(self):
+        """Modül kurulum/yükseltme.
+
+        Defter boşsa (kurulum veya defterin eklendiği sürüme geçiş)
+        teslimat_belgesi'nden sıfırdan kurulur. Dolu defter silinmez:
+        yükseltmede yalnızca tutarsız satırlar onarılır.
+        """
+        self.env.cr.execute("SELECT 1 FROM teslimat_kapasite_defteri LIMIT 1")
+        if self.env.cr.fetchone():
+            # son_sira_no sonradan eklendiyse eski satırlarda NULL kalır
+            self.env.cr.execute(
+                "UPDATE teslimat_kapasite_defteri SET son_sira_no = 0 WHERE son_sira_no IS NULL"
+            )
+            self._defter_dogrula(duzelt=True)
+        else:
+            self._defter_yeniden_olustur()
+
+    @api.model
+    def _defter_uygula(self, farklar: dict) -> None:
+        """Sayım farklarını tek ifadeyle deftere işle (satır yoksa oluştur).
+
+        Anahtarlar sıralı yazılır; iki transaction aynı satırları farklı
+        sırayla kilitleyip deadlock'a düşmez.
+
+        Args:
+            farklar: {(arac_id, tarih): +n / -n}
+        """
+        satirlar = [
+            (arac_id, tarih, fark)
+            for (arac_id, tarih), fark in sorted(farklar.items())
+            if fark
+        ]
+        if not satirlar:
+            return
+        execute_values_sql(
+            self.env.cr,
+            """
+            INSERT INTO teslimat_kapasite_defteri (arac_id, tarih, aktif_sayi)
+            VALUES %s
+            ON CONFLICT (arac_id, tarih) DO UPDATE
+               SET aktif_sayi = teslimat_kapasite_defteri.aktif_sayi
+                                + EXCLUDED.aktif_sayi
+            """,
+            satirlar,
+        )
+        self.invalidate_cache()
+        # Araçların bugünkü kapasite alanları yalnız bugünün satırı değişince tazelenir.
+        bugun = fields.Date.today()
+        bugun_araclar = {arac_id for arac_id, tarih, _fark in satirlar if tarih == bugun}
+        if bugun_araclar:
+            self.env["teslimat.arac"].browse(sorted(bugun_araclar))._kapasite_tazele()
+
+    @api.model
+    def _sira_no_ayir(self, talepler: dict) -> dict:
+        """(araç, tarih) başına ardışık sira_no bloğu ayır (tek upsert).
+
+        Sayaç satırı transaction sonuna kadar kilitli kalır; geri alınan
+        transaction'ın ayırdığı numaralar da geri alınır. Boşluk (iptal,
+        başarısız savepoint) zararsızdır: sıra yalnızca sıralama içindir.
+
+        Args:
+            talepler: {(arac_id, tarih): adet}
+
+        Returns:
+            dict: {(arac_id, tarih): bloğun ilk numarası}
+        """
+        satirlar = [
+            (arac_id, tarih, 0, adet)
+            for (arac_id, tarih), adet in sorted(talepler.items())
+            if adet > 0
+        ]
+        if not satirlar:
+            return {}
+        sonuc = execute_values_sql(
+            self.env.cr,
+            """
+            INSERT INTO teslimat_kapasite_defteri (arac_id, tarih, aktif_sayi, son_sira_no)
+            VALUES %s
+            ON CONFLICT (arac_id, tarih) DO UPDATE
+               SET son_sira_no = teslimat_kapasite_defteri.son_sira_no
+                                 + EXCLUDED.son_sira_no
+            RETURNING arac_id, tarih, son_sira_no
+            """,
+            satirlar,
+            fetch=True,
+        )
+        self.invalidate_cache()
+        return {
+            (arac_id, tarih): son - talepler[(arac_id, tarih)] + 1
+            for arac_id, tarih, son in sonuc
+        }
+
+    @api.model
+    def _sira_no_ilerlet(self, enbuyukler: dict) -> None:
+        """Dışarıdan yazılan sira_no'ları sayaca bildir (sayaç geri gitmez).
+
+        Args:
+            enbuyukler: {(arac_id, tarih): o güne yazılan en büyük sira_no}
+        """
+        satirlar = [
+            (arac_id, tarih, 0, sira)
+            for (arac_id, tarih), sira in sorted(enbuyukler.items())
+            if sira
+        ]
+        if not satirlar:
+            return
+        execute_values_sql(
+            self.env.cr,
+            """
+            INSERT INTO teslimat_kapasite_defteri (arac_id, tarih, aktif_sayi, son_sira_no)
+            VALUES %s
+            ON CONFLICT (arac_id, tarih) DO UPDATE
+               SET son_sira_no = EXCLUDED.son_sira_no
+             WHERE teslimat_kapasite_defteri.son_sira_no < EXCLUDED.son_sira_no
+            """,
+            satirlar,
+        )
+        self.invalidate_cache()
+
+    @api.model
+    def _defter_sayi(self, arac_id: int, tarih) -> int:
+        """Tek (araç, tarih) için aktif teslimat sayısı (satır yoksa 0)."""
+        self.env.cr.execute(
+            """
+            SELECT aktif_sayi FROM teslimat_kapasite_defteri
+             WHERE arac_id = %s AND tarih = %s
+            """,
+            (arac_id, tarih),
+        )
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _defter_oku(self, arac_id: int, baslangic, bitis) -> dict:
+        """Aralıktaki günlerin aktif teslimat sayıları.
+
+        Returns:
+            dict: {tarih: sayi} (sayısı 0 olan günler dahil olmayabilir)
+        """
+        self.env.cr.execute(
+            """
+            SELECT tarih, aktif_sayi FROM teslimat_kapasite_defteri
+             WHERE arac_id = %s AND tarih BETWEEN %s AND %s AND aktif_sayi != 0
+            """,
+            (arac_id, baslangic, bitis),
+        )
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _defter_oku_toplu(self, arac_ids, baslangic, bitis) -> dict:
+        """Birden çok aracın aralıktaki sayıları tek sorguda.
+
+        Returns:
+            dict: {(arac_id, tarih): sayi}
+        """
+        if not arac_ids:
+            return {}
+        self.env.cr.execute(
+            """
+            SELECT arac_id, tarih, aktif_sayi FROM teslimat_kapasite_defteri
+             WHERE arac_id = ANY(%s) AND tarih BETWEEN %s AND %s AND aktif_sayi != 0
+            """,
+            (list(arac_ids), baslangic, bitis),
+        )
+        return {(arac_id, tarih): sayi for arac_id, tarih, sayi in self.env.cr.fetchall()}
+
+    @api.model
+    def _defter_yeniden_olustur(self) -> int:
+        """Defteri teslimat_belgesi'nden sıfırdan kur (yalnız kurulum/geçiş).
+
+        Tüm tabloyu silip yazdığı için canlı sistemde kullanılmaz; düzeltme
+        için _defter_dogrula(duzelt=True) yalnız farklı satırlara dokunur.
+
+        Returns:
+            int: Yazılan (araç, tarih) satırı sayısı
+        """
+        self.env["teslimat.belgesi"].flush(
+            ["arac_id", "teslimat_tarihi", "durum", "sira_no"]
+        )
+        self.env.cr.execute("DELETE FROM teslimat_kapasite_defteri")
+        # İptaller sayılmaz ama sira_no sayacı onların numaralarını da kapsar.
+        self.env.cr.execute(
+            """
+            INSERT INTO teslimat_kapasite_defteri (arac_id, tarih, aktif_sayi, son_sira_no)
+            SELECT arac_id, teslimat_tarihi,
+                   COUNT(*) FILTER (WHERE durum != %s),
+                   COALESCE(MAX(sira_no), 0)
+              FROM teslimat_belgesi
+             WHERE arac_id IS NOT NULL
+               AND teslimat_tarihi IS NOT NULL
+             GROUP BY arac_id, teslimat_tarihi
+            """,
+            (CANCELLED_STATUS,),
+        )
+        yazilan = self.env.cr.rowcount
+        self.invalidate_cache()
+        self.env["teslimat.arac"].with_context(active_test=False).search([])._kapasite_tazele()
+        _logger.info("Kapasite defteri yeniden oluşturuldu: %s satır", yazilan)
+        return yazilan
+
+    @api.model
+    def _defter_dogrula(self, duzelt: bool = False) -> list:
+        """Defteri gerçek sayımla karşılaştır.
+
+        Tutarsız sayılır: aktif_sayi gerçek sayımdan farklı veya son_sira_no
+        o güne verilmiş en büyük sira_no'nun gerisinde.
+
+        Args:
+            duzelt: True ise yalnız tutarsız satırlar _defter_onar ile düzeltilir
+
+        Returns:
+            list: [(arac_id, tarih, defterdeki, gercek, son_sira_no, gercek_sira_no)]
+                tutarsız satırlar
+        """
+        self.env["teslimat.belgesi"].flush(
+            ["arac_id", "teslimat_tarihi", "durum", "sira_no"]
+        )
+        self.env.cr.execute(
+            """
+            WITH gercek AS (
+                SELECT arac_id, teslimat_tarihi AS tarih,
+                       COUNT(*) FILTER (WHERE durum != %s) AS sayi,
+                       COALESCE(MAX(sira_no), 0) AS sira
+                  FROM teslimat_belgesi
+                 WHERE arac_id IS NOT NULL
+                   AND teslimat_tarihi IS NOT NULL
+                 GROUP BY arac_id, teslimat_tarihi
+            )
+            SELECT COALESCE(d.arac_id, g.arac_id),
+                   COALESCE(d.tarih, g.tarih),
+                   COALESCE(d.aktif_sayi, 0),
+                   COALESCE(g.sayi, 0),
+                   COALESCE(d.son_sira_no, 0),
+                   COALESCE(g.sira, 0)
+              FROM teslimat_kapasite_defteri d
+              FULL OUTER JOIN gercek g
+                ON g.arac_id = d.arac_id AND g.tarih = d.tarih
+             WHERE COALESCE(d.aktif_sayi, 0) != COALESCE(g.sayi, 0)
+                OR COALESCE(d.son_sira_no, 0) < COALESCE(g.sira, 0)
+             ORDER BY 2, 1
+            """,
+            (CANCELLED_STATUS,),
+        )
+        tutarsiz = self.env.cr.fetchall()
+        if tutarsiz:
+            _logger.warning(
+                "Kapasite defteri tutarsız: %s satır (ilk: %s)", len(tutarsiz), tutarsiz[:5]
+            )
+            if duzelt:
+                self._defter_onar(tutarsiz)
+        return tutarsiz
+
+    @api.model
+    def _defter_onar(self, tutarsiz: list) -> int:
+        """Tutarsız satırları tek tek upsert ile düzelt (diğer satırlara dokunmaz).
+
+        Denetim sorgusu transaction'ın anlık görüntüsünden okur. Bu arada
+        satırı eşzamanlı bir create/write değiştirmişse (her teslimat
+        değişikliği satırını aynı transaction'da günceller) upsert
+        serileştirme hatası verir; o satır savepoint'le atlanır ve sonraki
+        denetimde yeniden ele alınır, böylece eski sayım yeni değerin
+        üzerine yazılmaz. Sayaç geri gitmez; satır silinmez (sayaç korunur).
+
+        Args:
+            tutarsiz: _defter_dogrula satırları
+
+        Returns:
+            int: Düzeltilen satır sayısı
+        """
+        duzeltilen, bugun_araclar = 0, set()
+        bugun = fields.Date.today()
+        for arac_id, tarih, _defterdeki, gercek, _sira, gercek_sira in tutarsiz:
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    self.env.cr.execute(
+                        """
+                        INSERT INTO teslimat_kapasite_defteri
+                               (arac_id, tarih, aktif_sayi, son_sira_no)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (arac_id, tarih) DO UPDATE
+                           SET aktif_sayi = EXCLUDED.aktif_sayi,
+                               son_sira_no = GREATEST(
+                                   COALESCE(teslimat_kapasite_defteri.son_sira_no, 0),
+                                   EXCLUDED.son_sira_no)
+                        """,
+                        (arac_id, tarih, gercek, gercek_sira),
+                    )
+            except (SerializationFailure, DeadlockDetected):
+                _logger.info(
+                    "Kapasite defteri onarımı atlandı (eşzamanlı değişiklik): araç=%s tarih=%s",
+                    arac_id, tarih,
+                )
+                continue
+            duzeltilen += 1
+            if tarih == bugun:
+                bugun_araclar.add(arac_id)
+        self.invalidate_cache()
+        if bugun_araclar:
+            self.env["teslimat.arac"].browse(sorted(bugun_araclar)).exists()._kapasite_tazele()
+        _logger.info("Kapasite defteri onarıldı: %s/%s satır", duzeltilen, len(tutarsiz))
+        return duzeltilen
+
+    @api.model
+    def _cron_defter_dogrula(self) -> None:
+        """Haftalık cron: defteri denetle, tutarsız satırları onar."""
+        self._defter_dogrula(duzelt=True)
+
+    @api.model
+    def action_defter_dogrula(self) -> dict:
+        """Yönetici eylemi: defteri denetle ve gerekirse düzelt."""
+        if not is_manager(self.env):
+            raise UserError(_("Kapasite defterini sadece yöneticiler denetleyebilir."))
+        tutarsiz = self._defter_dogrula(duzelt=True)
+        if tutarsiz:
+            mesaj = _("%s tutarsız satır bulundu ve düzeltildi.") % len(tutarsiz)
+        else:
+            mesaj = _("Kapasite defteri tutarlı.")
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Kapasite Defteri"),
+                "message": mesaj,
+                "type": "warning" if tutarsiz else "success",
+                "sticky": False,
+            },
+        }
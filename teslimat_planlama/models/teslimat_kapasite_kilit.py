@@ -0,0 +1,112 @@
+"""Kapasite Kilidi İstatistiği - (araç, tarih) başına kilit bekleme/zaman aşımı sayaçları."""
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class TeslimatKapasiteKilit(models.Model):
+    """Kapasite Kilidi İstatistiği.
+
+    _acquire_capacity_lock'un beklediği veya zaman aşımına uğradığı her deneme
+    (araç, tarih) satırına eklenir; beklemesiz alınan kilitler yazılmaz.
+    Sayaçlar veritabanında tutulduğu için tüm worker'lardan toplanır ve
+    yeniden başlatmada kaybolmaz.
+
+    Yazım kilit bırakıldıktan sonra (commit/rollback sonrası) ayrı bir
+    cursor'da yapılır: zaman aşımı transaction'ı geri alsa da olay kaybolmaz
+    ve kapasite defteri satırı (çekişmenin olduğu satır) hiç kilitlenmez.
+    """
+
+    _name = "teslimat.kapasite.kilit"
+    _description = "Kapasite Kilidi İstatistiği"
+    _log_access = False
+    _order = "zaman_asimi desc, bekleyen desc, tarih desc"
+
+    arac_id = fields.Many2one(
+        "teslimat.arac", string="Araç", required=True, ondelete="cascade", readonly=True
+    )
+    tarih = fields.Date(string="Tarih", required=True, index=True, readonly=True)
+    bekleyen = fields.Integer(
+        string="Bekleyen", readonly=True, help="Kilit için beklenip alınan deneme sayısı."
+    )
+    zaman_asimi = fields.Integer(
+        string="Zaman Aşımı", readonly=True, help="Bekleme süresi dolan deneme sayısı."
+    )
+    toplam_ms = fields.Float(string="Toplam Bekleme (ms)", readonly=True, digits=(16, 1))
+    en_uzun_ms = fields.Float(string="En Uzun Bekleme (ms)", readonly=True, digits=(16, 1))
+    son_olay = fields.Datetime(string="Son Olay", readonly=True)
+
+    _sql_constraints = [
+        (
+            "arac_tarih_unique",
+            "UNIQUE(arac_id, tarih)",
+            "Aynı araç ve tarih için tek kilit istatistiği olmalıdır!",
+        ),
+    ]
+
+    @api.model
+    def _olay_kuyrukla(self, arac_id: int, tarih, bekleme_ms: float, zaman_asimi: bool) -> None:
+        """Kilit olayını transaction bitince (commit veya rollback) yazılmak üzere kuyrukla.
+
+        Aynı liste hem postcommit hem postrollback'e bağlanır; hangisi
+        çalışırsa yazar ve listeyi boşaltır.
+        """
+        cr = self.env.cr
+        olaylar = cr.postcommit.data.get("teslimat_kilit_olaylari")
+        if olaylar is None:
+            olaylar = cr.postcommit.data["teslimat_kilit_olaylari"] = []
+            registry, uid = self.env.registry, self.env.uid
+
+            def _olaylari_yaz():
+                if not olaylar:
+                    return
+                bekleyenler = list(olaylar)
+                olaylar.clear()
+                try:
+                    with registry.cursor() as yeni_cr:
+                        env = api.Environment(yeni_cr, uid, {})
+                        env["teslimat.kapasite.kilit"]._olaylari_isle(bekleyenler)
+                except Exception:  # noqa: BLE001 - istatistik asıl işlemi etkilemesin
+                    _logger.exception("Kapasite kilidi istatistiği yazılamadı")
+
+            cr.postcommit.add(_olaylari_yaz)
+            cr.postrollback.add(_olaylari_yaz)
+        olaylar.append((int(arac_id), tarih, float(bekleme_ms), bool(zaman_asimi)))
+
+    @api.model
+    def _olaylari_isle(self, olaylar: list) -> None:
+        """Kuyruklanan olayları (araç, tarih) satırlarına topla ve upsert et.
+
+        Args:
+            olaylar: [(arac_id, tarih, bekleme_ms, zaman_asimi)]
+        """
+        toplam = {}
+        for arac_id, tarih, bekleme_ms, zaman_asimi in olaylar:
+            sayac = toplam.setdefault((arac_id, tarih), [0, 0, 0.0, 0.0])
+            if zaman_asimi:
+                sayac[1] += 1
+            else:
+                sayac[0] += 1
+            sayac[2] += bekleme_ms
+            sayac[3] = max(sayac[3], bekleme_ms)
+        for (arac_id, tarih), (bekleyen, zaman_asimi, toplam_ms, en_uzun_ms) in sorted(
+            toplam.items()
+        ):
+            self.env.cr.execute(
+                """
+                INSERT INTO teslimat_kapasite_kilit
+                       (arac_id, tarih, bekleyen, zaman_asimi, toplam_ms, en_uzun_ms, son_olay)
+                SELECT %s, %s, %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC'
+                 WHERE EXISTS (SELECT 1 FROM teslimat_arac WHERE id = %s)
+                ON CONFLICT (arac_id, tarih) DO UPDATE
+                   SET bekleyen = teslimat_kapasite_kilit.bekleyen + EXCLUDED.bekleyen,
+                       zaman_asimi = teslimat_kapasite_kilit.zaman_asimi + EXCLUDED.zaman_asimi,
+                       toplam_ms = teslimat_kapasite_kilit.toplam_ms + EXCLUDED.toplam_ms,
+                       en_uzun_ms = GREATEST(teslimat_kapasite_kilit.en_uzun_ms,
+                                             EXCLUDED.en_uzun_ms),
+                       son_olay = EXCLUDED.son_olay
+                """,
+                (arac_id, tarih, bekleyen, zaman_asimi, toplam_ms, en_uzun_ms, arac_id),
+            )
@@ -0,0 +1,128 @@
+"""Rota Süre Matrisi Önbelleği - Google Routes API sonuçlarının kalıcı cache'i."""
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+from .teslimat_utils import execute_values_sql
+
+_logger = logging.getLogger(__name__)
+
+
+class TeslimatRotaMatris(models.Model):
+    """Rota Süre Matrisi Önbelleği.
+
+    Her kayıt tek bir (kaynak → hedef) bacağının trafik süresini, kalkış saati
+    dilimiyle birlikte tutar. Anahtarlar normalize edilmiş adres veya
+    "enlem,boylam" metnidir (teslimat_route_service._matrix_cache_key).
+    Kayıtlar TTL süresince geçerlidir; süresi dolan bacaklar bir sonraki
+    sıralamada yeniden sorgulanır ve yerinde güncellenir (upsert).
+    """
+
+    _name = "teslimat.rota.matris"
+    _description = "Rota Süre Matrisi Önbelleği"
+    _log_access = False
+
+    kaynak = fields.Char(string="Kaynak", required=True, index=True)
+    hedef = fields.Char(string="Hedef", required=True)
+    saat_dilimi = fields.Integer(
+        string="Saat Dilimi",
+        required=True,
+        help="Kalkış saati (İstanbul, 0-23). Trafik süresi saate göre değişir.",
+    )
+    sure_saniye = fields.Integer(string="Süre (sn)")
+    rota_var = fields.Boolean(
+        string="Rota Var",
+        default=True,
+        help="Google bu bacak için rota bulamadıysa False (ulaşılamaz).",
+    )
+    sorgu_zamani = fields.Datetime(string="Sorgu Zamanı", required=True, index=True)
+
+    _sql_constraints = [
+        (
+            "bacak_unique",
+            "UNIQUE(kaynak, hedef, saat_dilimi)",
+            "Aynı bacak ve saat dilimi için tek önbellek kaydı olmalıdır!",
+        ),
+    ]
+
+    @api.model
+    def _matris_oku(self, anahtarlar, saat_dilimi: int, ttl_saat: int) -> dict:
+        """Geçerli (TTL içindeki) bacakları tek sorguda oku.
+
+        Args:
+            anahtarlar: Normalize adres anahtarları (kaynak ve hedef kümesi)
+            saat_dilimi: Kalkış saati dilimi
+            ttl_saat: Geçerlilik süresi (saat)
+
+        Returns:
+            dict: {(kaynak, hedef): saniye veya None (ulaşılamaz)}
+        """
+        anahtarlar = list(set(anahtarlar))
+        if not anahtarlar:
+            return {}
+        sinir = fields.Datetime.now() - timedelta(hours=ttl_saat)
+        self.env.cr.execute(
+            """
+            SELECT kaynak, hedef, sure_saniye, rota_var
+              FROM teslimat_rota_matris
+             WHERE saat_dilimi = %s
+               AND kaynak = ANY(%s)
+               AND hedef = ANY(%s)
+               AND sorgu_zamani >= %s
+            """,
+            (saat_dilimi, anahtarlar, anahtarlar, sinir),
+        )
+        return {
+            (kaynak, hedef): (sure if rota_var else None)
+            for kaynak, hedef, sure, rota_var in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _matris_yaz(self, bacaklar: dict, saat_dilimi: int) -> None:
+        """Yeni sorgulanan bacakları tek ifadeyle yaz (varsa güncelle).
+
+        ON CONFLICT ile iki worker aynı bacağı aynı anda yazsa bile unique
+        ihlali transaction'ı bozmaz.
+
+        Args:
+            bacaklar: {(kaynak, hedef): saniye veya None}
+            saat_dilimi: Kalkış saati dilimi
+        """
+        if not bacaklar:
+            return
+        simdi = fields.Datetime.now()
+        satirlar = [
+            (kaynak, hedef, saat_dilimi, sure, sure is not None, simdi)
+            for (kaynak, hedef), sure in bacaklar.items()
+        ]
+        execute_values_sql(
+            self.env.cr,
+            """
+            INSERT INTO teslimat_rota_matris
+                (kaynak, hedef, saat_dilimi, sure_saniye, rota_var, sorgu_zamani)
+            VALUES %s
+            ON CONFLICT (kaynak, hedef, saat_dilimi) DO UPDATE
+               SET sure_saniye = EXCLUDED.sure_saniye,
+                   rota_var = EXCLUDED.rota_var,
+                   sorgu_zamani = EXCLUDED.sorgu_zamani
+            """,
+            satirlar,
+        )
+        self.invalidate_cache()
+
+    @api.model
+    def _cron_eski_kayitlari_temizle(self) -> None:
+        """Süresi çoktan dolmuş önbellek kayıtlarını sil (tablo şişmesin)."""
+        from .teslimat_route_service import get_maps_route_config
+
+        ttl_saat = get_maps_route_config(self.env)["matris_ttl_saat"]
+        # TTL'in 2 katı: yeni dolmuş kayıtlar upsert ile zaten tazelenir.
+        sinir = fields.Datetime.now() - timedelta(hours=ttl_saat * 2)
+        self.env.cr.execute(
+            "DELETE FROM teslimat_rota_matris WHERE sorgu_zamani < %s", (sinir,)
+        )
+        _logger.info(
+            "Rota matris önbelleği: %s eski kayıt silindi", self.env.cr.rowcount
+        )
+        self.invalidate_cache()
@@ -0,0 +1,148 @@
+"""Yerel (API'siz) rota süre matrisi - haversine mesafe × yol katsayısı / hız.
+
+Google Routes API'ye alternatif arka uç: koordinatlardan anında, ücretsiz ve
+deterministik süre matrisi üretir. Trafik bilgisi yoktur; API anahtarı
+olmayan kurulumlar, API kesintileri ve testler için kullanılır.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # İsteğe bağlı: yoksa saf Python döngüsü
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Optional[Tuple[float, float]]
+
+
+def parse_coordinates(text: str) -> Point:
+    """"enlem,boylam" metnini (lat, lng) çiftine çevir; değilse None."""
+    parts = (text or "").split(",")
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lng = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+
+def partner_coordinates(record) -> Point:
+    """Teslimat müşterisinin gerçek koordinatı (ilçe merkezine düşmeden)."""
+    partner = record.musteri_id
+    if partner and (partner.partner_latitude or partner.partner_longitude):
+        return partner.partner_latitude, partner.partner_longitude
+    return None
+
+
+def delivery_coordinates(record) -> Point:
+    """Teslimatın konumu: müşteri koordinatı, yoksa ilçe merkezi (centroid).
+
+    0,0 Odoo'da "girilmemiş" anlamına geldiğinden geçersiz sayılır.
+    """
+    point = partner_coordinates(record)
+    if point:
+        return point
+    ilce = record.ilce_id
+    if ilce and (ilce.enlem or ilce.boylam):
+        return ilce.enlem, ilce.boylam
+    return None
+
+
+def build_local_travel_matrix(
+    points: List[Point],
+    road_factor: float,
+    speed_kmh: float,
+) -> List[List[Optional[int]]]:
+    """Noktalar arası süre matrisi (saniye), haversine × yol katsayısı / hız.
+
+    numpy varsa tüm çiftler tek yayın (broadcast) işlemiyle hesaplanır; yoksa
+    trigonometrik terimleri nokta başına bir kez hesaplayan saf Python döngüsü
+    kullanılır (sonuçlar aynı).
+
+    Args:
+        points: (enlem, boylam) listesi; points[0] depo. None olan nokta
+            (konumu bilinmeyen durak) için bacaklar None (ulaşılamaz) döner.
+            Depo None ise depo bacakları 0 sayılır (rota ilk duraktan başlar).
+        road_factor: Kuş uçuşu → yol mesafesi katsayısı (ör. 1.3)
+        speed_kmh: Ortalama hız (km/sa)
+
+    Returns:
+        list: NxN simetrik süre matrisi
+    """
+    seconds_per_km = 3600.0 * road_factor / speed_kmh
+    if np is not None:
+        return _local_travel_matrix_np(points, seconds_per_km)
+    return _local_travel_matrix_py(points, seconds_per_km)
+
+
+def _local_travel_matrix_np(
+    points: List[Point], seconds_per_km: float
+) -> List[List[Optional[int]]]:
+    """build_local_travel_matrix'in numpy (yayın) uygulaması."""
+    n = len(points)
+    known = [i for i, point in enumerate(points) if point is not None]
+    if not known:
+        return [[0 if i == j else None for j in range(n)] for i in range(n)]
+    coords = np.radians(np.array([points[i] for i in known], dtype=float))
+    lat, lng = coords[:, 0], coords[:, 1]
+    cos_lat = np.cos(lat)
+    sin_dlat = np.sin((lat[None, :] - lat[:, None]) / 2.0)
+    sin_dlng = np.sin((lng[None, :] - lng[:, None]) / 2.0)
+    h = sin_dlat * sin_dlat + cos_lat[:, None] * cos_lat[None, :] * sin_dlng * sin_dlng
+    km = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+    legs = np.rint(km * seconds_per_km).astype(np.int64).tolist()
+    if len(known) == n:
+        return legs
+
+    matrix: List[List[Optional[int]]] = [
+        [0 if i == j else None for j in range(n)] for i in range(n)
+    ]
+    for a, i in enumerate(known):
+        row = matrix[i]
+        for b, j in enumerate(known):
+            row[j] = legs[a][b]
+    if points[0] is None:
+        for j in known:
+            matrix[0][j] = matrix[j][0] = 0
+    return matrix
+
+
+def _local_travel_matrix_py(
+    points: List[Point], seconds_per_km: float
+) -> List[List[Optional[int]]]:
+    """build_local_travel_matrix'in saf Python uygulaması (numpy yoksa).
+
+    Trigonometrik terimler nokta başına bir kez hesaplanır; çift başına yalnız
+    çarpma/toplama ve tek asin kalır (O(N²), 50 durak < 5 ms).
+    """
+    n = len(points)
+    prepared = []
+    for point in points:
+        if point is None:
+            prepared.append(None)
+            continue
+        lat = math.radians(point[0])
+        prepared.append((lat, math.radians(point[1]), math.cos(lat)))
+
+    matrix: List[List[Optional[int]]] = [[0] * n for _ in range(n)]
+    for i in range(n):
+        pi = prepared[i]
+        for j in range(i + 1, n):
+            pj = prepared[j]
+            if pi is None or pj is None:
+                leg = 0 if (i == 0 and pi is None and pj is not None) else None
+            else:
+                sin_dlat = math.sin((pj[0] - pi[0]) / 2.0)
+                sin_dlng = math.sin((pj[1] - pi[1]) / 2.0)
+                h = sin_dlat * sin_dlat + pi[2] * pj[2] * sin_dlng * sin_dlng
+                km = 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+                leg = int(round(km * seconds_per_km))
+            matrix[i][j] = leg
+            matrix[j][i] = leg
+    return matrix
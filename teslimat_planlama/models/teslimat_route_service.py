@@ -2,26 +2,79 @@
 
 import json
 import logging
-from itertools import permutations
-from typing import List, Optional, Tuple
+import random
+import socket
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
 from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
 from odoo import _, fields
 from odoo.exceptions import UserError
 
-from .teslimat_utils import prepare_maps_destination
+try:
+    import numpy as np
+except ImportError:  # İsteğe bağlı: yoksa saf Python Held-Karp (düşük limit)
+    np = None
+
+from .teslimat_route_local import (
+    build_local_travel_matrix,
+    delivery_coordinates,
+    parse_coordinates,
+    partner_coordinates,
+)
+from .teslimat_utils import (
+    get_istanbul_time,
+    normalize_turkce,
+    prepare_maps_destination,
+)
 
 _logger = logging.getLogger(__name__)
 
 GOOGLE_ROUTE_MATRIX_URL = (
     "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
 )
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+# computeRouteMatrix limitleri: adresli waypoint ile istek başına en fazla 100
+# element (origins × destinations), tümü koordinat ise 625; toplam en fazla
+# 50 waypoint (origins + destinations).
+ROUTES_MAX_ELEMENTS = 100
+ROUTES_MAX_ELEMENTS_LATLNG = 625
+ROUTES_MAX_WAYPOINTS = 50
+# Parçalar (tile) küçük sabit bir thread havuzunda paralel çekilir; 429/5xx
+# ve bağlantı hatalarında üstel bekleme (+jitter, Retry-After) ile tekrar denenir.
+ROUTES_FETCH_WORKERS = 4
+ROUTES_MAX_RETRIES = 3
+ROUTES_BACKOFF_BASE_SECONDS = 1.0
+ROUTES_BACKOFF_MAX_SECONDS = 10.0
 PARAM_API_KEY = "teslimat_planlama.google_maps_api_key"
 PARAM_DEPOT = "teslimat_planlama.rota_baslangic_adres"
+PARAM_MATRIX_TTL = "teslimat_planlama.rota_matris_ttl_saat"
+PARAM_IMPROVE_BUDGET = "teslimat_planlama.rota_iyilestirme_sure_ms"
+PARAM_ENGINE = "teslimat_planlama.rota_motoru"
+PARAM_ROAD_FACTOR = "teslimat_planlama.rota_yol_katsayisi"
+PARAM_AVERAGE_SPEED = "teslimat_planlama.rota_ortalama_hiz_kmh"
 # Generic placeholder — gerçek depo adresi Ayarlar'dan (PARAM_DEPOT) girilir.
 DEFAULT_DEPOT_ADDRESS = "İstanbul, Türkiye"
+# Önbellekteki trafik süresi bu kadar saat geçerli (aynı saat dilimi için).
+DEFAULT_MATRIX_TTL_HOURS = 168
+# Greedy sonrası yerel arama (2-opt/Or-opt) için süre bütçesi (ms). Üst sınır,
+# yanlış girilen parametre worker'ı uzun süre meşgul etmesin diye sabittir.
+DEFAULT_IMPROVE_BUDGET_MS = 2000
+MAX_IMPROVE_BUDGET_MS = 30000
+# Rota motoru: google = Routes API (trafik, faturalı); yerel = haversine ×
+# yol katsayısı / ortalama hız (API'siz, anında, trafiksiz).
+ROUTE_ENGINE_GOOGLE = "google"
+ROUTE_ENGINE_LOCAL = "yerel"
+DEFAULT_ROAD_FACTOR = 1.3
+DEFAULT_AVERAGE_SPEED_KMH = 25.0
 ROTA_SIRALANABILIR_DURUMLAR = ("hazir", "yolda")
+# Ağ hataları: HTTPError/URLError ve bağlantı hataları OSError alt sınıfıdır.
+# Python < 3.10'da okuma zaman aşımı socket.timeout verir (TimeoutError değil).
+_NETWORK_ERRORS = (HTTPError, URLError, socket.timeout, TimeoutError, OSError)
 
 
 def ensure_maps_config_parameters(env) -> None:
@@ -31,6 +84,37 @@ def ensure_maps_config_parameters(env) -> None:
         icp.set_param(PARAM_API_KEY, "")
     if not icp.search([("key", "=", PARAM_DEPOT)], limit=1):
         icp.set_param(PARAM_DEPOT, DEFAULT_DEPOT_ADDRESS)
+    if not icp.search([("key", "=", PARAM_MATRIX_TTL)], limit=1):
+        icp.set_param(PARAM_MATRIX_TTL, str(DEFAULT_MATRIX_TTL_HOURS))
+    if not icp.search([("key", "=", PARAM_IMPROVE_BUDGET)], limit=1):
+        icp.set_param(PARAM_IMPROVE_BUDGET, str(DEFAULT_IMPROVE_BUDGET_MS))
+    if not icp.search([("key", "=", PARAM_ENGINE)], limit=1):
+        icp.set_param(PARAM_ENGINE, ROUTE_ENGINE_GOOGLE)
+    if not icp.search([("key", "=", PARAM_ROAD_FACTOR)], limit=1):
+        icp.set_param(PARAM_ROAD_FACTOR, str(DEFAULT_ROAD_FACTOR))
+    if not icp.search([("key", "=", PARAM_AVERAGE_SPEED)], limit=1):
+        icp.set_param(PARAM_AVERAGE_SPEED, str(DEFAULT_AVERAGE_SPEED_KMH))
+
+
+def _int_param(icp, key: str, default: int) -> int:
+    """Sayısal sistem parametresi (boş/geçersiz → varsayılan)."""
+    try:
+        return int((icp.get_param(key) or "").strip() or default)
+    except ValueError:
+        _logger.warning("Geçersiz sistem parametresi %s, varsayılan kullanılıyor", key)
+        return default
+
+
+def _float_param(icp, key: str, default: float) -> float:
+    """Pozitif ondalık sistem parametresi (boş/geçersiz/≤0 → varsayılan)."""
+    try:
+        value = float((icp.get_param(key) or "").strip().replace(",", ".") or default)
+    except ValueError:
+        value = 0.0
+    if value <= 0:
+        _logger.warning("Geçersiz sistem parametresi %s, varsayılan kullanılıyor", key)
+        return default
+    return value
 
 
 def get_maps_route_config(env) -> dict:
@@ -40,11 +124,40 @@ def get_maps_route_config(env) -> dict:
         "api_key": (icp.get_param(PARAM_API_KEY) or "").strip(),
         "depot": (icp.get_param(PARAM_DEPOT) or "").strip()
         or DEFAULT_DEPOT_ADDRESS,
+        "matris_ttl_saat": max(
+            _int_param(icp, PARAM_MATRIX_TTL, DEFAULT_MATRIX_TTL_HOURS), 0
+        ),
+        "iyilestirme_sure_ms": min(
+            max(_int_param(icp, PARAM_IMPROVE_BUDGET, DEFAULT_IMPROVE_BUDGET_MS), 0),
+            MAX_IMPROVE_BUDGET_MS,
+        ),
+        "motor": ROUTE_ENGINE_LOCAL
+        if (icp.get_param(PARAM_ENGINE) or "").strip().lower() == ROUTE_ENGINE_LOCAL
+        else ROUTE_ENGINE_GOOGLE,
+        "yol_katsayisi": _float_param(icp, PARAM_ROAD_FACTOR, DEFAULT_ROAD_FACTOR),
+        "ortalama_hiz_kmh": _float_param(
+            icp, PARAM_AVERAGE_SPEED, DEFAULT_AVERAGE_SPEED_KMH
+        ),
     }
 
 
 def is_route_api_configured(env) -> bool:
-    return bool(get_maps_route_config(env)["api_key"])
+    """Otomatik sıralama çalışabilir mi (yerel motor veya Google API anahtarı)."""
+    config = get_maps_route_config(env)
+    return config["motor"] == ROUTE_ENGINE_LOCAL or bool(config["api_key"])
+
+
+def _local_travel_matrix(config: dict, records) -> List[List[Optional[int]]]:
+    """Yerel motor matrisi: depo + kayıtların koordinatları (depo = matrix[0]).
+
+    Depo "enlem,boylam" olarak girilmemişse depo bacakları 0 sayılır.
+    """
+    points = [parse_coordinates(config["depot"])] + [
+        delivery_coordinates(rec) for rec in records
+    ]
+    return build_local_travel_matrix(
+        points, config["yol_katsayisi"], config["ortalama_hiz_kmh"]
+    )
 
 
 def _duration_to_seconds(duration: Optional[str]) -> Optional[int]:
@@ -59,77 +172,474 @@ def _duration_to_seconds(duration: Optional[str]) -> Optional[int]:
     return None
 
 
-def _fetch_travel_matrix(api_key: str, addresses: List[str]) -> List[List[Optional[int]]]:
-    """NxN süre matrisi (saniye). addresses[0] depo/başlangıç."""
-    n = len(addresses)
-    if n == 0:
-        return []
+def _is_retryable(exc: Exception) -> bool:
+    """Tekrar denenebilir hata: kota (429), sunucu (5xx) veya bağlantı/zaman aşımı."""
+    if isinstance(exc, HTTPError):
+        return exc.code == 429 or exc.code >= 500
+    return isinstance(exc, _NETWORK_ERRORS)
+
 
+def _retry_delay(attempt: int, exc: Exception) -> float:
+    """Bekleme süresi: Retry-After başlığı varsa o, yoksa üstel + jitter."""
+    if isinstance(exc, HTTPError) and exc.headers:
+        retry_after = exc.headers.get("Retry-After")
+        if retry_after and retry_after.strip().isdigit():
+            return min(float(retry_after.strip()), ROUTES_BACKOFF_MAX_SECONDS)
+    delay = ROUTES_BACKOFF_BASE_SECONDS * (2 ** attempt)
+    return min(delay, ROUTES_BACKOFF_MAX_SECONDS) * random.uniform(0.5, 1.0)
+
+
+def _open_with_retry(make_request: Callable[[], Request], label: str) -> str:
+    """HTTP isteği; 429/5xx/bağlantı hatasında üstel bekleme ile tekrar dene.
+
+    Thread havuzunda çalışır: env/cursor kullanmaz, son hatayı ham istisna
+    olarak yükseltir (UserError'a çeviri ana thread'de yapılır).
+    """
+    attempt = 0
+    while True:
+        try:
+            with urlopen(make_request(), timeout=30) as response:
+                return response.read().decode("utf-8")
+        except _NETWORK_ERRORS as exc:
+            if attempt >= ROUTES_MAX_RETRIES or not _is_retryable(exc):
+                raise
+            delay = _retry_delay(attempt, exc)
+            _logger.warning(
+                "%s geçici hata (%s), %.1f sn sonra tekrar (%s/%s)",
+                label,
+                getattr(exc, "code", exc),
+                delay,
+                attempt + 1,
+                ROUTES_MAX_RETRIES,
+            )
+            time.sleep(delay)
+            attempt += 1
+
+
+def _routes_waypoint(text: str) -> dict:
+    """Routes API waypoint: "enlem,boylam" ise konum (geocode yok), değilse adres."""
+    point = parse_coordinates(text)
+    if point is None:
+        return {"waypoint": {"address": text}}
+    return {
+        "waypoint": {
+            "location": {"latLng": {"latitude": point[0], "longitude": point[1]}}
+        }
+    }
+
+
+def _fetch_matrix_tile(
+    api_key: str,
+    origins: List[str],
+    destinations: List[str],
+) -> List[List[Optional[int]]]:
+    """Tek computeRouteMatrix isteği (limit içindeki tek parça)."""
+    n_orig = len(origins)
+    n_dest = len(destinations)
     payload = {
-        "origins": [{"waypoint": {"address": addr}} for addr in addresses],
-        "destinations": [{"waypoint": {"address": addr}} for addr in addresses],
+        "origins": [_routes_waypoint(addr) for addr in origins],
+        "destinations": [_routes_waypoint(addr) for addr in destinations],
         "travelMode": "DRIVE",
         "routingPreference": "TRAFFIC_AWARE",
     }
-    request = Request(
-        GOOGLE_ROUTE_MATRIX_URL,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Content-Type": "application/json",
-            "X-Goog-Api-Key": api_key,
-            "X-Goog-FieldMask": "originIndex,destinationIndex,duration,condition",
-        },
-        method="POST",
+    data = json.dumps(payload).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "X-Goog-Api-Key": api_key,
+        "X-Goog-FieldMask": "originIndex,destinationIndex,duration,condition",
+    }
+    raw = _open_with_retry(
+        lambda: Request(
+            GOOGLE_ROUTE_MATRIX_URL, data=data, headers=headers, method="POST"
+        ),
+        "Google Routes API",
     )
 
-    try:
-        with urlopen(request, timeout=30) as response:
-            raw = response.read().decode("utf-8")
-    except HTTPError as exc:
+    elements = json.loads(raw)
+    matrix: List[List[Optional[int]]] = [[None] * n_dest for _ in range(n_orig)]
+    if isinstance(elements, list):
+        for element in elements:
+            if element.get("condition") != "ROUTE_EXISTS":
+                continue
+            o_idx = element.get("originIndex")
+            d_idx = element.get("destinationIndex")
+            if o_idx is None or d_idx is None:
+                continue
+            if 0 <= o_idx < n_orig and 0 <= d_idx < n_dest:
+                matrix[o_idx][d_idx] = _duration_to_seconds(element.get("duration"))
+    return matrix
+
+
+def _plan_matrix_tiles(
+    n_orig: int, n_dest: int, max_elements: int = ROUTES_MAX_ELEMENTS
+) -> List[Tuple[range, range]]:
+    """origins × destinations'ı istek limitlerine sığan parçalara böl.
+
+    Tüm sütun genişlikleri denenir; en az parça (istek) veren blok boyutu
+    seçilir (eşitlikte daha geniş sütun).
+    """
+    best = None
+    for cols in range(1, min(n_dest, ROUTES_MAX_WAYPOINTS - 1) + 1):
+        rows = min(n_orig, max_elements // cols, ROUTES_MAX_WAYPOINTS - cols)
+        if rows < 1:
+            break
+        count = -(-n_orig // rows) * -(-n_dest // cols)
+        if best is None or count <= best[0]:
+            best = (count, rows, cols)
+    _count, rows, cols = best
+    return [
+        (range(r, min(r + rows, n_orig)), range(c, min(c + cols, n_dest)))
+        for r in range(0, n_orig, rows)
+        for c in range(0, n_dest, cols)
+    ]
+
+
+def _fetch_travel_matrices(
+    api_key: str,
+    requests: List[Tuple[List[str], List[str]]],
+    raise_errors: bool = True,
+) -> List:
+    """Birden çok origins × destinations isteğini tek thread havuzunda çek.
+
+    Her istek limitlere sığan parçalara bölünür; TÜM isteklerin parçaları aynı
+    ROUTES_FETCH_WORKERS havuzunu paylaşır (filo genelinde bile eşzamanlı
+    istek sayısı sabit kalır). Sonuç, istek sırasıyla matris listesidir.
+
+    Args:
+        raise_errors: False ise başarısız isteğin yerine UserError nesnesi
+            döner (diğer istekler etkilenmez); True ise ilk hata yükseltilir.
+    """
+    jobs = []  # (istek_no, satır aralığı, sütun aralığı)
+    for req_idx, (origins, destinations) in enumerate(requests):
+        all_latlng = all(
+            parse_coordinates(addr) is not None for addr in origins + destinations
+        )
+        for row_range, col_range in _plan_matrix_tiles(
+            len(origins),
+            len(destinations),
+            ROUTES_MAX_ELEMENTS_LATLNG if all_latlng else ROUTES_MAX_ELEMENTS,
+        ):
+            jobs.append((req_idx, row_range, col_range))
+
+    def fetch(job):
+        req_idx, row_range, col_range = job
+        origins, destinations = requests[req_idx]
+        try:
+            return _fetch_matrix_tile(
+                api_key,
+                [origins[i] for i in row_range],
+                [destinations[j] for j in col_range],
+            )
+        except _NETWORK_ERRORS + (json.JSONDecodeError,) as exc:
+            return exc
+
+    if len(jobs) <= 1:
+        blocks = [fetch(job) for job in jobs]
+    else:
+        workers = min(ROUTES_FETCH_WORKERS, len(jobs))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="teslimat_rota"
+        ) as executor:
+            blocks = list(executor.map(fetch, jobs))
+        _logger.info(
+            "Rota matrisi: %s istek, %s parça, %s paralel istek",
+            len(requests),
+            len(jobs),
+            workers,
+        )
+
+    results: List = [
+        [[None] * len(destinations) for _ in origins]
+        for origins, destinations in requests
+    ]
+    for (req_idx, row_range, col_range), block in zip(jobs, blocks):
+        if isinstance(results[req_idx], UserError):
+            continue
+        if isinstance(block, Exception):
+            error = _routes_user_error(block)
+            if raise_errors:
+                raise error from block
+            results[req_idx] = error
+            continue
+        matrix = results[req_idx]
+        for bi, i in enumerate(row_range):
+            row = matrix[i]
+            for bj, j in enumerate(col_range):
+                row[j] = block[bi][bj]
+    return results
+
+
+def _routes_user_error(exc: Exception) -> UserError:
+    """Routes API istisnasını kullanıcıya gösterilecek UserError'a çevir (ana thread)."""
+    if isinstance(exc, HTTPError):
         body = exc.read().decode("utf-8", errors="replace")
         _logger.error("Google Routes API HTTP %s: %s", exc.code, body[:500])
-        raise UserError(
+        return UserError(
             _(
                 "Google Routes API hatası (HTTP %(code)s).\n"
                 "API anahtarı ve Routes API etkinliğini kontrol edin."
             )
             % {"code": exc.code}
-        ) from exc
-    except URLError as exc:
-        _logger.error("Google Routes API bağlantı hatası: %s", exc)
-        raise UserError(_("Google Routes API'ye bağlanılamadı.")) from exc
+        )
+    if isinstance(exc, json.JSONDecodeError):
+        _logger.error("Google Routes API geçersiz JSON: %s", exc.doc[:500])
+        return UserError(_("Google Routes API beklenmeyen yanıt döndürdü."))
+    _logger.error("Google Routes API bağlantı hatası: %s", exc)
+    return UserError(_("Google Routes API'ye bağlanılamadı."))
+
+
+def _fetch_travel_matrix(
+    api_key: str,
+    origins: List[str],
+    destinations: Optional[List[str]] = None,
+) -> List[List[Optional[int]]]:
+    """origins × destinations süre matrisi (saniye).
+
+    destinations verilmezse origins ile aynı (NxN; origins[0] depo/başlangıç).
+    Ulaşılamayan bacaklar None döner. İstek limitini aşan matrisler parçalara
+    bölünüp paralel çekilir (_fetch_travel_matrices).
+    """
+    if destinations is None:
+        destinations = origins
+    if not origins or not destinations:
+        return []
+    return _fetch_travel_matrices(api_key, [(origins, destinations)])[0]
 
-    try:
-        elements = json.loads(raw)
-    except json.JSONDecodeError as exc:
-        _logger.error("Google Routes API geçersiz JSON: %s", raw[:500])
-        raise UserError(_("Google Routes API beklenmeyen yanıt döndürdü.")) from exc
+
+def geocode_addresses(api_key: str, addresses: List[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+    """Adres metinlerini Google Geocoding API ile koordinata çevir (paralel).
+
+    Returns:
+        dict: {adres: (enlem, boylam) veya None (Google bulamadı)}. Geçici/yetki
+        hatası alan adresler sözlükte yer almaz (bir sonraki sıralamada
+        yeniden denenir). REQUEST_DENIED (ör. anahtarda Geocoding API kapalı)
+        alınırsa kalan adresler denenmez.
+    """
+    denied = []
+
+    def geocode(address):
+        if denied:
+            return address, "SKIPPED", None
+        query = urlencode(
+            {"address": address, "key": api_key, "region": "tr", "language": "tr"}
+        )
+        try:
+            raw = _open_with_retry(
+                lambda: Request("%s?%s" % (GOOGLE_GEOCODE_URL, query)),
+                "Google Geocoding API",
+            )
+            data = json.loads(raw)
+        except _NETWORK_ERRORS + (json.JSONDecodeError,) as exc:
+            return address, "ERROR", str(exc)
+        status = data.get("status")
+        if status == "OK" and data.get("results"):
+            location = data["results"][0].get("geometry", {}).get("location", {})
+            if "lat" in location and "lng" in location:
+                return address, status, (location["lat"], location["lng"])
+        if status == "REQUEST_DENIED":
+            denied.append(address)
+        return address, status, data.get("error_message")
+
+    results: Dict[str, Optional[Tuple[float, float]]] = {}
+    if not addresses:
+        return results
+    with ThreadPoolExecutor(
+        max_workers=min(ROUTES_FETCH_WORKERS, len(addresses)),
+        thread_name_prefix="teslimat_geocode",
+    ) as executor:
+        for address, status, value in executor.map(geocode, addresses):
+            if status == "OK":
+                results[address] = value
+            elif status == "ZERO_RESULTS":
+                results[address] = None
+            elif status != "SKIPPED":
+                _logger.warning(
+                    "Google Geocoding API %s (%s): %s", status, address, value
+                )
+    return results
+
+
+def _matrix_cache_key(address: str) -> str:
+    """Önbellek anahtarı: koordinat ise 5 haneye yuvarla, değilse normalize adres."""
+    text = " ".join((address or "").split())
+    parts = text.split(",")
+    if len(parts) == 2:
+        try:
+            lat, lng = float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+        else:
+            return f"{lat:.5f},{lng:.5f}"
+    return normalize_turkce(text)
+
+
+def _plan_missing_blocks(
+    n: int, missing: Set[Tuple[int, int]]
+) -> List[Tuple[List[int], List[int]]]:
+    """Eksik (i, j) bacaklarını dikdörtgen API isteklerine böl (çapraz çarpımsız).
+
+    1) Satırı tamamen eksik kaynaklar (yeni adresler) → kaynak × tüm hedefler
+       (tek fazlalık köşegen).
+    2) Kalanlar: en çok eksik bacağı kapsayan satır veya sütun seçilir ve
+       yalnız o satırın/sütunun eksik bacakları istenir; kalmayana kadar
+       tekrarlanır. Aynı hedef listesine sahip satır blokları (ve aynı kaynak
+       listesine sahip sütun blokları) birleştirilir; birleştirme yalnız tam
+       dikdörtgen oluşturuyorsa yapılır, önbellekteki bacak yeniden istenmez.
+
+    Sıralı güne durak eklemede (ardışık bacaklar + yeni durağın satırı ve
+    sütunu, ~3N bacak) bu bir sütun (N×1), bir satır (1×N) ve ardışık
+    bacaklar için 1×1 bloklar demektir: N² yerine ~3N element.
+    """
+    if not missing:
+        return []
+    by_origin: Dict[int, Set[int]] = {}
+    for i, j in missing:
+        by_origin.setdefault(i, set()).add(j)
+    full_rows = sorted(
+        i for i, dests in by_origin.items() if len(dests) >= n - 1
+    )
+    blocks: List[Tuple[List[int], List[int]]] = []
+    if full_rows:
+        blocks.append((full_rows, list(range(n))))
+    full_set = set(full_rows)
+    rest = {(i, j) for i, j in missing if i not in full_set}
+
+    row_blocks: Dict[Tuple[int, ...], List[int]] = {}
+    col_blocks: Dict[Tuple[int, ...], List[int]] = {}
+    while rest:
+        rows: Dict[int, Set[int]] = {}
+        cols: Dict[int, Set[int]] = {}
+        for i, j in rest:
+            rows.setdefault(i, set()).add(j)
+            cols.setdefault(j, set()).add(i)
+        # En büyük satır/sütun (eşitlikte satır, sonra küçük indeks: deterministik)
+        row_i = max(rows, key=lambda i: (len(rows[i]), -i))
+        col_j = max(cols, key=lambda j: (len(cols[j]), -j))
+        if len(cols[col_j]) > len(rows[row_i]):
+            origins = tuple(sorted(cols[col_j]))
+            col_blocks.setdefault(origins, []).append(col_j)
+            rest -= {(i, col_j) for i in origins}
+        else:
+            dests = tuple(sorted(rows[row_i]))
+            row_blocks.setdefault(dests, []).append(row_i)
+            rest -= {(row_i, j) for j in dests}
+    blocks.extend((sorted(origins), list(dests)) for dests, origins in row_blocks.items())
+    blocks.extend((list(origins), sorted(dests)) for origins, dests in col_blocks.items())
+    return blocks
+
+
+def _plan_travel_matrix(
+    env,
+    config: dict,
+    addresses: List[str],
+    pairs: Optional[Set[Tuple[int, int]]] = None,
+) -> dict:
+    """Matris planı: önbellekteki bacakları doldur, eksikleri API bloklarına böl.
+
+    Önbellek (teslimat.rota.matris) normalize adres + kalkış saati dilimi ile
+    anahtarlanır; TTL = PARAM_MATRIX_TTL. Köşegen (i→i) sorgulanmaz (0 sn).
+    Yalnızca okuma yapar; ağ çağrısı _fetch_travel_matrices ile ayrıca yapılır.
+
+    Args:
+        pairs: Verilirse yalnızca bu (i, j) bacakları gereklidir; diğer eksik
+            bacaklar API'den istenmez (None kalır).
+    """
+    n = len(addresses)
+    keys = [_matrix_cache_key(addr) for addr in addresses]
+    bucket = get_istanbul_time().hour
+    cached = (
+        env["teslimat.rota.matris"]
+        .sudo()
+        ._matris_oku(keys, bucket, config["matris_ttl_saat"])
+    )
 
     matrix: List[List[Optional[int]]] = [[None] * n for _ in range(n)]
-    if isinstance(elements, list):
-        for element in elements:
-            if element.get("condition") != "ROUTE_EXISTS":
-                continue
-            o_idx = element.get("originIndex")
-            d_idx = element.get("destinationIndex")
-            if o_idx is None or d_idx is None:
+    missing: Set[Tuple[int, int]] = set()
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                matrix[i][j] = 0
                 continue
-            if 0 <= o_idx < n and 0 <= d_idx < n:
-                matrix[o_idx][d_idx] = _duration_to_seconds(element.get("duration"))
+            pair = (keys[i], keys[j])
+            if pair in cached:
+                matrix[i][j] = cached[pair]
+            elif pairs is None or (i, j) in pairs:
+                missing.add((i, j))
+
+    blocks = _plan_missing_blocks(n, missing)
+    return {
+        "keys": keys,
+        "bucket": bucket,
+        "matrix": matrix,
+        "cached_count": (n * (n - 1) if pairs is None else len(pairs))
+        - len(missing),
+        "blocks": blocks,
+        "requests": [
+            ([addresses[i] for i in origin_idx], [addresses[j] for j in dest_idx])
+            for origin_idx, dest_idx in blocks
+        ],
+    }
+
+
+def _apply_travel_matrix(env, plan: dict, fetched_blocks: List) -> List[List[Optional[int]]]:
+    """API'den gelen blokları plana yerleştir ve önbelleğe yaz (upsert)."""
+    matrix = plan["matrix"]
+    keys = plan["keys"]
+    fetched: Dict[Tuple[str, str], Optional[int]] = {}
+    element_count = 0
+    for (origin_idx, dest_idx), block in zip(plan["blocks"], fetched_blocks):
+        element_count += len(origin_idx) * len(dest_idx)
+        for bi, i in enumerate(origin_idx):
+            for bj, j in enumerate(dest_idx):
+                if i == j:
+                    continue
+                matrix[i][j] = block[bi][bj]
+                fetched[(keys[i], keys[j])] = block[bi][bj]
+
+    if fetched:
+        env["teslimat.rota.matris"].sudo()._matris_yaz(fetched, plan["bucket"])
+    _logger.info(
+        "Rota matrisi: %s durak, %s bacak önbellekten, %s element API'den",
+        len(keys),
+        plan["cached_count"],
+        element_count,
+    )
     return matrix
 
 
-TSP_BRUTE_FORCE_LIMIT = 8  # 8! = 40320 perm (~hızlı). Üstünde greedy'ye düş:
-# N! büyük N'de (yönetici kapasite-bypass / araç limiti=0) worker CPU'sunu kilitler.
+def _build_travel_matrix(env, config: dict, addresses: List[str]) -> List[List[Optional[int]]]:
+    """NxN süre matrisi: önce kalıcı önbellek, API'ye yalnız eksik/süresi dolmuş bacaklar."""
+    if not addresses:
+        return []
+    plan = _plan_travel_matrix(env, config, addresses)
+    fetched_blocks = (
+        _fetch_travel_matrices(config["api_key"], plan["requests"])
+        if plan["requests"]
+        else []
+    )
+    return _apply_travel_matrix(env, plan, fetched_blocks)
+
+
+TSP_HELD_KARP_LIMIT = 16  # numpy katman DP: N=16 → ~0.1 sn, ~10 MB tablo.
+TSP_HELD_KARP_LIMIT_PURE = 13  # numpy yoksa saf Python DP: N=13 ~0.2 sn, N=16 ~1.7 sn.
+# Üstünde greedy'ye düş: tablo 2^N büyür (yönetici kapasite-bypass / araç
+# limiti=0 ile 20+ durak) ve worker CPU/belleğini kilitler. Araç-gün başına
+# çalıştığından filo genelinde süre araç sayısıyla çarpılır.
+TSP_HELD_KARP_BUDGET_MS = 1000  # Aşılırsa greedy + yerel aramaya düşülür.
+_TSP_INF = 1 << 62
+
+
+class _HeldKarpTimeout(Exception):
+    """Held-Karp süre bütçesi aşıldı (çağıran greedy + yerel aramaya düşer)."""
 
 
 def _greedy_nearest_neighbor(
     matrix: List[List[Optional[int]]], delivery_count: int
 ) -> List[int]:
-    """Nearest-neighbor sıralama (büyük N için brute-force yerine, O(N²)).
+    """Nearest-neighbor sıralama (büyük N için Held-Karp yerine, O(N²)).
 
     Depodan (0) başlar, her adımda en yakın ziyaret edilmemiş durağı seçer.
-    Geçerli komşu kalmazsa brute-force ile AYNI UserError'u verir.
+    Geçerli komşu kalmazsa Held-Karp ile AYNI UserError'u verir.
     """
     order: List[int] = []
     unvisited = set(range(1, delivery_count + 1))
@@ -153,11 +663,287 @@ def _greedy_nearest_neighbor(
     return order
 
 
-def _solve_open_tsp(matrix: List[List[Optional[int]]], delivery_count: int) -> List[int]:
+def _held_karp_open_path(
+    matrix: List[List[Optional[int]]],
+    delivery_count: int,
+    deadline: Optional[float] = None,
+) -> Optional[List[int]]:
+    """Açık yol için kesin (optimal) Held-Karp; numpy varsa vektörel DP.
+
+    Args:
+        deadline: time.monotonic() sınırı; aşılırsa _HeldKarpTimeout
+
+    Returns:
+        matrix indeksleri (1..delivery_count) veya tam yol yoksa None
+    """
+    if np is not None:
+        return _held_karp_open_path_np(matrix, delivery_count, deadline)
+    return _held_karp_open_path_py(matrix, delivery_count, deadline)
+
+
+def _held_karp_open_path_np(
+    matrix: List[List[Optional[int]]],
+    delivery_count: int,
+    deadline: Optional[float] = None,
+) -> Optional[List[int]]:
+    """Held-Karp, popcount katmanı başına numpy ile gevşetme (pull).
+
+    dp[mask, k] = min_j dp[mask ^ bit_k, j] + süre[j, k]; aynı katmandaki ve
+    k'yı içeren tüm mask'ler tek (L × n) işlemle hesaplanır: Python döngüsü
+    2^N·N² yerine yalnız N² kez döner. Ulaşılamaz (None) bacak = inf; inf
+    toplamları int64'ü taşırmasın diye inf = _TSP_INF >> 2.
+    """
+    n = delivery_count
+    full = 1 << n
+    inf = _TSP_INF >> 2
+    legs = np.full((n, n), inf, dtype=np.int64)
+    for j in range(n):
+        row = matrix[j + 1]
+        for k in range(n):
+            if k != j and row[k + 1] is not None:
+                legs[j, k] = row[k + 1]
+    dp = np.full((full, n), inf, dtype=np.int64)
+    parent = np.full((full, n), -1, dtype=np.int8)
+    for k in range(n):
+        leg = matrix[0][k + 1]
+        if leg is not None:
+            dp[1 << k, k] = leg
+
+    masks = np.arange(full, dtype=np.int64)
+    popcount = np.zeros(full, dtype=np.int8)
+    for k in range(n):
+        popcount += ((masks >> k) & 1).astype(np.int8)
+    for size in range(2, n + 1):
+        layer = masks[popcount == size]
+        for k in range(n):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise _HeldKarpTimeout()
+            bit = 1 << k
+            sel = layer[(layer & bit) != 0]
+            cand = dp[sel ^ bit] + legs[:, k]
+            best = cand.argmin(axis=1)
+            value = cand[np.arange(len(sel)), best]
+            reachable = value < inf
+            dp[sel[reachable], k] = value[reachable]
+            parent[sel[reachable], k] = best[reachable]
+
+    best_end = int(dp[full - 1].argmin())
+    if dp[full - 1, best_end] >= inf:
+        return None
+    order: List[int] = []
+    mask, j = full - 1, best_end
+    while j >= 0:
+        order.append(j + 1)
+        prev = int(parent[mask, j])
+        mask ^= 1 << j
+        j = prev
+    order.reverse()
+    return order
+
+
+def _held_karp_open_path_py(
+    matrix: List[List[Optional[int]]],
+    delivery_count: int,
+    deadline: Optional[float] = None,
+) -> Optional[List[int]]:
+    """Açık yol için kesin (optimal) Held-Karp bitmask DP (saf Python).
+
+    dp[mask·n + j] = depodan başlayıp mask'teki durakları gezerek j'de biten
+    en kısa süre. Tablolar array-backed (int64 süre + int8 ebeveyn); None
+    (ulaşılamaz) bacaklar komşuluk listesine hiç alınmaz.
+
+    Args:
+        deadline: time.monotonic() sınırı; aşılırsa _HeldKarpTimeout
+
+    Returns:
+        matrix indeksleri (1..delivery_count) veya tam yol yoksa None
+    """
+    n = delivery_count
+    full = 1 << n
+    dp = array("q", [_TSP_INF]) * (full * n)
+    parent = array("b", [-1]) * (full * n)
+
+    # Durak j → (k, bit, süre) komşuları (0 tabanlı durak indeksleri)
+    adjacency = []
+    for j in range(n):
+        row = matrix[j + 1]
+        adjacency.append(
+            [
+                (k, 1 << k, row[k + 1])
+                for k in range(n)
+                if k != j and row[k + 1] is not None
+            ]
+        )
+    for j in range(n):
+        leg = matrix[0][j + 1]
+        if leg is not None:
+            dp[(1 << j) * n + j] = leg
+
+    for mask in range(1, full):
+        if deadline is not None and not mask & 0xFF and time.monotonic() >= deadline:
+            raise _HeldKarpTimeout()
+        base = mask * n
+        for j in range(n):
+            cur = dp[base + j]
+            if cur == _TSP_INF:
+                continue
+            for k, bit, leg in adjacency[j]:
+                if mask & bit:
+                    continue
+                idx = (mask | bit) * n + k
+                total = cur + leg
+                if total < dp[idx]:
+                    dp[idx] = total
+                    parent[idx] = j
+
+    mask = full - 1
+    best_end = -1
+    best_seconds = _TSP_INF
+    for j in range(n):
+        total = dp[mask * n + j]
+        if total < best_seconds:
+            best_seconds, best_end = total, j
+    if best_end < 0:
+        return None
+
+    order: List[int] = []
+    j = best_end
+    while j >= 0:
+        order.append(j + 1)
+        prev = parent[mask * n + j]
+        mask ^= 1 << j
+        j = prev
+    order.reverse()
+    return order
+
+
+def _leg(matrix: List[List[Optional[int]]], a: int, b: int) -> int:
+    """Bacak süresi; ulaşılamaz (None) bacak = çok büyük ceza (hamle reddedilir)."""
+    leg = matrix[a][b]
+    return _TSP_INF if leg is None else leg
+
+
+def _path_seconds(matrix: List[List[Optional[int]]], path: Sequence[int]) -> int:
+    """Açık yolun toplam süresi (path[0] = depo)."""
+    return sum(_leg(matrix, path[t - 1], path[t]) for t in range(1, len(path)))
+
+
+def _two_opt_pass(matrix, path: List[int], deadline: float) -> bool:
+    """2-opt: path[i..j] segmentini ters çevir (ilk iyileştirmede uygula).
+
+    Matris asimetrik (trafik) olduğundan ters segmentin iç maliyeti de değişir;
+    ileri/geri prefix toplamlarıyla her hamlenin farkı O(1) hesaplanır.
+    """
+    m = len(path) - 1
+    fwd = [0] * (m + 1)
+    rev = [0] * (m + 1)
+    for t in range(1, m + 1):
+        fwd[t] = fwd[t - 1] + _leg(matrix, path[t - 1], path[t])
+        rev[t] = rev[t - 1] + _leg(matrix, path[t], path[t - 1])
+    for i in range(1, m):
+        if time.monotonic() >= deadline:
+            return False
+        before = path[i - 1]
+        for j in range(i + 1, m + 1):
+            after = path[j + 1] if j < m else None
+            old = _leg(matrix, before, path[i]) + (fwd[j] - fwd[i])
+            new = _leg(matrix, before, path[j]) + (rev[j] - rev[i])
+            if after is not None:
+                old += _leg(matrix, path[j], after)
+                new += _leg(matrix, path[i], after)
+            if new < old:
+                path[i:j + 1] = path[i:j + 1][::-1]
+                return True
+    return False
+
+
+def _move_segment_pass(
+    matrix, path: List[int], deadline: float, seg_lengths: Sequence[int]
+) -> bool:
+    """Segment taşıma: path[i..i+L-1]'i başka iki durak arasına al (yön korunur)."""
+    m = len(path) - 1
+    for seg_len in seg_lengths:
+        for i in range(1, m - seg_len + 2):
+            if time.monotonic() >= deadline:
+                return False
+            last = i + seg_len - 1
+            prev, first, tail = path[i - 1], path[i], path[last]
+            nxt = path[last + 1] if last < m else None
+            removed = _leg(matrix, prev, first)
+            if nxt is not None:
+                removed += _leg(matrix, tail, nxt) - _leg(matrix, prev, nxt)
+            for k in range(0, m + 1):
+                if i - 1 <= k <= last:
+                    continue
+                a = path[k]
+                b = path[k + 1] if k < m else None
+                added = _leg(matrix, a, first)
+                if b is not None:
+                    added += _leg(matrix, tail, b) - _leg(matrix, a, b)
+                if added < removed:
+                    segment = path[i:last + 1]
+                    rest = path[:i] + path[last + 1:]
+                    pos = k + 1 if k < i else k + 1 - seg_len
+                    path[:] = rest[:pos] + segment + rest[pos:]
+                    return True
+    return False
+
+
+def _relocate_pass(matrix, path: List[int], deadline: float) -> bool:
+    """Relocate: tek durağı en iyi konuma taşı."""
+    return _move_segment_pass(matrix, path, deadline, (1,))
+
+
+def _or_opt_pass(matrix, path: List[int], deadline: float) -> bool:
+    """Or-opt: 2-3 duraklık ardışık zinciri taşı."""
+    return _move_segment_pass(matrix, path, deadline, (2, 3))
+
+
+# Yerel arama hamleleri (sırayla denenir). Yeni hamle eklemek için
+# (matrix, path, deadline) -> bool imzalı fonksiyonu listeye ekleyin.
+ROUTE_IMPROVEMENT_MOVES: Tuple[Callable[..., bool], ...] = (
+    _two_opt_pass,
+    _or_opt_pass,
+    _relocate_pass,
+)
+
+
+def _improve_route(
+    matrix: List[List[Optional[int]]],
+    order: List[int],
+    budget_ms: int,
+    moves: Sequence[Callable[..., bool]] = ROUTE_IMPROVEMENT_MOVES,
+) -> List[int]:
+    """Kurulan sırayı yerel arama ile iyileştir (süre bütçesi dolunca dur).
+
+    Hiçbir hamle iyileştirmeyene (yerel optimum) veya bütçe bitene kadar
+    hamleler sırayla uygulanır. Bütçe her iç döngüde kontrol edilir; worker
+    bütçeden fazla meşgul edilmez.
+    """
+    if budget_ms <= 0 or len(order) < 3:
+        return order
+    deadline = time.monotonic() + budget_ms / 1000.0
+    path = [0] + list(order)
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for move in moves:
+            if move(matrix, path, deadline):
+                improved = True
+                break
+    return path[1:]
+
+
+def _solve_open_tsp(
+    matrix: List[List[Optional[int]]],
+    delivery_count: int,
+    improve_budget_ms: int = 0,
+) -> List[int]:
     """Depodan (0) başlayıp tüm teslimatları minimum sürede ziyaret sırası.
 
-    N ≤ TSP_BRUTE_FORCE_LIMIT için optimal brute-force; üstünde greedy fallback
-    (worker kilidini önler).
+    N ≤ TSP_HELD_KARP_LIMIT (numpy yoksa TSP_HELD_KARP_LIMIT_PURE) için kesin
+    Held-Karp (TSP_HELD_KARP_BUDGET_MS bütçeli); üstünde veya bütçe aşılırsa greedy kurulum + improve_budget_ms
+    bütçeli yerel arama (2-opt / Or-opt / relocate).
 
     Returns:
         matrix indeksleri (1..delivery_count)
@@ -167,39 +953,45 @@ def _solve_open_tsp(matrix: List[List[Optional[int]]], delivery_count: int) -> L
     if delivery_count == 1:
         return [1]
 
-    if delivery_count > TSP_BRUTE_FORCE_LIMIT:
-        _logger.info(
-            "Rota: büyük grup (%s teslimat) — greedy sıralama (brute-force atlandı)",
-            delivery_count,
-        )
-        return _greedy_nearest_neighbor(matrix, delivery_count)
-
-    stops = list(range(1, delivery_count + 1))
-    best_order = stops
-    best_seconds = None
-
-    for perm in permutations(stops):
-        total = matrix[0][perm[0]]
-        if total is None:
-            continue
-        valid = True
-        for idx in range(len(perm) - 1):
-            leg = matrix[perm[idx]][perm[idx + 1]]
-            if leg is None:
-                valid = False
-                break
-            total += leg
-        if not valid:
-            continue
-        if best_seconds is None or total < best_seconds:
-            best_seconds = total
-            best_order = list(perm)
+    limit = TSP_HELD_KARP_LIMIT if np is not None else TSP_HELD_KARP_LIMIT_PURE
+    if delivery_count <= limit:
+        try:
+            order = _held_karp_open_path(
+                matrix,
+                delivery_count,
+                time.monotonic() + TSP_HELD_KARP_BUDGET_MS / 1000.0,
+            )
+        except _HeldKarpTimeout:
+            _logger.warning(
+                "Rota: Held-Karp %s ms bütçeyi aştı (%s teslimat), greedy + yerel arama",
+                TSP_HELD_KARP_BUDGET_MS,
+                delivery_count,
+            )
+        else:
+            if order is None:
+                raise UserError(
+                    _("Trafik matrisi tamamlanamadı; adresler Google tarafından çözülemedi.")
+                )
+            return order
 
-    if best_seconds is None:
-        raise UserError(
-            _("Trafik matrisi tamamlanamadı; adresler Google tarafından çözülemedi.")
-        )
-    return best_order
+    order = _greedy_nearest_neighbor(matrix, delivery_count)
+    greedy_seconds = _path_seconds(matrix, [0] + order)
+    started = time.monotonic()
+    order = _improve_route(matrix, order, improve_budget_ms)
+    improved_seconds = _path_seconds(matrix, [0] + order)
+    _logger.info(
+        "Rota: büyük grup (%s teslimat) — greedy %s sn → yerel arama %s sn "
+        "(%%%.1f iyileşme, %.0f ms / bütçe %s ms)",
+        delivery_count,
+        greedy_seconds,
+        improved_seconds,
+        100.0 * (greedy_seconds - improved_seconds) / greedy_seconds
+        if greedy_seconds
+        else 0.0,
+        (time.monotonic() - started) * 1000,
+        improve_budget_ms,
+    )
+    return order
 
 
 def get_rota_optimizasyon_groups(env, selected_records=None):
@@ -226,130 +1018,146 @@ def get_rota_optimizasyon_groups(env, selected_records=None):
                     "Durum Hazır veya Yolda olan teslimatları seçin."
                 )
             )
+        # Seçili araç×tarih kapsayıcı domain; fazlası bellekte ayıklanır.
+        domain = [
+            ("arac_id", "in", sorted({arac_id for arac_id, _t in keys})),
+            ("teslimat_tarihi", "in", sorted({tarih for _a, tarih in keys})),
+        ]
     else:
-        today = fields.Date.context_today(Belge)
-        keys = {
-            (rec.arac_id.id, rec.teslimat_tarihi)
-            for rec in Belge.search(
-                [
-                    ("teslimat_tarihi", "=", today),
-                    ("durum", "in", durumlar),
-                ]
-            )
-            if rec.arac_id
-        }
-        if not keys:
-            raise UserError(
-                _(
-                    "Bugün sıralanacak teslimat bulunamadı.\n\n"
-                    "Hazır veya Yolda durumunda teslimat olmalı."
-                )
+        keys = None  # bugünün tüm araç grupları
+        domain = [
+            ("teslimat_tarihi", "=", fields.Date.context_today(Belge)),
+            ("arac_id", "!=", False),
+        ]
+
+    # Tek sorgu: tüm grupların kayıtları araç, gün, sira_no sırasıyla; bölme
+    # bellekte yapılır (grup başına search yok).
+    records = Belge.search(
+        domain + [("durum", "in", durumlar)],
+        order="arac_id, teslimat_tarihi, sira_no, id",
+    )
+    if keys is None and not records:
+        raise UserError(
+            _(
+                "Bugün sıralanacak teslimat bulunamadı.\n\n"
+                "Hazır veya Yolda durumunda teslimat olmalı."
             )
+        )
+    grouped: Dict[Tuple[int, object], List[int]] = {}
+    for rec in records:
+        key = (rec.arac_id.id, rec.teslimat_tarihi)
+        if keys is None or key in keys:
+            grouped.setdefault(key, []).append(rec.id)
 
+    arac_ids = sorted({arac_id for arac_id, _tarih in grouped})
+    arac_names = dict(env["teslimat.arac"].browse(arac_ids).name_get())
     result = []
-    Arac = env["teslimat.arac"]
-    for arac_id, tarih in sorted(keys, key=lambda k: (k[1], k[0])):
-        group = Belge.search(
-            [
-                ("arac_id", "=", arac_id),
-                ("teslimat_tarihi", "=", tarih),
-                ("durum", "in", durumlar),
-            ]
+    for arac_id, tarih in sorted(grouped, key=lambda k: (k[1], k[0])):
+        result.append(
+            {
+                # Ortak prefetch: grupların alanları tek seferde okunur.
+                "records": Belge.browse(grouped[(arac_id, tarih)]).with_prefetch(
+                    records._prefetch_ids
+                ),
+                "arac_name": arac_names.get(arac_id, ""),
+                "teslimat_tarihi": tarih,
+            }
         )
-        if group:
-            result.append(
-                {
-                    "records": group,
-                    "arac_name": Arac.browse(arac_id).display_name,
-                    "teslimat_tarihi": tarih,
-                }
-            )
     if not result:
         raise UserError(_("Sıralanacak teslimat grubu bulunamadı."))
     return result
 
 
-def _sort_single_vehicle_day(records) -> Tuple[int, int, int]:
-    """Tek araç + tek gün teslimatlarını trafik süresine göre sırala.
+def _write_vehicle_day_order(sorted_recs, skipped_recs) -> None:
+    """Sıralananlar 1..k, atlananlar sona (k+1..) — tek toplu UPDATE."""
+    ordered = list(sorted_recs) + list(skipped_recs)
+    if not ordered:
+        return
+    ordered[0].env["teslimat.belgesi"]._sira_no_toplu_yaz(
+        {rec.id: sira for sira, rec in enumerate(ordered, start=1)}
+    )
 
-    KISMİ BAŞARI: müşteri/adres olmayan veya Google'ın çözemediği (ulaşılamaz)
-    teslimatlar ATLANIR (sira_no'da sona alınır), kalanlar sıralanır — tek kötü
-    kayıt tüm grubu durdurmasın.
 
-    Returns:
-        (sıralanan_sayısı, ~dakika, atlanan_sayısı)
+def _prepare_vehicle_day(records, config: dict) -> dict:
+    """Sıralama hazırlığı: aktif kayıtlar, routable (kayıt, adres) ve atlananlar.
+
+    Matris gerektirmeyen durumlar (0-1 routable) burada sonuçlandırılır:
+    state["result"] dolu döner. Aksi halde state["addresses"] matris girdisidir.
     """
+    state = {"routable": [], "skipped": [], "addresses": [], "result": None}
     records = records.exists()
-    if not records:
-        return 0, 0, 0
-
-    config = get_maps_route_config(records.env)
     active = records.filtered(
         lambda r: r.durum in ROTA_SIRALANABILIR_DURUMLAR
     ).sorted(key=lambda r: (r.sira_no, r.id))
     if not active:
-        return 0, 0, 0
-
-    def _finish(sorted_recs, skipped_recs):
-        """Sıralananlar 1..k, atlananlar sona (k+1..)."""
-        for sira, rec in enumerate(sorted_recs, start=1):
-            rec.write({"sira_no": sira})
-        for sira, rec in enumerate(skipped_recs, start=len(sorted_recs) + 1):
-            rec.write({"sira_no": sira})
-
-    # 1) Pre-filter: müşteri + harita adresi olanlar routable; olmayanlar atlanır.
-    routable = []  # [(rec, adres), ...]
-    skipped = []   # sıralanamayan kayıtlar
+        state["result"] = (0, 0, 0)
+        return state
+
+    # Pre-filter: google → müşteri + harita adresi, yerel → koordinat (müşteri
+    # veya ilçe merkezi) olanlar routable; olmayanlar atlanır.
+    local = config["motor"] == ROUTE_ENGINE_LOCAL
+    routable = state["routable"]  # [(rec, adres/koordinat), ...]
+    skipped = state["skipped"]    # sıralanamayan kayıtlar
     for rec in active:
-        adres = prepare_maps_destination(rec.musteri_id) if rec.musteri_id else ""
-        if adres:
-            routable.append((rec, adres))
+        if local:
+            waypoint = delivery_coordinates(rec)
+        else:
+            waypoint = (
+                prepare_maps_destination(rec.musteri_id) if rec.musteri_id else ""
+            )
+        if waypoint:
+            routable.append((rec, waypoint))
         else:
             skipped.append(rec)
 
-    if not routable:
-        _finish([], skipped)
-        return 0, 0, len(skipped)
-    if len(routable) == 1:
-        _finish([routable[0][0]], skipped)
-        return 1, 0, len(skipped)
+    if len(routable) <= 1:
+        _write_vehicle_day_order([p[0] for p in routable], skipped)
+        state["result"] = (len(routable), 0, len(skipped))
+        return state
+
+    # Matris SADECE routable için kurulur (tek indeks uzayı: matrix[i] ↔ routable[i-1]).
+    state["addresses"] = [config["depot"]] + [adres for _r, adres in routable]
+    return state
+
 
-    # 2) Matris SADECE routable için kurulur (tek indeks uzayı: matrix[i] ↔ routable[i-1]).
-    addresses = [config["depot"]] + [adres for _r, adres in routable]
-    matrix = _fetch_travel_matrix(config["api_key"], addresses)
+def _complete_vehicle_day(
+    state: dict, config: dict, matrix: List[List[Optional[int]]]
+) -> Tuple[int, int, int]:
+    """Matris hazır: çözülemeyen durakları ayıkla, TSP çöz, sira_no yaz."""
+    routable = state["routable"]
+    skipped = state["skipped"]
 
-    # 3) Google'ın çözemediği (tüm-None: gelinemez VE/VEYA gidilemez) durakları çıkar;
-    #    matrisi YENİDEN kur (dilimleme yok → indeks kayması yok).
-    bad = [
+    # Google'ın çözemediği (tüm-None: gelinemez VE/VEYA gidilemez) durakları çıkar;
+    # alt matris, kalan indekslerle (depo=0 dahil) satır+sütun seçilerek kurulur.
+    size = len(routable) + 1
+    bad = {
         i
-        for i in range(1, len(routable) + 1)
+        for i in range(1, size)
         if not (
-            any(matrix[j][i] is not None for j in range(len(routable) + 1) if j != i)
-            and any(matrix[i][j] is not None for j in range(len(routable) + 1) if j != i)
+            any(matrix[j][i] is not None for j in range(size) if j != i)
+            and any(matrix[i][j] is not None for j in range(size) if j != i)
         )
-    ]
+    }
     if bad:
-        bad_set = set(bad)
-        skipped += [routable[i - 1][0] for i in bad]
-        routable = [p for idx, p in enumerate(routable, start=1) if idx not in bad_set]
-        if not routable:
-            _finish([], skipped)
-            return 0, 0, len(skipped)
-        if len(routable) == 1:
-            _finish([routable[0][0]], skipped)
-            return 1, 0, len(skipped)
-        addresses = [config["depot"]] + [adres for _r, adres in routable]
-        matrix = _fetch_travel_matrix(config["api_key"], addresses)
+        skipped += [routable[i - 1][0] for i in sorted(bad)]
+        keep = [i for i in range(size) if i not in bad]
+        routable = [routable[i - 1] for i in keep[1:]]
+        matrix = [[matrix[a][b] for b in keep] for a in keep]
+        if len(routable) <= 1:
+            _write_vehicle_day_order([p[0] for p in routable], skipped)
+            return len(routable), 0, len(skipped)
 
     try:
-        order_indices = _solve_open_tsp(matrix, len(routable))
+        order_indices = _solve_open_tsp(
+            matrix, len(routable), config["iyilestirme_sure_ms"]
+        )
     except UserError:
         # Beklenmedik: routable temizlendikten sonra hâlâ tam tur yok → hepsini atla.
         _logger.warning(
             "Rota: routable küme çözülemedi (%s teslimat atlandı)", len(routable)
         )
         skipped += [p[0] for p in routable]
-        _finish([], skipped)
+        _write_vehicle_day_order([], skipped)
         return 0, 0, len(skipped)
 
     total_seconds = matrix[0][order_indices[0]] or 0
@@ -359,10 +1167,106 @@ def _sort_single_vehicle_day(records) -> Tuple[int, int, int]:
             total_seconds += leg
 
     ordered_recs = [routable[i - 1][0] for i in order_indices]
-    _finish(ordered_recs, skipped)
+    _write_vehicle_day_order(ordered_recs, skipped)
     return len(ordered_recs), int(total_seconds / 60), len(skipped)
 
 
+def _sort_single_vehicle_day(records) -> Tuple[int, int, int]:
+    """Tek araç + tek gün teslimatlarını trafik süresine göre sırala.
+
+    KISMİ BAŞARI: müşteri/adres olmayan veya Google'ın çözemediği (ulaşılamaz)
+    teslimatlar ATLANIR (sira_no'da sona alınır), kalanlar sıralanır — tek kötü
+    kayıt tüm grubu durdurmasın.
+
+    Returns:
+        (sıralanan_sayısı, ~dakika, atlanan_sayısı)
+    """
+    return sort_vehicle_day_groups(records.env, [records])[0]
+
+
+def sort_vehicle_day_groups(env, record_groups, raise_errors: bool = True) -> list:
+    """Birden çok araç+gün grubunu sırala; matrisler eşzamanlı çekilir.
+
+    1) Ana thread: eksik müşteri koordinatları geocode edilir, her grup
+       hazırlanır ve önbellekten matris planı çıkarılır.
+    2) TÜM grupların eksik bacakları tek sınırlı thread havuzunda çekilir
+       (ağ beklemesi grup sayısıyla toplanmaz; en yavaş grup kadar sürer).
+    3) Ana thread/cursor: önbelleğe yazma, TSP çözümü ve sira_no yazımı.
+
+    Args:
+        record_groups: Her biri tek araç+gün olan teslimat recordset listesi
+        raise_errors: False ise API hatası alan grup (depo ve tüm duraklar
+            koordinatlıysa) yerel motorla sıralanır, değilse dokunulmadan
+            bırakılır; True ise UserError yükseltilir.
+
+    Yerel motor seçiliyse (PARAM_ENGINE = yerel) API hiç çağrılmaz.
+
+    Returns:
+        list: Grup sırasıyla (sıralanan, ~dakika, atlanan)
+    """
+    config = get_maps_route_config(env)
+    if config["motor"] == ROUTE_ENGINE_GOOGLE and config["api_key"]:
+        # Koordinatı olmayan müşteriler bir kez geocode edilir; matris istekleri
+        # artık koordinatla gider (Google her gün adresi yeniden çözmez).
+        env["teslimat.belgesi"].concat(*record_groups).musteri_id._teslimat_geocode(
+            config["api_key"]
+        )
+    states = [_prepare_vehicle_day(records, config) for records in record_groups]
+
+    pending = [state for state in states if state["result"] is None]
+    if config["motor"] == ROUTE_ENGINE_LOCAL:
+        for state in pending:
+            matrix = _local_travel_matrix(config, [p[0] for p in state["routable"]])
+            state["result"] = _complete_vehicle_day(state, config, matrix)
+        return [state["result"] for state in states]
+
+    plans = [
+        _plan_travel_matrix(env, config, state["addresses"]) for state in pending
+    ]
+    requests = [req for plan in plans for req in plan["requests"]]
+    fetched = (
+        _fetch_travel_matrices(config["api_key"], requests, raise_errors=raise_errors)
+        if requests
+        else []
+    )
+
+    offset = 0
+    for state, plan in zip(pending, plans):
+        blocks = fetched[offset:offset + len(plan["requests"])]
+        offset += len(plan["requests"])
+        error = next((b for b in blocks if isinstance(b, UserError)), None)
+        if error is not None:
+            # API kesintisi: yerel motor yalnız depo ve TÜM duraklar gerçek
+            # koordinatlıysa anlamlıdır (ilçe merkezine düşen duraklar arası
+            # bacak 0 olur, sıra rastgeleleşir). Aksi halde grup dokunulmadan bırakılır.
+            if _can_fallback_to_local(state, config):
+                _logger.warning(
+                    "Rota: API hatası, grup yerel motorla sıralanıyor (%s teslimat): %s",
+                    len(state["routable"]) + len(state["skipped"]),
+                    error.args[0] if error.args else error,
+                )
+                matrix = _local_travel_matrix(config, [p[0] for p in state["routable"]])
+                state["result"] = _complete_vehicle_day(state, config, matrix)
+            else:
+                _logger.warning(
+                    "Rota: grup atlandı (%s teslimat), API hatası: %s",
+                    len(state["routable"]) + len(state["skipped"]),
+                    error.args[0] if error.args else error,
+                )
+                state["result"] = (0, 0, 0)
+            continue
+        matrix = _apply_travel_matrix(env, plan, blocks)
+        state["result"] = _complete_vehicle_day(state, config, matrix)
+    return [state["result"] for state in states]
+
+
+def _can_fallback_to_local(state: dict, config: dict) -> bool:
+    """API hatasında yerel motor kullanılabilir mi (depo + tüm duraklar koordinatlı)."""
+    return parse_coordinates(config["depot"]) is not None and all(
+        partner_coordinates(rec) for rec, _waypoint in state["routable"]
+    )
+
+
 def sort_vehicle_day_deliveries(records) -> Tuple[int, int, int]:
     """Tek araç + tek gün teslimatlarını trafik süresine göre sırala.
 
@@ -371,11 +1275,11 @@ def sort_vehicle_day_deliveries(records) -> Tuple[int, int, int]:
     return _sort_single_vehicle_day(records)
 
 
-def sort_deliveries_by_traffic(records) -> Tuple[int, int, int]:
+def sort_deliveries_by_traffic(records, raise_errors: bool = True) -> Tuple[int, int, int]:
     """Teslimatları araç+gün grupları halinde trafik sırasına göre sırala."""
     env = records.env
     config = get_maps_route_config(env)
-    if not config["api_key"]:
+    if config["motor"] == ROUTE_ENGINE_GOOGLE and not config["api_key"]:
         raise UserError(
             _(
                 "Google Maps API anahtarı tanımlı değil.\n\n"
@@ -388,32 +1292,149 @@ def sort_deliveries_by_traffic(records) -> Tuple[int, int, int]:
     groups = get_rota_optimizasyon_groups(
         env, selected_records=records if records else None
     )
+    results = sort_vehicle_day_groups(
+        env, [entry["records"] for entry in groups], raise_errors=raise_errors
+    )
     total_count = 0
     total_minutes = 0
     total_skipped = 0
-    for entry in groups:
-        count, minutes, skipped = _sort_single_vehicle_day(entry["records"])
+    for count, minutes, skipped in results:
         total_count += count
         total_minutes += minutes
         total_skipped += skipped
     return total_count, total_minutes, total_skipped
 
 
+def _insertion_pairs(n: int) -> Set[Tuple[int, int]]:
+    """Sıralı güne ekleme için gereken bacaklar (0 = depo, 1..n-1 sıra, n = yeni durak).
+
+    Ardışık bacaklar (k → k+1), yeni durağın sütunu (her konum → yeni) ve
+    satırı (yeni → her durak, depo hariç): 3n-2 bacak.
+    """
+    pairs = {(k, k + 1) for k in range(n - 1)}
+    pairs |= {(k, n) for k in range(n)} | {(n, k) for k in range(1, n)}
+    return pairs
+
+
+def _cheapest_insertion(matrix: List[List[Optional[int]]], n: int) -> Tuple[int, int]:
+    """Yeni durağın (n) en ucuz konumu ve ek süresi.
+
+    Yeni durak path[k] ile path[k+1] arasına girer (k = n-1: sona). Hiçbir
+    konumdan ulaşılamıyorsa ek süre _TSP_INF ve üstüdür.
+
+    Returns:
+        (k, ek_saniye)
+    """
+    best_pos, best_delta = 0, None
+    for k in range(n):
+        delta = _leg(matrix, k, n)
+        if k + 1 < n:
+            delta += _leg(matrix, n, k + 1) - _leg(matrix, k, k + 1)
+        if best_delta is None or delta < best_delta:
+            best_pos, best_delta = k, delta
+    return best_pos, best_delta
+
+
+def insert_delivery_into_sorted_day(record) -> bool:
+    """Rotası optimize edilmiş araç+güne yeni teslimatı en ucuz konuma ekle.
+
+    Cheapest insertion: mevcut sıra (a → b) korunur, yeni durak en az ek süre
+    (a→yeni + yeni→b − a→b) veren araya konur; sonraki sira_no'lar tek toplu
+    UPDATE ile kaydırılır. Yalnızca ardışık bacaklar ile yeni durağın
+    satır/sütunu gerekir (çoğu önbellekte; eksikler tek istekle çekilir).
+    Tam yeniden çözüm yapılmaz.
+
+    Returns:
+        bool: Ekleme yapıldıysa True (gün sıralı değilse / uygun değilse False)
+    """
+    if (
+        record.durum not in ROTA_SIRALANABILIR_DURUMLAR
+        or not record.arac_id
+        or not record.teslimat_tarihi
+    ):
+        return False
+    env = record.env
+    config = get_maps_route_config(env)
+    if config["motor"] == ROUTE_ENGINE_GOOGLE and not config["api_key"]:
+        return False
+
+    others = env["teslimat.belgesi"].search(
+        [
+            ("arac_id", "=", record.arac_id.id),
+            ("teslimat_tarihi", "=", record.teslimat_tarihi),
+            ("durum", "in", list(ROTA_SIRALANABILIR_DURUMLAR)),
+            ("id", "!=", record.id),
+        ],
+        order="sira_no, id",
+    )
+    if not others or not any(others.mapped("rota_siralandi")):
+        return False
+
+    if config["motor"] == ROUTE_ENGINE_GOOGLE and record.musteri_id:
+        record.musteri_id._teslimat_geocode(config["api_key"])
+    state = _prepare_vehicle_day(others | record, config)
+    if state["result"] is not None:
+        return False  # 0-1 routable: _prepare_vehicle_day sırayı zaten yazdı
+    routable = [p for p in state["routable"] if p[0] != record]
+    if len(routable) == len(state["routable"]):
+        return False  # yeni teslimatın adresi/konumu yok
+    # Mevcut sıra korunur (rota sırası = sira_no); yeni durak en sonda (indeks n).
+    routable.sort(key=lambda p: (p[0].sira_no, p[0].id))
+    n = len(routable) + 1
+    waypoints = (
+        [config["depot"]]
+        + [waypoint for _rec, waypoint in routable]
+        + [next(w for r, w in state["routable"] if r == record)]
+    )
+
+    if config["motor"] == ROUTE_ENGINE_LOCAL:
+        matrix = _local_travel_matrix(
+            config, [rec for rec, _w in routable] + [record]
+        )
+    else:
+        plan = _plan_travel_matrix(env, config, waypoints, pairs=_insertion_pairs(n))
+        fetched = (
+            _fetch_travel_matrices(config["api_key"], plan["requests"])
+            if plan["requests"]
+            else []
+        )
+        matrix = _apply_travel_matrix(env, plan, fetched)
+
+    best_pos, best_delta = _cheapest_insertion(matrix, n)
+    if best_delta >= _TSP_INF:
+        return False  # yeni durağa hiçbir konumdan ulaşılamıyor
+
+    ordered = [rec for rec, _w in routable]
+    ordered.insert(best_pos, record)
+    _write_vehicle_day_order(ordered, state["skipped"])
+    _logger.info(
+        "Rota: teslimat %s araç %s / %s sırasında %s. konuma eklendi (+%s sn)",
+        record.id,
+        record.arac_id.id,
+        record.teslimat_tarihi,
+        best_pos + 1,
+        best_delta,
+    )
+    return True
+
+
 def cron_sort_today_deliveries(env) -> None:
     """Cron: bugünkü hazır/yolda teslimatları araç bazında sırala."""
     if not is_route_api_configured(env):
-        _logger.info("Trafik rota cron: API anahtarı yok, atlandı")
+        _logger.info("Trafik rota cron: API anahtarı yok (motor: google), atlandı")
         return
 
     try:
+        started = time.monotonic()
         count, minutes, skipped = sort_deliveries_by_traffic(
-            env["teslimat.belgesi"].browse()
+            env["teslimat.belgesi"].browse(), raise_errors=False
         )
         _logger.info(
-            "Trafik rota cron: %s teslimat sıralandı, ~%s dk, %s atlandı",
+            "Trafik rota cron: %s teslimat sıralandı, ~%s dk, %s atlandı (%.1f sn)",
             count,
             minutes,
             skipped,
+            time.monotonic() - started,
         )
     except UserError as exc:
         _logger.warning(
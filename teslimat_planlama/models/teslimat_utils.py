@@ -6,6 +6,7 @@ from typing import List, Optional, Tuple
 from urllib.parse import urlencode
 
 import pytz
+from psycopg2.extras import execute_values
 
 from odoo import _
 
@@ -181,6 +182,7 @@ def format_address_for_google_maps(partner) -> str:
     """Resmi müşteri adresini Google Maps'in anlayacağı formata çevir.
 
     Örnek: Çınar Sokağı No:5, Örnek, 34710 Kadıköy/İstanbul
+    Koordinatı olan müşteri için "enlem,boylam" döner (geocode gerekmez).
     """
     if not partner:
         return ""
@@ -189,6 +191,13 @@ def format_address_for_google_maps(partner) -> str:
     lng = partner.partner_longitude
     if lat and lng:
         return f"{lat},{lng}"
+    return format_partner_address_text(partner)
+
+
+def format_partner_address_text(partner) -> str:
+    """Koordinattan bağımsız, Google'ın geocode edeceği adres metni."""
+    if not partner:
+        return ""
 
     street = (partner.street or "").strip()
     city = (partner.city or "").strip()
@@ -500,3 +509,24 @@ def check_arac_kapatma(env, arac_id: int, teslimat_tarihi: date, bypass_for_mana
         return False, mesaj
 
     return True, None
+
+
+def execute_values_sql(cr, query: str, rows: list, fetch: bool = False) -> list:
+    """Çok satırlı VALUES sorgusunu tek ifadede çalıştır (psycopg2 execute_values).
+
+    Toplu INSERT/UPSERT/DELETE yazan metotların ortak girişi; Odoo cursor'ının
+    altındaki psycopg2 cursor'ı kullanılır (aynı transaction).
+
+    Args:
+        cr: Odoo cursor
+        query: Tek "VALUES %s" yer tutuculu SQL
+        rows: Değer demetleri listesi
+        fetch: True ise RETURNING sonuçları döndürülür
+
+    Returns:
+        list: fetch=True ise dönen satırlar, değilse boş liste
+    """
+    if not rows:
+        return []
+    sonuc = execute_values(cr._obj, query, rows, fetch=fetch)
+    return sonuc if fetch else []
@@ -1,236 +1,191 @@
 odoo.define('teslimat_planlama.uygun_gunler_click', function (require) {
     "use strict";
 
-    var ListRenderer = require('web.ListRenderer');
+    var AbstractField = require('web.AbstractField');
     var Dialog = require('web.Dialog');
+    var fieldRegistry = require('web.field_registry');
+
+    // Kalan kapasite bu değerin üstündeyse satır yeşil (LOW_CAPACITY_THRESHOLD)
+    var DUSUK_KAPASITE_ESIGI = 5;
+
+    /**
+     * Kapasite Sorgulama "Uygun Günler" tablosu.
+     *
+     * Alan değeri "arac_id,ilce_id" anahtarıdır; değiştiğinde günler
+     * teslimat.ana.sayfa.get_uygun_gunler_json ile JSON olarak çekilip
+     * doğrudan çizilir. Sunucuda satır (TransientModel kaydı) yazılmaz.
+     * Satıra tıklanınca o tarih için teslimat belgesi wizard'ı açılır.
+     */
+    var UygunGunlerTablo = AbstractField.extend({
+        className: 'o_teslimat_uygun_gunler',
+        supportedFieldTypes: ['char'],
+        events: _.extend({}, AbstractField.prototype.events, {
+            'click tr.o_teslimat_gun': '_onGunClicked',
+        }),
 
-    ListRenderer.include({
         /**
-         * Extracts the ID from a Many2one field value.
-         * Handles various Many2one value formats returned by Odoo.
-         *
-         * @private
-         * @param {*} value - Many2one field value (can be number, array, object, etc.)
-         * @returns {number|null} The extracted ID or null if not found
+         * @override
          */
-        _extractMany2oneId: function (value) {
-            if (!value) {
-                return null;
-            }
-
-            // Direct numeric ID
-            if (typeof value === 'number') {
-                return value;
-            }
-
-            // Array format: [id, name]
-            if (Array.isArray(value) && value.length > 0) {
-                return value[0];
-            }
-
-            // Object with res_id property
-            if (value.res_id) {
-                return value.res_id;
-            }
-
-            // Nested data object with id
-            if (value.data && value.data.id) {
-                return value.data.id;
-            }
-
-            // Object with id property
-            if (typeof value === 'object' && value.id !== undefined) {
-                return value.id;
-            }
-
-            return value;
+        init: function () {
+            this._super.apply(this, arguments);
+            this.gunler = [];
+            this._istekNo = 0;
         },
 
         /**
-         * Parses date from various formats to YYYY-MM-DD string format.
-         * Supports: tarih_str (DD.MM.YYYY format), Moment objects, Date objects, and string dates.
+         * Anahtar değiştiğinde günleri sunucudan çek ve tabloyu çiz.
+         * Geç dönen eski istek yeni sonucu ezmesin diye istek numarası tutulur.
          *
+         * @override
          * @private
-         * @param {Object} recordData - The record data object containing date fields
-         * @returns {string|null} Formatted date string (YYYY-MM-DD) or null if parsing fails
+         * @returns {Promise}
          */
-        _parseDateFromRecord: function (recordData) {
-            var tarihValue = recordData.tarih || recordData.tarih_str;
-            var tarih = null;
-
-            // Parse from tarih_str field (format: "22.01.2026 Çar")
-            if (recordData.tarih_str) {
-                try {
-                    var parts = recordData.tarih_str.split(' ')[0].split('.');
-                    if (parts.length === 3) {
-                        // Convert DD.MM.YYYY to YYYY-MM-DD
-                        tarih = parts[2] + '-' + parts[1] + '-' + parts[0];
-                    }
-                } catch (error) {
-                    console.error('Tarih parse hatası:', error);
-                }
+        _render: function () {
+            var self = this;
+            var parcalar = (this.value || '').split(',');
+            var istekNo = ++this._istekNo;
+            if (parcalar.length !== 2) {
+                this.gunler = [];
+                this.$el.empty();
+                return Promise.resolve();
             }
-
-            // Fallback to other date formats if tarih_str parsing failed
-            if (!tarih && tarihValue) {
-                try {
-                    // Moment object
-                    if (tarihValue._isAMomentObject || typeof tarihValue.format === 'function') {
-                        tarih = tarihValue.format('YYYY-MM-DD');
-                    }
-                    // String date
-                    else if (typeof tarihValue === 'string') {
-                        tarih = tarihValue;
-                    }
-                    // JavaScript Date object
-                    else if (tarihValue instanceof Date) {
-                        tarih = tarihValue.toISOString().split('T')[0];
-                    }
-                    // Object with value property
-                    else {
-                        tarih = tarihValue.value || String(tarihValue);
-                    }
-                } catch (error) {
-                    console.error('Tarih dönüştürme hatası:', error);
+            var aracId = parseInt(parcalar[0], 10);
+            var ilceId = parseInt(parcalar[1], 10);
+            return this._rpc({
+                model: 'teslimat.ana.sayfa',
+                method: 'get_uygun_gunler_json',
+                args: [aracId, ilceId],
+            }).then(function (gunler) {
+                if (istekNo !== self._istekNo) {
+                    return;
                 }
-            }
-
-            return tarih;
+                self.aracId = aracId;
+                self.ilceId = ilceId;
+                self.gunler = gunler;
+                self._renderTablo();
+            });
         },
 
         /**
-         * Finds the parent form controller for teslimat.ana.sayfa model.
-         * Traverses up the widget tree to locate the parent form.
+         * Satır rengi: Kapasite Sorgulama eşikleriyle aynı.
          *
          * @private
-         * @returns {Object|null} Parent controller or null if not found
+         * @param {Object} gun
+         * @returns {string}
          */
-        _findParentForm: function () {
-            var parent = this.getParent();
-            while (parent) {
-                var model = parent.state && (parent.state.model || parent.state.resModel);
-                if (model === 'teslimat.ana.sayfa' && parent.state && parent.state.data) {
-                    return parent;
-                }
-                parent = parent.getParent && parent.getParent();
+        _satirSinifi: function (gun) {
+            if (gun.arac_kapali_mi || gun.kalan_kapasite <= 0) {
+                return 'text-danger';
             }
-            return null;
+            if (gun.kalan_kapasite <= DUSUK_KAPASITE_ESIGI) {
+                return 'text-warning';
+            }
+            return 'text-success';
         },
 
         /**
-         * Override _onRowClicked for custom behavior on teslimat.ana.sayfa.gun model.
-         * When a row is clicked, creates a delivery document wizard with pre-filled values
-         * from the selected date row and parent form (arac_id and ilce_id).
-         *
-         * @override
          * @private
-         * @param {Event} ev - Click event object
          */
-        _onRowClicked: function (ev) {
-            // Apply custom logic only for teslimat.ana.sayfa.gun model
-            if (this.state && this.state.model === 'teslimat.ana.sayfa.gun') {
-                ev.preventDefault();
-                ev.stopPropagation();
-
-                var $row = $(ev.currentTarget);
-                var rowId = $row.data('id');
-
-                // Find the clicked record
-                var record = _.find(this.state.data, function(r) {
-                    return r.id === rowId;
+        _renderTablo: function () {
+            var self = this;
+            this.$el.empty();
+            if (!this.gunler.length) {
+                this.$el.append($('<div>', {
+                    class: 'alert alert-info mb-0',
+                    text: 'Önümüzdeki günlerde bu ilçe için uygun gün yok.',
+                }));
+                return;
+            }
+            var kapatmaVar = _.some(this.gunler, function (gun) {
+                return gun.arac_kapali_mi;
+            });
+            var basliklar = ['Tarih', 'Teslimat', 'Kalan', 'Doluluk %', 'Durum'];
+            if (kapatmaVar) {
+                basliklar.push('🚫 Kapatma Sebebi', '👤 Kapatan');
+            }
+            var $baslik = $('<tr>');
+            _.each(basliklar, function (baslik) {
+                $baslik.append($('<th>', {text: baslik}));
+            });
+            var $govde = $('<tbody>');
+            _.each(this.gunler, function (gun, index) {
+                var $satir = $('<tr>', {
+                    class: 'o_teslimat_gun ' + self._satirSinifi(gun),
+                    'data-index': index,
+                    style: 'cursor: pointer;',
                 });
-
-                if (!record || !record.data) {
-                    return;
-                }
-
-                // Kapalı güne tıklanırsa wizard açma, uyarı göster
-                if (record.data.arac_kapali_mi) {
-                    Dialog.alert(this, 'Durum kapalı ise teslimat oluşturulamaz!');
-                    return;
-                }
-
-                // Check remaining capacity (yönetici muaf: backend RULE A da bypass eder)
-                var kalanKapasite = record.data.kalan_kapasite;
-                if (kalanKapasite <= 0 && !record.data.yonetici_bypass) {
-                    Dialog.alert(this, 'Bu tarih için kapasite dolmuştur.');
-                    return;
-                }
-
-                // Parse date from record
-                var tarih = this._parseDateFromRecord(record.data);
-                if (!tarih) {
-                    Dialog.alert(this, 'Tarih bilgisi alınamadı.');
-                    return;
-                }
-
-                // Find parent form (teslimat.ana.sayfa)
-                var parentForm = this._findParentForm();
-                if (!parentForm || !parentForm.state) {
-                    Dialog.alert(this, 'Ana form bilgisi alınamadı.');
-                    return;
-                }
-
-                // Ana Sayfa kayıt ID (wizard sunucuda bu kayıttan ilçe okuyacak)
-                var anaSayfaResId = parentForm.state.res_id || parentForm.state.id || null;
-                if (Array.isArray(anaSayfaResId)) {
-                    anaSayfaResId = anaSayfaResId[0] != null ? anaSayfaResId[0] : null;
-                }
-
-                // Araç ve İlçe: state.data'dan al (bazen tek kayıt objesi, bazen kayıt dizisi)
-                var formData = parentForm.state.data;
-                if (!formData) {
-                    Dialog.alert(this, 'Ana form verisi alınamadı.');
-                    return;
-                }
-                if (Array.isArray(formData) && formData.length > 0) {
-                    formData = formData[0];
-                }
-                var aracField = formData.arac_id;
-                var ilceField = formData.ilce_id;
-
-                if (!aracField) {
-                    Dialog.alert(this, 'Araç seçimi gereklidir.');
-                    return;
-                }
-
-                var aracId = this._extractMany2oneId(aracField);
-                var ilceId = this._extractMany2oneId(ilceField);
-                if (ilceId != null && typeof ilceId !== 'number') {
-                    ilceId = parseInt(ilceId, 10) || null;
-                }
-
-                if (!aracId) {
-                    Dialog.alert(this, 'Araç bilgisi alınamadı.');
-                    return;
+                var hucreler = [
+                    gun.tarih_str,
+                    gun.teslimat_sayisi,
+                    gun.kalan_kapasite,
+                    gun.doluluk + '%',
+                    gun.durum_text,
+                ];
+                if (kapatmaVar) {
+                    hucreler.push(gun.kapatma_sebep, gun.kapatan_kisi);
                 }
+                _.each(hucreler, function (deger) {
+                    $satir.append($('<td>', {text: deger}));
+                });
+                $govde.append($satir);
+            });
+            this.$el.append(
+                $('<table>', {class: 'table table-sm table-hover o_list_table mb-0'})
+                    .append($('<thead>').append($baslik))
+                    .append($govde)
+            );
+        },
 
-                // Wizard context: tarih, araç, ilçe ve Ana Sayfa res_id (sunucuda ilçe oradan da okunur)
-                var context = {
-                    default_teslimat_tarihi: tarih,
-                    default_arac_id: aracId,
-                    default_ilce_id: ilceId || false,
-                    default_ana_sayfa_res_id: anaSayfaResId || false,
-                };
+        /**
+         * Seçilen gün için teslimat belgesi wizard'ını aç.
+         * Kapalı veya dolu günde (yönetici hariç) uyarı gösterilir.
+         *
+         * @private
+         * @param {MouseEvent} ev
+         */
+        _onGunClicked: function (ev) {
+            ev.preventDefault();
+            ev.stopPropagation();
+            var gun = this.gunler[$(ev.currentTarget).data('index')];
+            if (!gun) {
+                return;
+            }
 
-                // Open teslimat belgesi wizard with pre-filled values
-                this.do_action({
-                    name: 'Teslimat Belgesi Oluştur',
-                    type: 'ir.actions.act_window',
-                    res_model: 'teslimat.belgesi.wizard',
-                    view_mode: 'form',
-                    views: [[false, 'form']],
-                    target: 'new',
-                    context: context,
-                }, {
-                    additional_context: context,
-                });
+            // Kapalı güne tıklanırsa wizard açma, uyarı göster
+            if (gun.arac_kapali_mi) {
+                Dialog.alert(this, 'Durum kapalı ise teslimat oluşturulamaz!');
+                return;
+            }
 
+            // Kalan kapasite (yönetici muaf: backend RULE A da bypass eder)
+            if (gun.kalan_kapasite <= 0 && !gun.yonetici_bypass) {
+                Dialog.alert(this, 'Bu tarih için kapasite dolmuştur.');
                 return;
             }
 
-            // Default Odoo behavior for all other models
-            this._super.apply(this, arguments);
+            // Wizard context: tarih, araç, ilçe ve Ana Sayfa res_id (sunucuda ilçe oradan da okunur)
+            var context = {
+                default_teslimat_tarihi: gun.tarih,
+                default_arac_id: this.aracId,
+                default_ilce_id: this.ilceId || false,
+                default_ana_sayfa_res_id: this.record.res_id || false,
+            };
+
+            this.do_action({
+                name: 'Teslimat Belgesi Oluştur',
+                type: 'ir.actions.act_window',
+                res_model: 'teslimat.belgesi.wizard',
+                view_mode: 'form',
+                views: [[false, 'form']],
+                target: 'new',
+                context: context,
+            }, {
+                additional_context: context,
+            });
         },
     });
+
+    fieldRegistry.add('uygun_gunler_tablo', UygunGunlerTablo);
+
+    return UygunGunlerTablo;
 });
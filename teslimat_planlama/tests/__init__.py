@@ -0,0 +1,9 @@
+from . import test_kapasite_defteri
+from . import test_rota_tsp
+from . import test_rota_yerel_arama
+from . import test_rota_matris_parca
+from . import test_rota_yerel_motor
+from . import test_toplu_ice_aktarma
+from . import test_sira_no
+from . import test_arac_kapasite
+from . import test_uygun_araclar
@@ -0,0 +1,103 @@
+"""Teslimat testleri için ortak kurulum (araç, ilçe, program, yönetici)."""
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.teslimat_planlama.models.teslimat_utils import (
+    get_gun_kodu,
+    get_istanbul_state,
+    is_pazar_gunu,
+)
+
+
+def _sonraki_is_gunu(tarih):
+    """Pazar olmayan ilk gün (tarih dahil)."""
+    while is_pazar_gunu(tarih):
+        tarih += timedelta(days=1)
+    return tarih
+
+
+class TeslimatTestCommon(TransactionCase):
+    """Testlerin paylaştığı veri: iki iş günü programlı bir ilçe, bir küçük
+    araç, bir müşteri ve yönetici kullanıcı.
+
+    Teslimat tarihleri en az iki gün ileridir (aynı gün 12:00 kuralı ve
+    geçmiş tarih kontrolü saatten bağımsız olsun).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+
+        cls.tarih = _sonraki_is_gunu(fields.Date.today() + timedelta(days=2))
+        cls.tarih2 = _sonraki_is_gunu(cls.tarih + timedelta(days=1))
+
+        state = get_istanbul_state(cls.env)
+        if not state:
+            state = cls.env["res.country.state"].create(
+                {"name": "İstanbul", "code": "34", "country_id": cls.env.ref("base.tr").id}
+            )
+        cls.ilce = cls.env["teslimat.ilce"].create(
+            {"name": "Test İlçesi", "state_id": state.id, "yaka_tipi": "anadolu"}
+        )
+        Gun = cls.env["teslimat.gun"]
+        for tarih in (cls.tarih, cls.tarih2):
+            gun_kodu = get_gun_kodu(tarih)
+            gun = Gun.search([("gun_kodu", "=", gun_kodu)], limit=1) or Gun.create(
+                {"name": gun_kodu.title(), "gun_kodu": gun_kodu}
+            )
+            cls.env["teslimat.gun.ilce"].create({"gun_id": gun.id, "ilce_id": cls.ilce.id})
+
+        cls.arac = cls.env["teslimat.arac"].create(
+            {"name": "Test Araç 1", "arac_tipi": "kucuk_arac_1", "gunluk_teslimat_limiti": 5}
+        )
+        cls.musteri = cls.env["res.partner"].create(
+            {"name": "Test Müşteri", "customer_rank": 1}
+        )
+        cls.yonetici = cls.env["res.users"].with_context(no_reset_password=True).create(
+            {
+                "name": "Teslimat Test Yöneticisi",
+                "login": "teslimat_test_yonetici",
+                "email": "teslimat.yonetici@example.com",
+                "groups_id": [
+                    (6, 0, [cls.env.ref("teslimat_planlama.group_teslimat_manager").id])
+                ],
+            }
+        )
+        cls.Belgesi = cls.env["teslimat.belgesi"].with_user(cls.yonetici)
+        cls.Defter = cls.env["teslimat.kapasite.defteri"]
+
+    def _teslimat_vals(self, **degerler):
+        vals = {
+            "teslimat_tarihi": self.tarih,
+            "arac_id": self.arac.id,
+            "ilce_id": self.ilce.id,
+            "musteri_id": self.musteri.id,
+        }
+        vals.update(degerler)
+        return vals
+
+    def _teslimat_olustur(self, adet=1, **degerler):
+        return self.Belgesi.create([self._teslimat_vals(**degerler) for _i in range(adet)])
+
+    def _defter_satiri(self, arac=None, tarih=None):
+        """(aktif_sayi, son_sira_no) veya satır yoksa None."""
+        self.env["teslimat.belgesi"].flush()
+        self.env.cr.execute(
+            """
+            SELECT aktif_sayi, son_sira_no FROM teslimat_kapasite_defteri
+             WHERE arac_id = %s AND tarih = %s
+            """,
+            ((arac or self.arac).id, tarih or self.tarih),
+        )
+        return self.env.cr.fetchone()
+
+    def _tutarsiz(self, duzelt=False):
+        """_defter_dogrula sonucunun test araçlarına ait satırları."""
+        arac_ids = set(self.env["teslimat.arac"].search([("name", "like", "Test Araç")]).ids)
+        return [
+            satir for satir in self.Defter._defter_dogrula(duzelt=duzelt)
+            if satir[0] in arac_ids
+        ]
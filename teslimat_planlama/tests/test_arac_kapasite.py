@@ -0,0 +1,43 @@
+"""Araç mevcut/kalan kapasitesi: kapasite defterinin bugünkü satırından."""
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TeslimatTestCommon
+
+
+@tagged("post_install", "-at_install")
+class TestAracKapasite(TeslimatTestCommon):
+
+    def test_bugunku_defter_satirindan(self):
+        bugun = fields.Date.today()
+        self.assertEqual(self.arac.mevcut_kapasite, 0)
+        self.Defter._defter_uygula({(self.arac.id, bugun): 3})
+        self.assertEqual(self.arac.mevcut_kapasite, 3)
+        self.assertEqual(self.arac.kalan_kapasite, 2)
+
+    def test_baska_gun_etkilemez(self):
+        self._teslimat_olustur(adet=2)
+        self.assertEqual(self.arac.mevcut_kapasite, 0)
+        self.assertEqual(self.arac.kalan_kapasite, 5)
+
+    def test_limit_degisince_kalan_guncellenir(self):
+        self.Defter._defter_uygula({(self.arac.id, fields.Date.today()): 2})
+        self.arac.gunluk_teslimat_limiti = 8
+        self.assertEqual(self.arac.kalan_kapasite, 6)
+
+    def test_cron_defterle_esitler(self):
+        bugun = fields.Date.today()
+        self.Defter._defter_uygula({(self.arac.id, bugun): 4})
+        self.assertEqual(self.arac.mevcut_kapasite, 4)
+        self.arac.flush()
+        self.env.cr.execute(
+            """
+            UPDATE teslimat_kapasite_defteri SET aktif_sayi = 1
+             WHERE arac_id = %s AND tarih = %s
+            """,
+            (self.arac.id, bugun),
+        )
+        self.env["teslimat.arac"]._cron_recompute_kapasite()
+        self.arac.invalidate_cache()
+        self.assertEqual(self.arac.mevcut_kapasite, 1)
+        self.assertEqual(self.arac.kalan_kapasite, 4)
@@ -0,0 +1,81 @@
+"""Kapasite defteri: create/write/unlink ile tutarlılık ve hedefli onarım."""
+from odoo.tests import tagged
+
+from .common import TeslimatTestCommon
+
+
+@tagged("post_install", "-at_install")
+class TestKapasiteDefteri(TeslimatTestCommon):
+
+    def test_create_defteri_artirir(self):
+        self._teslimat_olustur(adet=3)
+        self.assertEqual(self._defter_satiri()[0], 3)
+        self.assertEqual(self._tutarsiz(), [])
+
+    def test_iptal_tasima_silme_tutarli(self):
+        teslimatlar = self._teslimat_olustur(adet=4)
+        teslimatlar[0].write({"durum": "iptal"})
+        self.assertEqual(self._defter_satiri()[0], 3)
+
+        teslimatlar[1].write({"teslimat_tarihi": self.tarih2})
+        self.assertEqual(self._defter_satiri()[0], 2)
+        self.assertEqual(self._defter_satiri(tarih=self.tarih2)[0], 1)
+
+        teslimatlar[2].unlink()
+        self.assertEqual(self._defter_satiri()[0], 1)
+        # İptal edilen silinince sayım değişmez
+        teslimatlar[0].unlink()
+        self.assertEqual(self._defter_satiri()[0], 1)
+        self.assertEqual(self._tutarsiz(), [])
+
+    def test_onarim_yalniz_farkli_satira_dokunur(self):
+        self._teslimat_olustur(adet=2)
+        self._teslimat_olustur(adet=1, teslimat_tarihi=self.tarih2)
+        self.env.cr.execute(
+            """
+            UPDATE teslimat_kapasite_defteri SET aktif_sayi = 99, son_sira_no = 0
+             WHERE arac_id = %s AND tarih = %s
+            """,
+            (self.arac.id, self.tarih),
+        )
+        self.Defter.invalidate_cache()
+        self.env.cr.execute(
+            "SELECT id FROM teslimat_kapasite_defteri WHERE arac_id = %s ORDER BY tarih",
+            (self.arac.id,),
+        )
+        idler = [row[0] for row in self.env.cr.fetchall()]
+
+        tutarsiz = self._tutarsiz(duzelt=True)
+        self.assertEqual(
+            [(satir[1], satir[2], satir[3]) for satir in tutarsiz], [(self.tarih, 99, 2)]
+        )
+        self.assertEqual(self._defter_satiri(), (2, 2))
+        self.assertEqual(self._defter_satiri(tarih=self.tarih2), (1, 1))
+        self.assertEqual(self._tutarsiz(), [])
+        # Satırlar silinip yeniden yazılmadı
+        self.env.cr.execute(
+            "SELECT id FROM teslimat_kapasite_defteri WHERE arac_id = %s ORDER BY tarih",
+            (self.arac.id,),
+        )
+        self.assertEqual([row[0] for row in self.env.cr.fetchall()], idler)
+
+    def test_eksik_satir_olusturulur(self):
+        self._teslimat_olustur(adet=2)
+        self.env.cr.execute(
+            "DELETE FROM teslimat_kapasite_defteri WHERE arac_id = %s", (self.arac.id,)
+        )
+        self.assertEqual(len(self._tutarsiz(duzelt=True)), 1)
+        self.assertEqual(self._defter_satiri(), (2, 2))
+
+    def test_init_dolu_defteri_yeniden_kurmaz(self):
+        self._teslimat_olustur(adet=2)
+        self.env.cr.execute(
+            "SELECT id FROM teslimat_kapasite_defteri WHERE arac_id = %s", (self.arac.id,)
+        )
+        idler = sorted(row[0] for row in self.env.cr.fetchall())
+        self.Defter.init()
+        self.env.cr.execute(
+            "SELECT id FROM teslimat_kapasite_defteri WHERE arac_id = %s", (self.arac.id,)
+        )
+        self.assertEqual(sorted(row[0] for row in self.env.cr.fetchall()), idler)
+        self.assertEqual(self._defter_satiri(), (2, 2))
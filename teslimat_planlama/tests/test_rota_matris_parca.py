@@ -0,0 +1,96 @@
+"""Matris parçalama (tile/eksik blok) ve tekrar deneme sınıflandırması."""
+import socket
+from email.message import Message
+from urllib.error import HTTPError, URLError
+
+from odoo.tests.common import BaseCase
+
+from odoo.addons.teslimat_planlama.models import teslimat_route_service as rota
+
+
+def _http_hatasi(kod, retry_after=None):
+    basliklar = Message()
+    if retry_after is not None:
+        basliklar["Retry-After"] = retry_after
+    return HTTPError("https://example.com", kod, "hata", basliklar, None)
+
+
+class TestMatrisParcalama(BaseCase):
+
+    def test_parcalar_her_hucreyi_bir_kez_kapsar(self):
+        for n_orig, n_dest, sinir in [
+            (1, 1, 100), (10, 10, 100), (11, 11, 100), (37, 37, 100),
+            (60, 60, 625), (3, 80, 100), (80, 3, 100),
+        ]:
+            sayac = {}
+            for satirlar, sutunlar in rota._plan_matrix_tiles(n_orig, n_dest, sinir):
+                self.assertLessEqual(len(satirlar) * len(sutunlar), sinir)
+                self.assertLessEqual(len(satirlar) + len(sutunlar), rota.ROUTES_MAX_WAYPOINTS)
+                for i in satirlar:
+                    for j in sutunlar:
+                        sayac[(i, j)] = sayac.get((i, j), 0) + 1
+            self.assertEqual(len(sayac), n_orig * n_dest, (n_orig, n_dest, sinir))
+            self.assertEqual(set(sayac.values()), {1})
+
+    def test_sigan_matris_tek_istek(self):
+        self.assertEqual(len(rota._plan_matrix_tiles(10, 10, 100)), 1)
+
+    def test_eksik_bloklar_tum_eksikleri_kapsar(self):
+        n = 6
+        eksik = {(5, j) for j in range(n) if j != 5} | {(1, 2), (3, 2), (3, 4)}
+        bloklar = rota._plan_missing_blocks(n, eksik)
+        # Yeni durak (5) tüm hedeflerle tek satır bloğu olarak istenir
+        self.assertIn(([5], list(range(n))), bloklar)
+        for i, j in eksik:
+            self.assertTrue(any(i in kaynak and j in hedef for kaynak, hedef in bloklar))
+        self.assertEqual(rota._plan_missing_blocks(n, set()), [])
+
+    def test_ekleme_bloklari_capraz_carpim_degil(self):
+        for n in (3, 10, 20):
+            cifler = rota._insertion_pairs(n)
+            self.assertEqual(len(cifler), 3 * n - 2)
+            bloklar = rota._plan_missing_blocks(n + 1, cifler)
+            kapsanan = {(i, j) for kaynak, hedef in bloklar for i in kaynak for j in hedef}
+            # Her bacak tam bir kez, fazladan element yok
+            self.assertEqual(kapsanan, cifler)
+            self.assertEqual(sum(len(k) * len(h) for k, h in bloklar), 3 * n - 2)
+            self.assertIn((list(range(n)), [n]), bloklar)
+            self.assertIn(([n], list(range(1, n))), bloklar)
+
+    def test_en_ucuz_ekleme_konumu(self):
+        # Doğru üzerinde depo 0, duraklar 10, 20, 30; yeni 25 → 20 ile 30 arası (ek süre 0)
+        konumlar = [0, 10, 20, 30, 25]
+        matris = [[abs(a - b) for b in konumlar] for a in konumlar]
+        self.assertEqual(rota._cheapest_insertion(matris, 4), (2, 0))
+        # Yeni durak en uzakta → sona eklenir, ek süre son bacak kadar
+        konumlar[-1] = 50
+        matris = [[abs(a - b) for b in konumlar] for a in konumlar]
+        self.assertEqual(rota._cheapest_insertion(matris, 4), (3, 20))
+        # Ulaşılamayan bacak o konumu eler
+        konumlar[-1] = 25
+        matris = [[abs(a - b) for b in konumlar] for a in konumlar]
+        matris[2][4] = None
+        self.assertEqual(rota._cheapest_insertion(matris, 4)[0], 3)
+
+
+class TestTekrarDeneme(BaseCase):
+
+    def test_tekrar_denenebilir_hatalar(self):
+        self.assertTrue(rota._is_retryable(_http_hatasi(429)))
+        self.assertTrue(rota._is_retryable(_http_hatasi(503)))
+        self.assertFalse(rota._is_retryable(_http_hatasi(400)))
+        self.assertFalse(rota._is_retryable(_http_hatasi(403)))
+        self.assertTrue(rota._is_retryable(URLError("bağlantı yok")))
+        self.assertTrue(rota._is_retryable(socket.timeout("zaman aşımı")))
+        self.assertTrue(rota._is_retryable(TimeoutError()))
+        self.assertFalse(rota._is_retryable(ValueError("json")))
+
+    def test_bekleme_suresi(self):
+        self.assertEqual(rota._retry_delay(0, _http_hatasi(429, "3")), 3.0)
+        self.assertEqual(
+            rota._retry_delay(0, _http_hatasi(429, "3600")), rota.ROUTES_BACKOFF_MAX_SECONDS
+        )
+        for deneme in range(6):
+            bekleme = rota._retry_delay(deneme, URLError("x"))
+            self.assertGreater(bekleme, 0)
+            self.assertLessEqual(bekleme, rota.ROUTES_BACKOFF_MAX_SECONDS)
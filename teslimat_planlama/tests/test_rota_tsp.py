@@ -0,0 +1,109 @@
+"""Held-Karp kesin çözücü: kaba kuvvetle karşılaştırma, ulaşılamaz bacak, süre bütçesi."""
+import itertools
+import random
+import time
+import unittest
+
+from odoo.exceptions import UserError
+from odoo.tests.common import BaseCase
+
+from odoo.addons.teslimat_planlama.models import teslimat_route_service as rota
+
+
+def _rastgele_matris(n, tohum):
+    """(n+1)x(n+1) asimetrik süre matrisi; 0 = depo."""
+    rng = random.Random(tohum)
+    return [
+        [0 if i == j else rng.randint(60, 3600) for j in range(n + 1)]
+        for i in range(n + 1)
+    ]
+
+
+def _kaba_kuvvet(matris, n):
+    return min(
+        rota._path_seconds(matris, (0,) + sira)
+        for sira in itertools.permutations(range(1, n + 1))
+    )
+
+
+def _dogru_matris(n, tohum):
+    """Doğru üzerinde depo (0) ve karışık sıralı duraklar; optimum bilinir.
+
+    Depo en solda olduğundan tek optimal açık yol durakları soldan sağa gezer.
+
+    Returns:
+        (matris, optimal sıra)
+    """
+    rng = random.Random(tohum)
+    konumlar = [0] + rng.sample(range(1, 100 * n), n)
+    matris = [[abs(a - b) for b in konumlar] for a in konumlar]
+    return matris, sorted(range(1, n + 1), key=konumlar.__getitem__)
+
+
+class TestHeldKarp(BaseCase):
+
+    def test_kaba_kuvvetle_ayni_sure(self):
+        for n in range(2, 8):
+            for tohum in range(5):
+                matris = _rastgele_matris(n, tohum)
+                sira = rota._held_karp_open_path(matris, n)
+                self.assertEqual(sorted(sira), list(range(1, n + 1)))
+                self.assertEqual(
+                    rota._path_seconds(matris, [0] + sira), _kaba_kuvvet(matris, n)
+                )
+
+    def test_buyuk_n_bilinen_optimum(self):
+        for n in range(14, rota.TSP_HELD_KARP_LIMIT + 1):
+            matris, optimum = _dogru_matris(n, n)
+            self.assertEqual(rota._held_karp_open_path(matris, n), optimum)
+
+    @unittest.skipIf(rota.np is None, "numpy kurulu değil")
+    def test_numpy_saf_python_ile_ayni_sure(self):
+        for n, tohum in [(2, 0), (5, 1), (9, 2), (14, 3)]:
+            matris = _rastgele_matris(n, tohum)
+            matris[1][2] = matris[2][n] = None
+            hizli = rota._held_karp_open_path_np(matris, n)
+            referans = rota._held_karp_open_path_py(matris, n)
+            self.assertEqual(
+                rota._path_seconds(matris, [0] + hizli),
+                rota._path_seconds(matris, [0] + referans),
+            )
+
+    @unittest.skipIf(rota.np is None, "numpy kurulu değil")
+    def test_limitte_butce_icinde_kesin(self):
+        n = rota.TSP_HELD_KARP_LIMIT
+        matris, optimum = _dogru_matris(n, 7)
+        deadline = time.monotonic() + rota.TSP_HELD_KARP_BUDGET_MS / 1000.0
+        self.assertEqual(rota._held_karp_open_path(matris, n, deadline), optimum)
+
+    def test_ulasilamaz_bacaklar_atlanir(self):
+        matris = _rastgele_matris(4, 1)
+        # 1 → 2 yasak: optimal yol bu bacağı kullanamaz
+        matris[1][2] = None
+        sira = rota._held_karp_open_path(matris, 4)
+        self.assertFalse(any(a == 1 and b == 2 for a, b in zip(sira, sira[1:])))
+
+    def test_tam_yol_yoksa_none(self):
+        matris = _rastgele_matris(3, 2)
+        for i in range(4):
+            matris[i][3] = None  # 3. durağa hiçbir yerden gidilemez
+        self.assertIsNone(rota._held_karp_open_path(matris, 3))
+        with self.assertRaises(UserError):
+            rota._solve_open_tsp(matris, 3)
+
+    def test_sure_asiminda_zaman_asimi(self):
+        matris = _rastgele_matris(10, 3)
+        with self.assertRaises(rota._HeldKarpTimeout):
+            rota._held_karp_open_path(matris, 10, deadline=time.monotonic() - 1)
+        with self.assertRaises(rota._HeldKarpTimeout):
+            rota._held_karp_open_path_py(matris, 10, deadline=time.monotonic() - 1)
+
+    def test_cozucu_limit_ustunde_gecerli_sira(self):
+        n = rota.TSP_HELD_KARP_LIMIT + 3
+        matris = _rastgele_matris(n, 4)
+        sira = rota._solve_open_tsp(matris, n, improve_budget_ms=200)
+        self.assertEqual(sorted(sira), list(range(1, n + 1)))
+
+    def test_kucuk_gruplar(self):
+        self.assertEqual(rota._solve_open_tsp([[0]], 0), [])
+        self.assertEqual(rota._solve_open_tsp([[0, 5], [5, 0]], 1), [1])
@@ -0,0 +1,62 @@
+"""Yerel arama (2-opt / Or-opt / relocate): her hamle iyileştirir, bütçeye uyar."""
+import random
+import time
+
+from odoo.tests.common import BaseCase
+
+from odoo.addons.teslimat_planlama.models import teslimat_route_service as rota
+
+
+def _dogru_matris(konumlar):
+    """Doğru üzerindeki noktalar: süre = mesafe (optimal sıra soldan sağa)."""
+    return [[abs(a - b) for b in konumlar] for a in konumlar]
+
+
+def _rastgele_matris(n, tohum):
+    rng = random.Random(tohum)
+    return [
+        [0 if i == j else rng.randint(60, 3600) for j in range(n + 1)]
+        for i in range(n + 1)
+    ]
+
+
+class TestYerelArama(BaseCase):
+
+    def test_hamleler_yalniz_iyilestirince_uygular(self):
+        for hamle in rota.ROUTE_IMPROVEMENT_MOVES:
+            for tohum in range(5):
+                matris = _rastgele_matris(12, tohum)
+                yol = [0] + rota._greedy_nearest_neighbor(matris, 12)
+                onceki = rota._path_seconds(matris, yol)
+                while hamle(matris, yol, time.monotonic() + 5):
+                    simdiki = rota._path_seconds(matris, yol)
+                    self.assertLess(simdiki, onceki, hamle.__name__)
+                    onceki = simdiki
+                self.assertEqual(sorted(yol), list(range(13)))
+
+    def test_iki_opt_kesisen_yolu_duzeltir(self):
+        matris = _dogru_matris([0, 1, 2, 3, 4, 5])
+        sira = rota._improve_route(matris, [1, 4, 3, 2, 5], 1000)
+        self.assertEqual(sira, [1, 2, 3, 4, 5])
+
+    def test_greedy_den_kotu_degil(self):
+        for tohum in range(5):
+            matris = _rastgele_matris(25, tohum)
+            greedy = rota._greedy_nearest_neighbor(matris, 25)
+            iyi = rota._improve_route(matris, list(greedy), 500)
+            self.assertEqual(sorted(iyi), list(range(1, 26)))
+            self.assertLessEqual(
+                rota._path_seconds(matris, [0] + iyi),
+                rota._path_seconds(matris, [0] + greedy),
+            )
+
+    def test_butce_sifirsa_sira_degismez(self):
+        matris = _dogru_matris([0, 1, 2, 3, 4, 5])
+        self.assertEqual(rota._improve_route(matris, [1, 4, 3, 2, 5], 0), [1, 4, 3, 2, 5])
+
+    def test_suresi_gecmis_hamle_dokunmaz(self):
+        matris = _dogru_matris([0, 1, 2, 3, 4, 5])
+        for hamle in rota.ROUTE_IMPROVEMENT_MOVES:
+            yol = [0, 1, 4, 3, 2, 5]
+            self.assertFalse(hamle(matris, yol, time.monotonic() - 1))
+            self.assertEqual(yol, [0, 1, 4, 3, 2, 5])
@@ -0,0 +1,90 @@
+"""Yerel (haversine) süre matrisi ve API hatasında yerel motora düşme koşulu."""
+import random
+import unittest
+from types import SimpleNamespace
+
+from odoo.tests.common import BaseCase
+
+from odoo.addons.teslimat_planlama.models import teslimat_route_local as yerel
+from odoo.addons.teslimat_planlama.models import teslimat_route_service as rota
+from odoo.addons.teslimat_planlama.models.teslimat_route_local import (
+    build_local_travel_matrix,
+    parse_coordinates,
+)
+
+KADIKOY = (40.9903, 29.0290)
+BESIKTAS = (41.0422, 29.0083)
+
+
+def _teslimat(lat=0.0, lng=0.0):
+    musteri = SimpleNamespace(partner_latitude=lat, partner_longitude=lng)
+    return SimpleNamespace(musteri_id=musteri)
+
+
+class TestYerelMatris(BaseCase):
+
+    def test_simetrik_ve_kosegen_sifir(self):
+        matris = build_local_travel_matrix([KADIKOY, BESIKTAS, (41.0, 28.9)], 1.3, 25.0)
+        for i in range(3):
+            self.assertEqual(matris[i][i], 0)
+            for j in range(3):
+                self.assertEqual(matris[i][j], matris[j][i])
+
+    def test_bilinen_mesafe(self):
+        # Kadıköy - Beşiktaş kuş uçuşu ~6.1 km; ×1.3 / 25 km/sa ≈ 19 dk
+        sure = build_local_travel_matrix([KADIKOY, BESIKTAS], 1.3, 25.0)[0][1]
+        self.assertAlmostEqual(sure, 6.1 * 1.3 / 25.0 * 3600, delta=60)
+        # Süre yol katsayısı ve hızla orantılı
+        self.assertAlmostEqual(
+            build_local_travel_matrix([KADIKOY, BESIKTAS], 2.6, 25.0)[0][1], 2 * sure, delta=1
+        )
+        self.assertAlmostEqual(
+            build_local_travel_matrix([KADIKOY, BESIKTAS], 1.3, 50.0)[0][1], sure / 2, delta=1
+        )
+
+    def test_konumsuz_durak_ulasilamaz(self):
+        matris = build_local_travel_matrix([KADIKOY, None, BESIKTAS], 1.3, 25.0)
+        self.assertIsNone(matris[0][1])
+        self.assertIsNone(matris[1][2])
+        self.assertIsNotNone(matris[0][2])
+
+    def test_depo_konumsuzsa_ilk_bacak_sifir(self):
+        matris = build_local_travel_matrix([None, KADIKOY, BESIKTAS], 1.3, 25.0)
+        self.assertEqual(matris[0][1], 0)
+        self.assertEqual(matris[0][2], 0)
+        self.assertGreater(matris[1][2], 0)
+
+    @unittest.skipIf(yerel.np is None, "numpy kurulu değil")
+    def test_numpy_saf_python_ile_ayni(self):
+        rng = random.Random(5)
+        noktalar = [(rng.uniform(40.8, 41.2), rng.uniform(28.6, 29.3)) for _i in range(30)]
+        for ornek in (noktalar, [None] + noktalar[1:], noktalar[:5] + [None] + noktalar[6:]):
+            hizli = yerel._local_travel_matrix_np(ornek, 187.2)
+            referans = yerel._local_travel_matrix_py(ornek, 187.2)
+            for satir_hizli, satir_referans in zip(hizli, referans):
+                for a, b in zip(satir_hizli, satir_referans):
+                    if b is None:
+                        self.assertIsNone(a)
+                    else:
+                        self.assertAlmostEqual(a, b, delta=1)
+
+    def test_koordinat_ayristirma(self):
+        self.assertEqual(parse_coordinates(" 40.99, 29.03 "), (40.99, 29.03))
+        self.assertIsNone(parse_coordinates("İstanbul, Türkiye"))
+        self.assertIsNone(parse_coordinates("95.0,29.0"))
+        self.assertIsNone(parse_coordinates(""))
+
+
+class TestYerelMotoraDusme(BaseCase):
+
+    def test_tum_duraklar_koordinatliysa_duser(self):
+        state = {"routable": [(_teslimat(*KADIKOY), "a"), (_teslimat(*BESIKTAS), "b")]}
+        self.assertTrue(rota._can_fallback_to_local(state, {"depot": "41.0,29.0"}))
+
+    def test_koordinatsiz_durak_varsa_dusmez(self):
+        state = {"routable": [(_teslimat(*KADIKOY), "a"), (_teslimat(), "b")]}
+        self.assertFalse(rota._can_fallback_to_local(state, {"depot": "41.0,29.0"}))
+
+    def test_depo_adres_ise_dusmez(self):
+        state = {"routable": [(_teslimat(*KADIKOY), "a")]}
+        self.assertFalse(rota._can_fallback_to_local(state, {"depot": "İstanbul, Türkiye"}))
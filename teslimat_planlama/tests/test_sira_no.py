@@ -0,0 +1,46 @@
+"""sira_no sayacı: ardışık, toplu blok, dışarıdan yazılan numaralar ilerletir."""
+from odoo.tests import tagged
+
+from .common import TeslimatTestCommon
+
+
+@tagged("post_install", "-at_install")
+class TestSiraNo(TeslimatTestCommon):
+
+    def test_tek_tek_ardisik(self):
+        sira = [self._teslimat_olustur().sira_no for _i in range(3)]
+        self.assertEqual(sira, [1, 2, 3])
+
+    def test_toplu_create_blok_alir(self):
+        self._teslimat_olustur()
+        toplu = self._teslimat_olustur(adet=3)
+        self.assertEqual(toplu.mapped("sira_no"), [2, 3, 4])
+        diger = self._teslimat_olustur(adet=2, teslimat_tarihi=self.tarih2)
+        self.assertEqual(diger.mapped("sira_no"), [1, 2])
+
+    def test_iptal_numarasi_tekrar_verilmez(self):
+        teslimatlar = self._teslimat_olustur(adet=2)
+        teslimatlar[1].write({"durum": "iptal"})
+        self.assertEqual(self._teslimat_olustur().sira_no, 3)
+
+    def test_verilen_sira_no_sayaci_ilerletir(self):
+        self.assertEqual(self._teslimat_olustur(sira_no=10).sira_no, 10)
+        self.assertEqual(self._teslimat_olustur().sira_no, 11)
+
+    def test_toplu_yazim_sayaci_ilerletir(self):
+        teslimat = self._teslimat_olustur()
+        self.Belgesi._sira_no_toplu_yaz({teslimat.id: 20})
+        self.assertEqual(self._defter_satiri()[1], 20)
+        self.assertEqual(self._teslimat_olustur().sira_no, 21)
+
+    def test_tasinan_kayit_hedef_sayaci_ilerletir(self):
+        self._teslimat_olustur(teslimat_tarihi=self.tarih2)
+        tasinan = self._teslimat_olustur(sira_no=5)
+        tasinan.write({"teslimat_tarihi": self.tarih2})
+        self.assertEqual(self._teslimat_olustur(teslimat_tarihi=self.tarih2).sira_no, 6)
+
+    def test_get_next_sira_no_ayirir(self):
+        self._teslimat_olustur()
+        ilk = self.Belgesi._get_next_sira_no(self.arac.id, self.tarih)
+        ikinci = self.Belgesi._get_next_sira_no(self.arac.id, self.tarih)
+        self.assertEqual((ilk, ikinci), (2, 3))
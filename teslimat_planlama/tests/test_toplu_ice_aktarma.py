@@ -0,0 +1,128 @@
+"""Toplu içe aktarma: gruplama, kapasite/program hataları, boşluksuz sira_no, mükerrer."""
+import base64
+from unittest.mock import patch
+
+from odoo.exceptions import ValidationError
+from odoo.tests import tagged
+
+from .common import TeslimatTestCommon
+
+
+@tagged("post_install", "-at_install")
+class TestTopluIceAktarma(TeslimatTestCommon):
+
+    def test_satir_sirasiyla_sonuc(self):
+        sonuclar = self.Belgesi._toplu_olustur(
+            [
+                self._teslimat_vals(),
+                self._teslimat_vals(musteri_id=False),
+                self._teslimat_vals(teslimat_tarihi=self.tarih2),
+                self._teslimat_vals(),
+            ]
+        )
+        self.assertTrue(sonuclar[0]["id"] and sonuclar[2]["id"] and sonuclar[3]["id"])
+        self.assertFalse(sonuclar[1]["id"])
+        self.assertIn("musteri_id", sonuclar[1]["hata"])
+        self.assertEqual(self._defter_satiri(), (2, 2))
+        self.assertEqual(self._defter_satiri(tarih=self.tarih2), (1, 1))
+        self.assertEqual(self._tutarsiz(), [])
+
+    def test_kapasite_asan_satirlar_reddedilir(self):
+        self._teslimat_olustur(adet=4)
+        sonuclar = self.Belgesi._toplu_olustur([self._teslimat_vals() for _i in range(3)])
+        self.assertEqual([bool(sonuc["id"]) for sonuc in sonuclar], [True, False, False])
+        self.assertEqual(self._defter_satiri(), (5, 5))
+
+    def test_programda_olmayan_ilce_reddedilir(self):
+        programsiz = self.env["teslimat.ilce"].create(
+            {"name": "Programsız İlçe", "state_id": self.ilce.state_id.id, "yaka_tipi": "anadolu"}
+        )
+        sonuclar = self.Belgesi._toplu_olustur(
+            [self._teslimat_vals(ilce_id=programsiz.id), self._teslimat_vals()]
+        )
+        self.assertFalse(sonuclar[0]["id"])
+        self.assertTrue(sonuclar[0]["hata"])
+        self.assertTrue(sonuclar[1]["id"])
+        self.assertEqual(self._defter_satiri(), (1, 1))
+
+    def test_basarisiz_satir_sira_no_boslugu_birakmaz(self):
+        hatali = self.env["res.partner"].create({"name": "Hatalı Müşteri", "customer_rank": 1})
+        Belgesi = type(self.env["teslimat.belgesi"])
+        asil = Belgesi._validate_arac_kapatma
+
+        def _sahte_kontrol(record):
+            if record.musteri_id == hatali:
+                raise ValidationError("test")
+            return asil(record)
+
+        with patch.object(Belgesi, "_validate_arac_kapatma", _sahte_kontrol):
+            sonuclar = self.Belgesi._toplu_olustur(
+                [
+                    self._teslimat_vals(),
+                    self._teslimat_vals(musteri_id=hatali.id),
+                    self._teslimat_vals(),
+                ]
+            )
+        self.assertEqual([bool(sonuc["id"]) for sonuc in sonuclar], [True, False, True])
+        olusan = self.Belgesi.browse([sonuclar[0]["id"], sonuclar[2]["id"]])
+        self.assertEqual(sorted(olusan.mapped("sira_no")), [1, 2])
+        self.assertEqual(self._defter_satiri(), (2, 2))
+
+    def test_siralanmis_gun_sirasiz_isaretlenir(self):
+        mevcut = self._teslimat_olustur()
+        diger_gun = self._teslimat_olustur(teslimat_tarihi=self.tarih2)
+        self.Belgesi._sira_no_toplu_yaz({mevcut.id: 1, diger_gun.id: 1})
+        self.assertTrue(mevcut.rota_siralandi and diger_gun.rota_siralandi)
+
+        self.Belgesi._toplu_olustur([self._teslimat_vals()])
+        self.assertFalse(mevcut.rota_siralandi)
+        self.assertTrue(diger_gun.rota_siralandi)
+
+    def _transfer(self):
+        tip = self.env.ref("stock.picking_type_out")
+        picking = self.env["stock.picking"].create(
+            {
+                "picking_type_id": tip.id,
+                "location_id": tip.default_location_src_id.id,
+                "location_dest_id": self.env.ref("stock.stock_location_customers").id,
+                "partner_id": self.musteri.id,
+            }
+        )
+        picking.write({"state": "assigned"})
+        return picking
+
+    def _coz(self, *transferler):
+        wizard = self.env["teslimat.toplu.ice.aktarma.wizard"].with_user(self.yonetici).create(
+            {"dosya": base64.b64encode(b"-")}
+        )
+        return wizard._satirlari_coz(
+            [
+                (
+                    satir_no,
+                    {
+                        "transfer": picking.name,
+                        "tarih": self.tarih,
+                        "arac": self.arac.name,
+                        "ilce": self.ilce.name,
+                    },
+                )
+                for satir_no, picking in enumerate(transferler, start=2)
+            ]
+        )
+
+    def test_mevcut_teslimatli_transfer_mukerrer(self):
+        picking = self._transfer()
+        self._teslimat_olustur(stock_picking_id=picking.id)
+        satir_nolari, vals_list, hatalar = self._coz(picking)
+        self.assertEqual((satir_nolari, vals_list), ([], []))
+        self.assertEqual(len(hatalar), 1)
+        self.assertEqual(hatalar[0][0], 2)
+        self.assertIn("Mükerrer", hatalar[0][1])
+
+    def test_dosyada_tekrar_eden_transfer_mukerrer(self):
+        picking, diger = self._transfer(), self._transfer()
+        satir_nolari, vals_list, hatalar = self._coz(picking, diger, picking)
+        self.assertEqual(satir_nolari, [2, 3])
+        self.assertEqual([vals["stock_picking_id"] for vals in vals_list], [picking.id, diger.id])
+        self.assertEqual([satir_no for satir_no, _hata in hatalar], [4])
+        self.assertIn("Mükerrer", hatalar[0][1])
@@ -0,0 +1,57 @@
+"""get_uygun_araclar: istenen tarihin kapasitesi, kapatmalar, ilçe uygunluğu."""
+from odoo.tests import tagged
+
+from .common import TeslimatTestCommon
+
+
+@tagged("post_install", "-at_install")
+class TestUygunAraclar(TeslimatTestCommon):
+
+    def _uygunlar(self, tarih, adet=1):
+        return self.env["teslimat.arac"].get_uygun_araclar(self.ilce.id, tarih, adet)
+
+    def test_dolu_gun_haric(self):
+        self._teslimat_olustur(adet=5)
+        self.assertNotIn(self.arac, self._uygunlar(self.tarih))
+        self.assertIn(self.arac, self._uygunlar(self.tarih2))
+
+    def test_istenen_teslimat_sayisi(self):
+        self._teslimat_olustur(adet=3)
+        self.assertIn(self.arac, self._uygunlar(self.tarih, 2))
+        self.assertNotIn(self.arac, self._uygunlar(self.tarih, 3))
+
+    def test_kapali_gun_haric(self):
+        self.env["teslimat.arac.kapatma"].create(
+            {
+                "arac_id": self.arac.id,
+                "baslangic_tarihi": self.tarih,
+                "bitis_tarihi": self.tarih,
+                "sebep": "bakim",
+            }
+        )
+        self.assertNotIn(self.arac, self._uygunlar(self.tarih))
+        self.assertIn(self.arac, self._uygunlar(self.tarih2))
+
+    def test_ilceye_uygun_olmayan_arac_haric(self):
+        self.env["teslimat.ilce"].create(
+            {"name": "Test Avrupa İlçesi", "state_id": self.ilce.state_id.id, "yaka_tipi": "avrupa"}
+        )
+        avrupa = self.env["teslimat.arac"].create(
+            {"name": "Test Araç Avrupa", "arac_tipi": "avrupa_yakasi"}
+        )
+        self.assertNotIn(avrupa, self._uygunlar(self.tarih))
+        self.assertIn(self.arac, self._uygunlar(self.tarih))
+
+    def test_kalan_kapasiteye_gore_sirali(self):
+        genis = self.env["teslimat.arac"].create(
+            {"name": "Test Araç 2", "arac_tipi": "kucuk_arac_2", "gunluk_teslimat_limiti": 9}
+        )
+        self._teslimat_olustur(adet=1)
+        uygunlar = self._uygunlar(self.tarih)
+        self.assertLess(list(uygunlar).index(genis), list(uygunlar).index(self.arac))
+
+        sonuc = self.env["teslimat.arac"]._uygun_araclar_toplu(
+            self.ilce.id, [self.tarih, self.tarih2]
+        )
+        self.assertIn((self.arac.id, 4), sonuc[self.tarih])
+        self.assertIn((self.arac.id, 5), sonuc[self.tarih2])
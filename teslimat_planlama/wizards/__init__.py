@@ -3,3 +3,4 @@ from . import teslimat_gun_kapatma_wizard
 from . import teslimat_tamamlama_wizard
 from . import teslimat_arac_kapatma_wizard
 
+from . import teslimat_toplu_ice_aktarma_wizard
@@ -448,28 +448,20 @@ class TeslimatBelgesiWizard(models.TransientModel):
         if not gun_kodu:
             return
         
-        gun = self.env["teslimat.gun"].search(
-            [("gun_kodu", "=", gun_kodu)], limit=1
-        )
-        if not gun:
+        GunIlce = self.env["teslimat.gun.ilce"]
+        gun_adi = GunIlce._program_gun_adi(gun_kodu)
+        if not gun_adi:
             return
         
-        gun_ilce = self.env["teslimat.gun.ilce"].search(
-            [
-                ("gun_id", "=", gun.id),
-                ("ilce_id", "=", self.ilce_id.id),
-            ],
-            limit=1,
-        )
-        
-        if not gun_ilce:
+        # Genel kural + o tarihe özel kural (ana sayfa / belge validasyonu ile aynı)
+        if not GunIlce._ilce_gun_acik_mi(self.ilce_id.id, self.teslimat_tarihi):
             raise UserError(
                 _(
                     "Seçilen tarih (%(gun)s) için "
                     "%(ilce)s ilçesine teslimat yapılamaz! "
                     "İlçe-gün eşleştirmesi yok."
                 ) % {
-                    "gun": gun.name,
+                    "gun": gun_adi,
                     "ilce": self.ilce_id.name,
                 }
             )
@@ -0,0 +1,284 @@
+"""Toplu Teslimat İçe Aktarma Wizard'ı (CSV / XLSX)."""
+import base64
+import csv
+import io
+import logging
+from datetime import date, datetime
+
+from odoo import _, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import html_escape
+
+from odoo.addons.teslimat_planlama.models.teslimat_utils import (
+    is_manager,
+    normalize_turkce,
+)
+
+_logger = logging.getLogger(__name__)
+
+# Tek dosyada kabul edilen en fazla satır
+TOPLU_MAX_SATIR = 2000
+
+# Başlık (normalize) -> alan
+TOPLU_SUTUNLAR = {
+    "TRANSFER": "transfer",
+    "TRANSFER NO": "transfer",
+    "TARIH": "tarih",
+    "TESLIMAT TARIHI": "tarih",
+    "ARAÇ": "arac",
+    "ARAC": "arac",
+    "ILÇE": "ilce",
+    "ILCE": "ilce",
+    "TELEFON": "telefon",
+    "NOT": "not",
+}
+
+# Teslimat oluşturulabilen transfer durumları (teslimat wizard'ı ile aynı)
+TOPLU_TRANSFER_DURUMLARI = ("waiting", "confirmed", "assigned", "done")
+
+
+class TeslimatTopluIceAktarmaWizard(models.TransientModel):
+    """Toplu Teslimat İçe Aktarma Wizard'ı.
+
+    Transferlerden yüzlerce teslimatı tek dosyayla oluşturur. Dosyadaki
+    adlar (transfer, araç, ilçe) toplu sorgularla çözülür; oluşturma
+    teslimat.belgesi._toplu_olustur ile (araç, tarih) grupları halinde yapılır.
+    Hatalı satırlar raporlanır, diğerleri oluşturulur. Sadece yöneticiler.
+
+    Sütunlar (ilk satır başlık): Transfer, Tarih, Araç, İlçe; opsiyonel
+    Telefon, Not. Tarih YYYY-AA-GG veya GG.AA.YYYY olabilir.
+    """
+
+    _name = "teslimat.toplu.ice.aktarma.wizard"
+    _description = "Toplu Teslimat İçe Aktarma Wizard'ı"
+
+    dosya = fields.Binary(string="Dosya", required=True)
+    dosya_adi = fields.Char(string="Dosya Adı")
+    kapasite_zorla = fields.Boolean(
+        string="Araç Kapasitesini Uygula",
+        default=True,
+        help="İşaretliyse araç günlük limitini aşan satırlar oluşturulmaz "
+        "(yönetici muafiyeti içe aktarmada uygulanmaz).",
+    )
+    sms_gonder = fields.Boolean(string="Müşterilere SMS Gönder", default=False)
+    state = fields.Selection(
+        [("yukle", "Yükle"), ("sonuc", "Sonuç")], default="yukle", required=True
+    )
+    sonuc_ozeti = fields.Char(string="Özet", readonly=True)
+    sonuc_html = fields.Html(string="Hatalı Satırlar", readonly=True, sanitize=False)
+
+    def action_ice_aktar(self) -> dict:
+        """Dosyayı oku, satırları çöz ve teslimatları oluştur."""
+        self.ensure_one()
+        if not is_manager(self.env):
+            raise UserError(_("Toplu içe aktarma sadece yöneticiler tarafından yapılabilir."))
+
+        ham_satirlar = self._dosya_oku()
+        if not ham_satirlar:
+            raise UserError(_("Dosyada içe aktarılacak satır bulunamadı."))
+        if len(ham_satirlar) > TOPLU_MAX_SATIR:
+            raise UserError(
+                _("Bir dosyada en fazla %s satır içe aktarılabilir.") % TOPLU_MAX_SATIR
+            )
+
+        satir_nolari, vals_list, hatalar = self._satirlari_coz(ham_satirlar)
+        sonuclar = self.env["teslimat.belgesi"]._toplu_olustur(
+            vals_list, kapasite_zorla=self.kapasite_zorla, sms_gonder=self.sms_gonder
+        )
+        for satir_no, sonuc in zip(satir_nolari, sonuclar):
+            if sonuc["hata"]:
+                hatalar.append((satir_no, sonuc["hata"]))
+        hatalar.sort()
+
+        olusan = sum(1 for sonuc in sonuclar if sonuc["id"])
+        self.write(
+            {
+                "state": "sonuc",
+                "sonuc_ozeti": _("%(olusan)s teslimat oluşturuldu, %(hatali)s satır hatalı.")
+                % {"olusan": olusan, "hatali": len(hatalar)},
+                "sonuc_html": self._hata_tablosu(hatalar),
+            }
+        )
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    def _dosya_oku(self) -> list:
+        """Dosyayı başlık eşlemeli sözlük listesine çevir.
+
+        Returns:
+            list: [(satır_no, {"transfer", "tarih", "arac", "ilce", ...})]
+        """
+        icerik = base64.b64decode(self.dosya)
+        if (self.dosya_adi or "").lower().endswith(".xlsx"):
+            satirlar = self._xlsx_satirlari(icerik)
+        else:
+            satirlar = self._csv_satirlari(icerik)
+        if not satirlar:
+            return []
+
+        basliklar = [
+            TOPLU_SUTUNLAR.get(normalize_turkce(str(baslik or "")).strip())
+            for baslik in satirlar[0]
+        ]
+        eksik = {"transfer", "tarih", "arac", "ilce"} - set(basliklar)
+        if eksik:
+            raise UserError(
+                _("Dosyada zorunlu sütun eksik: %s") % ", ".join(sorted(eksik))
+            )
+        sonuc = []
+        for satir_no, satir in enumerate(satirlar[1:], start=2):
+            kayit = {
+                alan: deger
+                for alan, deger in zip(basliklar, satir)
+                if alan and deger not in (None, "")
+            }
+            if kayit:
+                sonuc.append((satir_no, kayit))
+        return sonuc
+
+    def _csv_satirlari(self, icerik: bytes) -> list:
+        """CSV içeriği (UTF-8 veya Windows-1254; ayraç , ; veya sekme)."""
+        try:
+            metin = icerik.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            metin = icerik.decode("cp1254")
+        try:
+            dialect = csv.Sniffer().sniff(metin[:4096], delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        return [
+            [hucre.strip() for hucre in satir]
+            for satir in csv.reader(io.StringIO(metin), dialect)
+        ]
+
+    def _xlsx_satirlari(self, icerik: bytes) -> list:
+        """XLSX içeriği (ilk sayfa). openpyxl kurulu değilse CSV istenir."""
+        try:
+            import openpyxl
+        except ImportError as exc:
+            raise UserError(
+                _("XLSX okumak için openpyxl kurulu değil. Dosyayı CSV olarak kaydedin.")
+            ) from exc
+        kitap = openpyxl.load_workbook(io.BytesIO(icerik), read_only=True, data_only=True)
+        try:
+            return [
+                [hucre.strip() if isinstance(hucre, str) else hucre for hucre in satir]
+                for satir in kitap.worksheets[0].iter_rows(values_only=True)
+            ]
+        finally:
+            kitap.close()
+
+    def _satirlari_coz(self, ham_satirlar: list) -> tuple:
+        """Transfer/araç/ilçe adlarını toplu sorgularla kayıtlara çevir.
+
+        Returns:
+            tuple: (satır_noları, vals listesi, [(satır_no, hata)])
+        """
+        transfer_adlari = {str(kayit.get("transfer", "")) for _no, kayit in ham_satirlar}
+        transferler = {
+            picking.name: picking
+            for picking in self.env["stock.picking"].search(
+                [("name", "in", list(transfer_adlari))]
+            )
+        }
+        # Mükerrer kontrol (tekli wizard ile aynı): transferin mevcut teslimatı
+        mevcut_teslimatlar = {
+            satir["stock_picking_id"][0]: satir["name"]
+            for satir in self.env["teslimat.belgesi"].search_read(
+                [("stock_picking_id", "in", [p.id for p in transferler.values()])],
+                ["stock_picking_id", "name"],
+            )
+        }
+        araclar = {
+            normalize_turkce(arac.name): arac
+            for arac in self.env["teslimat.arac"].search([("aktif", "=", True)])
+        }
+        ilceler = {}
+        for ilce in self.env["teslimat.ilce"].search(
+            [("aktif", "=", True), ("teslimat_aktif", "=", True)]
+        ):
+            ilceler.setdefault(normalize_turkce(ilce.name), ilce)
+
+        satir_nolari, vals_list, hatalar = [], [], []
+        dosyadaki = {}  # picking.id -> ilk kabul edilen satır no
+        for satir_no, kayit in ham_satirlar:
+            picking = transferler.get(str(kayit.get("transfer", "")))
+            arac = araclar.get(normalize_turkce(str(kayit.get("arac", ""))))
+            ilce = ilceler.get(normalize_turkce(str(kayit.get("ilce", ""))))
+            tarih = self._tarih_coz(kayit.get("tarih"))
+            if not picking:
+                hata = _("Transfer bulunamadı: %s") % kayit.get("transfer", "")
+            elif picking.state not in TOPLU_TRANSFER_DURUMLARI:
+                hata = _("Transfer durumu uygun değil: %s") % picking.name
+            elif picking.id in mevcut_teslimatlar:
+                hata = _("Mükerrer teslimat: %(transfer)s için %(teslimat)s zaten mevcut") % {
+                    "transfer": picking.name,
+                    "teslimat": mevcut_teslimatlar[picking.id],
+                }
+            elif picking.id in dosyadaki:
+                hata = _("Mükerrer teslimat: %(transfer)s dosyada %(satir)s. satırda da var") % {
+                    "transfer": picking.name,
+                    "satir": dosyadaki[picking.id],
+                }
+            elif not picking.partner_id:
+                hata = _("Transferde müşteri yok: %s") % picking.name
+            elif not arac:
+                hata = _("Araç bulunamadı: %s") % kayit.get("arac", "")
+            elif not ilce:
+                hata = _("İlçe bulunamadı: %s") % kayit.get("ilce", "")
+            elif not tarih:
+                hata = _("Tarih okunamadı: %s") % kayit.get("tarih", "")
+            else:
+                hata = False
+            if hata:
+                hatalar.append((satir_no, hata))
+                continue
+            dosyadaki[picking.id] = satir_no
+            satir_nolari.append(satir_no)
+            vals_list.append(
+                {
+                    "teslimat_tarihi": tarih,
+                    "arac_id": arac.id,
+                    "ilce_id": ilce.id,
+                    "musteri_id": picking.partner_id.id,
+                    "stock_picking_id": picking.id,
+                    "transfer_no": picking.name,
+                    "durum": "hazir",
+                    "manuel_telefon": kayit.get("telefon") and str(kayit["telefon"]) or False,
+                    "notlar": kayit.get("not") and str(kayit["not"]) or False,
+                }
+            )
+        return satir_nolari, vals_list, hatalar
+
+    def _tarih_coz(self, deger):
+        """Hücre değerini tarihe çevir (date/datetime, YYYY-AA-GG, GG.AA.YYYY)."""
+        if isinstance(deger, datetime):
+            return deger.date()
+        if isinstance(deger, date):
+            return deger
+        metin = str(deger or "").strip()
+        for bicim in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"):
+            try:
+                return datetime.strptime(metin, bicim).date()
+            except ValueError:
+                continue
+        return None
+
+    def _hata_tablosu(self, hatalar: list) -> str:
+        """Hatalı satırlar için salt okunur HTML tablo."""
+        if not hatalar:
+            return False
+        satirlar = "".join(
+            "<tr><td>%s</td><td>%s</td></tr>" % (satir_no, html_escape(hata))
+            for satir_no, hata in hatalar
+        )
+        return (
+            '<table class="table table-sm table-bordered mb-0">'
+            "<thead><tr><th>Satır</th><th>Hata</th></tr></thead>"
+            "<tbody>%s</tbody></table>"
+        ) % satirlar